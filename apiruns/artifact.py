@@ -0,0 +1,115 @@
+import os
+import json
+from pathlib import Path
+from typing import Dict, Tuple
+from apiruns import __version__
+from .clients import ServiceImages
+from .cache import ImageCache
+from .routes import RouteTrie
+from .utils import fingerprint
+from .exceptions import ErrorReadingArtifact
+
+
+class Artifact:
+    """Compiled manifest made by `build`, deployed by `up --from-artifact`.
+
+    Holds the validated endpoints, their route tables and the images
+    resolved to digests, as canonical json with the hash of its content.
+    Services are a list, their order gives their host ports.
+    """
+
+    FORMAT = 1
+
+    @staticmethod
+    def resolve_images(images: ServiceImages) -> ServiceImages:
+        """Pin the images to the digests resolved by the build.
+
+        Args:
+            images (ServiceImages): Images by tag or digest.
+
+        Returns:
+            ServiceImages: Images by digest, unless never resolved or local.
+        """
+
+        def resolve(reference: str) -> str:
+            entry = ImageCache.get(reference) or {}
+            return entry.get("digest") or reference
+
+        return ServiceImages(
+            api=resolve(images.api), db=resolve(images.db), proxy=resolve(images.proxy)
+        )
+
+    @classmethod
+    def compile(cls, services: Dict[str, list], images: ServiceImages) -> dict:
+        """Compile the services.
+
+        Args:
+            services (dict): Validated endpoints by API name.
+            images (ServiceImages): Images.
+
+        Returns:
+            dict: Artifact, `hash` is the sha256 of the other fields.
+        """
+        artifact = {
+            "format": cls.FORMAT,
+            "images": {"api": images.api, "db": images.db, "proxy": images.proxy},
+            "services": [
+                {
+                    "name": name,
+                    "endpoints": endpoints,
+                    "routes": RouteTrie.build(endpoints)[0].to_table(),
+                }
+                for name, endpoints in services.items()
+            ],
+        }
+        return dict(artifact, hash=fingerprint(artifact))
+
+    @classmethod
+    def write(cls, path: str, services: Dict[str, list], images: ServiceImages) -> str:
+        """Write the artifact atomically.
+
+        Args:
+            path (str): File path.
+            services (dict): Validated endpoints by API name.
+            images (ServiceImages): Images.
+
+        Returns:
+            str: Artifact hash.
+        """
+        artifact = dict(cls.compile(services, images), apiruns=__version__)
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "w") as f:
+                json.dump(artifact, f, sort_keys=True, separators=(",", ":"))
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        return artifact["hash"]
+
+    @classmethod
+    def load(cls, path: str) -> Tuple[Dict[str, list], ServiceImages]:
+        """Load an artifact, no yaml parsing nor validation.
+
+        Args:
+            path (str): File path.
+
+        Raises:
+            ErrorReadingArtifact: Missing, corrupt or of another format.
+
+        Returns:
+            Tuple[dict, ServiceImages]: Endpoints by API name & images.
+        """
+        try:
+            with open(path, "r") as f:
+                artifact = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ErrorReadingArtifact(errors=str(e))
+        if not isinstance(artifact, dict) or artifact.get("format") != cls.FORMAT:
+            raise ErrorReadingArtifact(errors=f"{path}: unsupported format")
+        body = {k: artifact.get(k) for k in ("format", "images", "services")}
+        if artifact.get("hash") != fingerprint(body):
+            raise ErrorReadingArtifact(errors=f"{path}: content doesn't match its hash")
+        services = {s["name"]: s["endpoints"] for s in artifact["services"]}
+        return services, ServiceImages(**artifact["images"])
@@ -0,0 +1,240 @@
+import time
+import random
+import asyncio
+import httpx
+from dataclasses import dataclass, field
+from typing import Optional
+from .generators import PayloadGenerator
+from .transport import TransportSettings
+from .transport import async_client
+
+
+@dataclass
+class EndpointStats:
+    """Latencies & errors of an endpoint."""
+
+    latencies: list = field(default_factory=list)
+    errors: int = 0
+
+    def record(self, latency: float, ok: bool) -> None:
+        """Record a request.
+
+        Args:
+            latency (float): Seconds.
+            ok (bool): Request succeeded.
+        """
+        self.latencies.append(latency)
+        if not ok:
+            self.errors += 1
+
+    def percentile(self, p: float) -> float:
+        """Latency percentile, nearest rank.
+
+        Args:
+            p (float): Percentile, 0 to 100.
+
+        Returns:
+            float: Seconds, 0.0 without requests.
+        """
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        rank = max(int(round(p / 100 * len(ordered))), 1)
+        return ordered[min(rank, len(ordered)) - 1]
+
+    def to_json(self, elapsed: float) -> dict:
+        """Summary of the endpoint.
+
+        Args:
+            elapsed (float): Seconds of the run.
+
+        Returns:
+            dict: example:
+                {
+                    'requests': 120, 'errors': 0, 'rps': 12.0,
+                    'p50_ms': 3.1, 'p95_ms': 7.9, 'p99_ms': 12.4
+                }
+        """
+        requests = len(self.latencies)
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "rps": round(requests / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+        }
+
+
+class LoadGenerator:
+    """Load generator of the endpoints of a service.
+
+    Every iteration creates a resource with a payload made from the
+    endpoint schema, then reads, updates & deletes it. Iterations run in
+    `concurrency` workers sharing one pooled client, closed loop, or are
+    started at `rate` requests per second, open loop, with at most
+    `concurrency` in flight.
+
+    Args:
+        host (str): API host.
+        endpoints (list): Endpoints of the manifest.
+        concurrency (int, optional): Iterations in flight.
+        rate (float, optional): Target requests per second, 0 is as fast
+            as possible.
+        duration (float, optional): Seconds to run.
+        seed (int, optional): Payloads random seed.
+    """
+
+    ID_FIELDS = ("public_id", "id", "_id")
+    REQUEST_TIMEOUT = 10.0
+    METHODS = ("POST", "GET", "PUT", "DELETE")
+
+    def __init__(
+        self,
+        host: str,
+        endpoints: list,
+        concurrency: int = 16,
+        rate: float = 0.0,
+        duration: float = 10.0,
+        seed: Optional[int] = None,
+    ):
+        self.host = host
+        self.endpoints = [
+            (e["path"].rstrip("/") or "/", PayloadGenerator(e.get("schema") or {}))
+            for e in endpoints
+        ]
+        self.concurrency = concurrency
+        self.rate = rate
+        self.duration = duration
+        self.rng = random.Random(seed)
+        self.stats = {}
+        self.client: Optional[httpx.AsyncClient] = None
+
+    def _stats(self, method: str, path: str) -> EndpointStats:
+        key = f"{method} {path}"
+        if key not in self.stats:
+            self.stats[key] = EndpointStats()
+        return self.stats[key]
+
+    async def _request(self, method: str, path: str, url: str, payload=None):
+        """Send a request, recording it in the endpoint stats.
+
+        Returns:
+            Optional[httpx.Response]: Response, None on connection errors.
+        """
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, json=payload)
+        except httpx.HTTPError:
+            self._stats(method, path).record(time.perf_counter() - started, False)
+            return None
+        ok = response.status_code < 400
+        self._stats(method, path).record(time.perf_counter() - started, ok)
+        return response
+
+    def _resource_id(self, response: httpx.Response) -> Optional[str]:
+        try:
+            data = response.json()
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+        for key in self.ID_FIELDS:
+            if data.get(key) is not None:
+                return str(data[key])
+        return None
+
+    async def _iteration(self, index: int) -> None:
+        """Create, read, update & delete a resource.
+
+        Args:
+            index (int): Iteration number, picks the endpoint.
+        """
+        path, generate = self.endpoints[index % len(self.endpoints)]
+        response = await self._request("POST", path, path, generate(self.rng))
+        if response is None or response.status_code >= 400:
+            return
+        _id = self._resource_id(response)
+        if _id is None:
+            return
+        item, url = f"{path}/{{id}}", f"{path}/{_id}"
+        await self._request("GET", item, url)
+        await self._request("PUT", item, url, generate(self.rng))
+        await self._request("DELETE", item, url)
+
+    async def _closed_loop(self, deadline: float) -> None:
+        counter = iter(range(10**12))
+
+        async def worker():
+            while time.monotonic() < deadline:
+                await self._iteration(next(counter))
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    async def _open_loop(self, deadline: float) -> None:
+        # An iteration sends one request per method.
+        interval = len(self.METHODS) / self.rate
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+
+        async def start(index: int):
+            async with semaphore:
+                await self._iteration(index)
+
+        index = 0
+        next_start = time.monotonic()
+        while next_start < deadline:
+            await asyncio.sleep(max(next_start - time.monotonic(), 0))
+            task = asyncio.ensure_future(start(index))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            index += 1
+            next_start += interval
+        await asyncio.gather(*tasks)
+
+    async def run(self) -> dict:
+        """Run the load.
+
+        Returns:
+            dict: Summary by `METHOD path`, see `EndpointStats.to_json`.
+        """
+        settings = TransportSettings(
+            max_connections=self.concurrency,
+            max_keepalive=self.concurrency,
+            read_timeout=self.REQUEST_TIMEOUT,
+        )
+        async with async_client(settings, "api", base_url=self.host) as client:
+            self.client = client
+            # Opening the client isn't part of the run.
+            started = time.monotonic()
+            deadline = started + self.duration
+            try:
+                if self.rate:
+                    await self._open_loop(deadline)
+                else:
+                    await self._closed_loop(deadline)
+            finally:
+                self.client = None
+        elapsed = time.monotonic() - started
+        return {key: s.to_json(elapsed) for key, s in sorted(self.stats.items())}
+
+
+def render_report(name: str, report: dict) -> str:
+    """Report to text.
+
+    Args:
+        name (str): API name.
+        report (dict): Summary by endpoint, see `LoadGenerator.run`.
+
+    Returns:
+        str: Table.
+    """
+    header = f"{'endpoint':<40} {'reqs':>7} {'errs':>5} {'rps':>8} "
+    header += f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    lines = [f"`{name}`", header]
+    for key, r in report.items():
+        lines.append(
+            f"{key:<40} {r['requests']:>7} {r['errors']:>5} {r['rps']:>8.1f} "
+            f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,238 @@
+import os
+import re
+import json
+import time
+import hashlib
+from typing import Dict, Optional
+from pathlib import Path
+from apiruns import __version__
+from .exceptions import ErrorInvalidSnapshotName
+
+
+def cache_dir() -> Path:
+    """Get the apiruns cache directory.
+
+    `APIRUNS_CACHE_DIR` overrides the default `~/.cache/apiruns`.
+
+    Returns:
+        Path: Cache directory.
+    """
+    default = Path(os.environ.get("XDG_CACHE_HOME", "~/.cache")) / "apiruns"
+    return Path(os.environ.get("APIRUNS_CACHE_DIR", default)).expanduser()
+
+
+def read_json(path: Path) -> Optional[dict]:
+    """Read a json cache file.
+
+    Args:
+        path (Path): File path.
+
+    Returns:
+        Optional[dict]: Content or None if missing or corrupt.
+    """
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path: Path, obj: dict) -> None:
+    """Write a json cache file atomically.
+
+    Args:
+        path (Path): File path.
+        obj (dict): Content.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w") as f:
+            json.dump(obj, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+class ImageCache:
+    """Resolved images cache.
+
+    Images pinned by digest never change, so they don't expire. Tags expire
+    after TTL seconds.
+    """
+
+    FILE_NAME = "images.json"
+    TTL = 24 * 60 * 60
+
+    @classmethod
+    def _path(cls) -> Path:
+        return cache_dir() / cls.FILE_NAME
+
+    @classmethod
+    def get(cls, reference: str) -> Optional[dict]:
+        """Get a resolved image.
+
+        Args:
+            reference (str): Image reference, example `mongo:6.0`.
+
+        Returns:
+            Optional[dict]: example:
+                {'id': 'sha256:1b2c...', 'digest': 'mongo@sha256:9d0f...'}
+        """
+        entry = (read_json(cls._path()) or {}).get(reference)
+        if not entry:
+            return None
+        expired = time.time() - entry.get("resolved_at", 0) > cls.TTL
+        if expired and "@" not in reference:
+            return None
+        return entry
+
+    @classmethod
+    def set(cls, reference: str, image_id: str, digest: Optional[str]) -> None:
+        """Save a resolved image.
+
+        Args:
+            reference (str): Image reference.
+            image_id (str): Local image ID.
+            digest (str, optional): Repository digest.
+        """
+        path = cls._path()
+        images = read_json(path) or {}
+        images[reference] = {
+            "id": image_id,
+            "digest": digest,
+            "resolved_at": time.time(),
+        }
+        write_json(path, images)
+
+    @classmethod
+    def invalidate(cls, reference: str) -> None:
+        """Remove a resolved image.
+
+        Args:
+            reference (str): Image reference.
+        """
+        path = cls._path()
+        images = read_json(path) or {}
+        if images.pop(reference, None) is not None:
+            write_json(path, images)
+
+
+class ManifestCache:
+    """Parsed & validated manifests cache.
+
+    There is a file by manifest path holding the hash of the content it
+    was built from, so editing the manifest invalidates it.
+    """
+
+    DIR_NAME = "manifests"
+
+    @classmethod
+    def _path(cls, file_path: str) -> Path:
+        resolved = str(Path(file_path).resolve())
+        name = hashlib.sha256(resolved.encode()).hexdigest()
+        return cache_dir() / cls.DIR_NAME / f"{name}.json"
+
+    @classmethod
+    def _hash(cls, content: bytes) -> str:
+        # The apiruns version is hashed too, the schema can change.
+        return hashlib.sha256(__version__.encode() + content).hexdigest()
+
+    @classmethod
+    def get(cls, file_path: str, content: bytes) -> Optional[Dict[str, list]]:
+        """Get a manifest.
+
+        Args:
+            file_path (str): Manifest path.
+            content (bytes): Manifest content.
+
+        Returns:
+            Optional[Dict[str, list]]: Endpoints by API name.
+        """
+        entry = read_json(cls._path(file_path))
+        if not entry or entry.get("hash") != cls._hash(content):
+            return None
+        return entry.get("services")
+
+    @classmethod
+    def set(cls, file_path: str, content: bytes, services: Dict[str, list]) -> None:
+        """Save a manifest, skipped if it isn't json serializable.
+
+        Args:
+            file_path (str): Manifest path.
+            content (bytes): Manifest content.
+            services (dict): Endpoints by API name.
+        """
+        entry = {"hash": cls._hash(content), "services": services}
+        try:
+            write_json(cls._path(file_path), entry)
+        except (TypeError, ValueError, OSError):
+            pass
+
+
+class ModelsState:
+    """Models registered in a running service.
+
+    Fingerprints are only valid for the containers they were registered
+    in, a new DB container starts without models.
+    """
+
+    DIR_NAME = "state"
+
+    @classmethod
+    def _path(cls, name: str) -> Path:
+        return cache_dir() / cls.DIR_NAME / f"{name}.json"
+
+    @classmethod
+    def get(cls, name: str, containers: list) -> Optional[dict]:
+        """Get models fingerprints.
+
+        Args:
+            name (str): Service name.
+            containers (list): Running container IDs.
+
+        Returns:
+            Optional[dict]: Fingerprint by path, None if the containers changed.
+        """
+        entry = read_json(cls._path(name))
+        if not entry or not containers or entry.get("containers") != containers:
+            return None
+        return entry["models"]
+
+    @classmethod
+    def set(cls, name: str, containers: list, models: dict) -> None:
+        """Save models fingerprints.
+
+        Args:
+            name (str): Service name.
+            containers (list): Container IDs.
+            models (dict): Fingerprint by path.
+        """
+        entry = {"containers": sorted(containers), "models": models}
+        write_json(cls._path(name), entry)
+
+
+class Snapshots:
+    """DB snapshots, a gzipped tar of the data by service."""
+
+    DIR_NAME = "snapshots"
+    NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]*$")
+
+    @classmethod
+    def path(cls, name: str, service: str) -> Path:
+        """Snapshot of a service.
+
+        Args:
+            name (str): Snapshot name.
+            service (str): Service name.
+
+        Raises:
+            ErrorInvalidSnapshotName: Name isn't a file name.
+
+        Returns:
+            Path: example: ~/.cache/apiruns/snapshots/baseline/myapi.tar.gz
+        """
+        if not cls.NAME_PATTERN.match(name):
+            raise ErrorInvalidSnapshotName(errors=name)
+        return cache_dir() / cls.DIR_NAME / name / f"{service}.tar.gz"
@@ -1,25 +1,49 @@
+import os
+import gzip
+import posixpath
 import time
+import json
+import random
+import asyncio
 import httpx
 import typer
-import requests
-from typing import Tuple, Any
+from pathlib import Path
+from collections import deque
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, Any, Dict, Iterable, Optional
 from .exceptions import ErrorDockerEngineAPI
 from .exceptions import ErrorCreatingNetwork
 from .exceptions import ErrorGettingContainerStatus
 from .exceptions import ErrorCreatingContainer
 from .exceptions import ErrorStartingAContainer
+from .exceptions import ErrorStoppingContainer
 from .exceptions import ErrorContainerExited
+from .exceptions import ErrorContainerTimeout
 from .exceptions import ErrorAPIClient
+from .exceptions import ErrorAPINotReady
+from .exceptions import ErrorCreatingModels
 from .exceptions import ErrorPullingImage
 from .exceptions import ErrorListingContainers
 from .exceptions import ErrorDeletingContainers
+from .exceptions import ErrorPruningResources
+from .exceptions import ErrorCreatingVolume
+from .exceptions import ErrorDeletingVolume
+from .exceptions import ErrorCopyingData
 from dataclasses import dataclass
 from dataclasses import field
+from .exceptions import ErrorImageNotFound
 from .utils import encode_obj_to_url
-
-
-transport = httpx.HTTPTransport(uds="/var/run/docker.sock")
-client = httpx.Client(transport=transport)
+from .utils import fingerprint
+from .utils import split_image_reference
+from .utils import normalize_image_reference
+from .cache import ImageCache
+from .transport import TransportSettings
+from .transport import async_client
+from .transport import sync_client
+from .timings import span
+from .timings import timed
 
 
 @dataclass
@@ -31,6 +55,11 @@ class ContainerConfig:
     network_id: str
     labels: dict
     environment: list = field(default_factory=list)
+    host_port: Optional[str] = None
+    command: list = field(default_factory=list)
+    volumes: dict = field(default_factory=dict)
+
+    FINGERPRINT_LABEL = "apiruns.fingerprint"
 
     def _build_ports(self) -> dict:
         """Build ports.
@@ -44,14 +73,26 @@ class ContainerConfig:
     def _build_port_bind(self) -> dict:
         """Build json port bind.
 
+        The host port defaults to the container port, an empty one is
+        allocated by Docker.
+
         Returns:
             example:
-                {'8000/tcp': [{'HostIp': '', 'HostPort': '8000'}]}
+                {'8000/tcp': [{'HostIp': '', 'HostPort': '8001'}]}
+        """
+        host_port = self.port if self.host_port is None else self.host_port
+        return {f"{self.port}/tcp": [{"HostIp": "", "HostPort": host_port}]}
+
+    def fingerprint(self) -> str:
+        """Hash of the config, containers with the same one are reusable.
+
+        Returns:
+            str: sha256 hex digest.
         """
-        return {f"{self.port}/tcp": [{"HostIp": "", "HostPort": self.port}]}
+        return fingerprint(self._build_config())
 
     def to_json(self) -> dict:
-        """ContainerConfig to json object.
+        """ContainerConfig to json object, labelled with its fingerprint.
 
         Returns:
             dict: Json for create a container.
@@ -61,14 +102,21 @@ class ContainerConfig:
                     'NetworkingConfig': {
                         'EndpointsConfig': {'apiruns': {'NetworkID': '4cb8b69e'}}
                     },
-                    'Labels': {'name': 'apiruns_offline'},
+                    'Labels': {
+                        'name': 'apiruns_offline', 'apiruns.fingerprint': '9f2c...'
+                    },
                     'ExposedPorts': {'8000/tcp': {}},
                     'PortBindings': {'8000/tcp': [
                         {'HostIp': '', 'HostPort': '8000'}
                     ]},
-                    'Env': ['ENGINE_URI=mongodb://dbmongo:27017/']
+                    'Env': ['ENGINE_URI=mongodb://dbmongo-myapi:27017/']
                 }
         """
+        data = self._build_config()
+        data["Labels"] = {**self.labels, self.FINGERPRINT_LABEL: self.fingerprint()}
+        return data
+
+    def _build_config(self) -> dict:
         data = {
             "Image": self.image,
             "NetworkingConfig": {
@@ -80,32 +128,221 @@ class ContainerConfig:
         }
         if self.environment:
             data["Env"] = self.environment
+        if self.command:
+            data["Cmd"] = self.command
+        if self.volumes:
+            binds = [f"{v}:{path}" for v, path in self.volumes.items()]
+            data["HostConfig"] = {"Binds": binds}
         return data
 
 
-class DockerClient:
-    """Docker Client"""
+@dataclass
+class ServiceImages:
+    """Images of the service containers, pinned by tag or digest."""
+
+    api: str = "josesalasdev/apiruns"
+    db: str = "mongo"
+    proxy: str = "nginx:alpine"
+
+    def __post_init__(self):
+        self.api = normalize_image_reference(self.api)
+        self.db = normalize_image_reference(self.db)
+        self.proxy = normalize_image_reference(self.proxy)
+
+    @classmethod
+    def build(
+        cls,
+        version: Optional[str] = None,
+        api: Optional[str] = None,
+        db: Optional[str] = None,
+        proxy: Optional[str] = None,
+    ) -> "ServiceImages":
+        """Build images from the command options.
+
+        Args:
+            version (str, optional): API image tag.
+            api (str, optional): API image reference, overrides version.
+            db (str, optional): DB image reference.
+            proxy (str, optional): Load balancer image reference.
+
+        Returns:
+            ServiceImages: Images.
+        """
+        if not api:
+            api = f"{cls.api}:{version}" if version else cls.api
+        return cls(api=api, db=db or cls.db, proxy=proxy or cls.proxy)
+
+
+@dataclass
+class PullProgress:
+    """Image pull progress by layer."""
+
+    image: str
+    interval: float = 1.0
+    layers: dict = field(default_factory=dict)
+    started: float = field(default_factory=time.monotonic)
+    reported: float = field(default_factory=time.monotonic)
+
+    DOWNLOADING = "Downloading"
+    DOWNLOADED = ("Download complete", "Pull complete")
+
+    def update(self, event: dict) -> None:
+        """Update layers with a progress message.
+
+        Args:
+            event (dict): Message of the `/images/create` stream.
+                example:
+                    {
+                        'status': 'Downloading',
+                        'progressDetail': {'current': 1024, 'total': 4096},
+                        'id': '8a1e25ce7c4f'
+                    }
+        """
+        layer = event.get("id")
+        status = event.get("status")
+        if not layer:
+            return
+        current, total = self.layers.get(layer, (0, 0))
+        if status == self.DOWNLOADING:
+            detail = event.get("progressDetail") or {}
+            current = detail.get("current", current)
+            total = detail.get("total", total)
+        elif status in self.DOWNLOADED:
+            current = total
+        self.layers[layer] = (current, total)
+
+    @property
+    def downloaded(self) -> int:
+        """Bytes downloaded of every layer."""
+        return sum(current for current, _ in self.layers.values())
+
+    @property
+    def total(self) -> int:
+        """Bytes to download of every layer."""
+        return sum(total for _, total in self.layers.values())
+
+    def rate(self) -> float:
+        """Aggregate download rate.
+
+        Returns:
+            float: Bytes per second.
+        """
+        elapsed = time.monotonic() - self.started
+        return self.downloaded / elapsed if elapsed > 0 else 0.0
+
+    def should_report(self) -> bool:
+        """Throttle reports to one per interval.
+
+        Returns:
+            bool: True if the progress must be reported.
+        """
+        now = time.monotonic()
+        if now - self.reported < self.interval:
+            return False
+        self.reported = now
+        return True
+
+    def render(self, done: bool = False) -> str:
+        """Progress to text.
+
+        Args:
+            done (bool, optional): Pull finished.
+
+        Returns:
+            str: example:
+                `mongo`: 3/5 layers 12.0/80.5 MB (4.0 MB/s)
+        """
+        mb = 1024 * 1024
+        rate = self.rate() / mb
+        if done:
+            elapsed = time.monotonic() - self.started
+            return (
+                f"Pulled `{self.image}`: {self.downloaded / mb:.1f} MB "
+                f"in {elapsed:.1f}s ({rate:.1f} MB/s)"
+            )
+        completed = sum(1 for c, t in self.layers.values() if t and c >= t)
+        return (
+            f"`{self.image}`: {completed}/{len(self.layers)} layers "
+            f"{self.downloaded / mb:.1f}/{self.total / mb:.1f} MB ({rate:.1f} MB/s)"
+        )
+
 
+class AsyncDockerClient:
+    """Async Docker Client"""
+
+    DOCKER_SOCKET = "/var/run/docker.sock"
     DOCKER_HOST = "http://localhost"
     DOCKER_HEADERS = {"Content-Type": "application/json"}
-    APIRUNS_API_IMAGE = "josesalasdev/apiruns"
     APIRUNS_API_PORTS = "8000"
-    APIRUNS_DEFAULT_NETWORK = {"name": "apiruns"}
-    APIRUNS_DB_IMAGE = "mongo"
     APIRUNS_DB_NAME = "dbmongo"
     APIRUNS_DB_PORTS = "27017"
     APIRUNS_LABEL = "apiruns_offline"
+    APIRUNS_DB_DATA_PATH = "/data/db"
+    # Every data volume has it, so they're pruned once their containers are gone.
+    APIRUNS_VOLUME_LABEL = "apiruns.volume"
+    # Named volumes are pruned with the `all` filter, older engines reject it.
+    PRUNE_ALL_API_VERSION = (1, 42)
+    ARCHIVE_CHUNK_SIZE = 64 * 1024
+    # Snapshots favour speed, mongo files compress well even at level 1.
+    ARCHIVE_COMPRESSION = 1
+    # Labelled so `down --prune` can remove it once no service uses it.
+    APIRUNS_DEFAULT_NETWORK = {"name": "apiruns", "Labels": {"service": APIRUNS_LABEL}}
     DOCKER_STATE_RUNNING = "running"
     DOCKER_STATE_EXITED = "exited"
+    DOCKER_EVENT_START = "start"
+    DOCKER_EVENT_DIE = "die"
+    CONTAINER_READY_TIMEOUT = 60.0
+    COMPOSE_PARALLELISM = 4
+    APIRUNS_PROXY_NAME = "proxy"
+    APIRUNS_BALANCE_METHODS = {"round-robin": "", "least-conn": "least_conn;"}
+    APIRUNS_PROXY_CONF = (
+        "upstream api {{ {method} {servers} }} "
+        "server {{ listen {port}; location / {{ proxy_pass http://api; }} }}"
+    )
+    # The config is given by environment, the image has no way to mount it.
+    APIRUNS_PROXY_CMD = [
+        "/bin/sh",
+        "-c",
+        'echo "$APIRUNS_PROXY_CONF" > /etc/nginx/conf.d/default.conf'
+        ' && exec nginx -g "daemon off;"',
+    ]
     APIRUNS_API_ENVS = [
         "PORT=8000",
         "MODULE_NAME=api.main",
         "ENGINE_DB_NAME=apiruns",
-        "ENGINE_URI=mongodb://dbmongo:27017/",
     ]
 
+    # Composes gather many requests, the pool holds them all without waiting.
+    TRANSPORT = TransportSettings(max_connections=32, max_keepalive=32)
+
+    client: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    @asynccontextmanager
+    async def session(cls):
+        """Open a Docker Engine API session over the unix socket.
+
+        The client is bound to the running event loop, so a new one is
+        created for every session and closed when it ends. Its pool &
+        timeouts are TRANSPORT, overridden by `APIRUNS_DOCKER_*` variables.
+
+        Yields:
+            httpx.AsyncClient: Client shared by every call in the session.
+        """
+        with span("docker.connect"):
+            client = async_client(
+                cls.TRANSPORT.from_env("docker"), "docker", uds=cls.DOCKER_SOCKET
+            )
+        async with client:
+            cls.client = client
+            try:
+                yield client
+            finally:
+                cls.client = None
+
     @classmethod
-    def _create_network(cls) -> str:
+    @timed("docker.create_network")
+    async def _create_network(cls) -> str:
         """Create default newtwork.
 
         Raises:
@@ -118,9 +355,9 @@ class DockerClient:
         create = f"{cls.DOCKER_HOST}/networks/create"
         retrieve = f"{cls.DOCKER_HOST}/networks/apiruns"
         try:
-            response = client.get(retrieve, headers=cls.DOCKER_HEADERS)
+            response = await cls.client.get(retrieve, headers=cls.DOCKER_HEADERS)
             if response.status_code != 200:
-                response = client.post(
+                response = await cls.client.post(
                     create, json=cls.APIRUNS_DEFAULT_NETWORK, headers=cls.DOCKER_HEADERS
                 )
                 if response.status_code != 201:
@@ -132,39 +369,58 @@ class DockerClient:
             raise ErrorDockerEngineAPI(errors=e)
 
     @classmethod
-    def _pull_image(cls, image: str) -> None:
+    @timed("docker.pull_image", arg="image")
+    async def _pull_image(cls, image: str) -> None:
         """Pull Image from docker hub.
 
+        The progress stream is read line by line, so memory doesn't grow
+        with the image size.
+
         Args:
-            image (str): Image name.
+            image (str): Image reference.
 
         Raises:
-            ErrorPullingImage: Image not found.
+            ErrorPullingImage: Image not found or error in the stream.
             ErrorDockerEngineAPI: Error of Docker API.
         """
-        if not cls._get_image(image):
-            typer.echo(f"Pulling `{image}` image.")
-            url = f"{cls.DOCKER_HOST}/images/create?fromImage={image}&tag=latest"
-            try:
-                response = client.post(url, json={}, headers=cls.DOCKER_HEADERS)
+        typer.echo(f"Pulling `{image}` image.")
+        repository, tag = split_image_reference(image)
+        url = f"{cls.DOCKER_HOST}/images/create?fromImage={repository}&tag={tag}"
+        progress = PullProgress(image)
+        try:
+            async with cls.client.stream(
+                "POST", url, json={}, headers=cls.DOCKER_HEADERS, timeout=None
+            ) as response:
                 if response.status_code != 200:
+                    await response.aread()
                     raise ErrorPullingImage(errors=response.text)
-            except httpx.RequestError as e:
-                raise ErrorDockerEngineAPI(errors=e)
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    if "error" in event:
+                        raise ErrorPullingImage(errors=event["error"])
+                    progress.update(event)
+                    if progress.should_report():
+                        typer.echo(progress.render())
+        except httpx.RequestError as e:
+            raise ErrorDockerEngineAPI(errors=e)
+        typer.echo(progress.render(done=True))
 
     @classmethod
-    def _get_image(cls, image: str) -> Any:
+    @timed("docker.inspect_image", arg="image")
+    async def _get_image(cls, image: str) -> Any:
         """Get image info.
 
         Args:
-            image (str): Image name.
+            image (str): Image reference.
 
         Returns:
             Any: Json if was success else None.
         """
-        url = f"{cls.DOCKER_HOST}/images/{image}:latest/json"
+        url = f"{cls.DOCKER_HOST}/images/{image}/json"
         try:
-            response = client.get(url, headers=cls.DOCKER_HEADERS)
+            response = await cls.client.get(url, headers=cls.DOCKER_HEADERS)
             if response.status_code != 200:
                 return None
             return response.json()
@@ -172,7 +428,39 @@ class DockerClient:
             raise ErrorDockerEngineAPI(errors=e)
 
     @classmethod
-    def _ping(cls) -> None:
+    @timed("docker.ensure_image", arg="image")
+    async def _ensure_image(cls, image: str) -> dict:
+        """Make sure an image is present, pulling it only if it's missing.
+
+        Resolved images are cached on disk, so next runs skip inspection.
+
+        Args:
+            image (str): Image reference.
+
+        Raises:
+            ErrorPullingImage: Image not found.
+
+        Returns:
+            dict: Resolved image, see `ImageCache.get`.
+        """
+        cached = ImageCache.get(image)
+        if cached:
+            return cached
+
+        info = await cls._get_image(image)
+        if not info:
+            await cls._pull_image(image)
+            info = await cls._get_image(image)
+            if not info:
+                raise ErrorPullingImage(errors=image)
+
+        digests = info.get("RepoDigests") or [None]
+        ImageCache.set(image, info.get("Id"), digests[0])
+        return ImageCache.get(image)
+
+    @classmethod
+    @timed("docker.ping")
+    async def _ping(cls) -> None:
         """Ping to DockerEngineAPI.
 
         Raises:
@@ -180,14 +468,35 @@ class DockerClient:
         """
         url = f"{cls.DOCKER_HOST}/_ping"
         try:
-            response = client.get(url, headers=cls.DOCKER_HEADERS)
+            response = await cls.client.get(url, headers=cls.DOCKER_HEADERS)
+            if response.status_code != 200:
+                raise ErrorDockerEngineAPI(errors=response.text)
+        except httpx.RequestError as e:
+            raise ErrorDockerEngineAPI(errors=e)
+
+    @classmethod
+    @timed("docker.version")
+    async def _api_version(cls) -> Tuple[int, ...]:
+        """Get the Docker Engine API version.
+
+        Raises:
+            ErrorDockerEngineAPI: Docker API not is responding.
+
+        Returns:
+            Tuple[int, ...]: example: (1, 43)
+        """
+        url = f"{cls.DOCKER_HOST}/version"
+        try:
+            response = await cls.client.get(url, headers=cls.DOCKER_HEADERS)
             if response.status_code != 200:
                 raise ErrorDockerEngineAPI(errors=response.text)
         except httpx.RequestError as e:
             raise ErrorDockerEngineAPI(errors=e)
+        version = response.json().get("ApiVersion") or ""
+        return tuple(int(n) for n in version.split(".") if n.isdigit())
 
     @classmethod
-    def _get_container_status(cls, _id) -> str:
+    async def _get_container_status(cls, _id) -> str:
         """Get container status.
 
         Raises:
@@ -199,7 +508,7 @@ class DockerClient:
         """
         url = f"{cls.DOCKER_HOST}/containers/{_id}/json"
         try:
-            response = client.get(url, headers=cls.DOCKER_HEADERS)
+            response = await cls.client.get(url, headers=cls.DOCKER_HEADERS)
             if response.status_code != 200:
                 raise ErrorGettingContainerStatus
             return response.json()["State"].get("Status")
@@ -207,7 +516,8 @@ class DockerClient:
             raise ErrorDockerEngineAPI(errors=e)
 
     @classmethod
-    def _list_containers_by_name(cls, service_name: str) -> list:
+    @timed("docker.list_containers", arg="service_name")
+    async def _list_containers_by_name(cls, service_name: str) -> list:
         """List containers by service name.
 
         Args:
@@ -221,15 +531,58 @@ class DockerClient:
             list: Container list.
         """
         filters = cls._build_labels_filters(service_name)
-        url = f"{cls.DOCKER_HOST}/containers/json?filters={filters}"
+        url = f"{cls.DOCKER_HOST}/containers/json?all=true&filters={filters}"
         try:
-            response = client.get(url, headers=cls.DOCKER_HEADERS)
+            response = await cls.client.get(url, headers=cls.DOCKER_HEADERS)
             if response.status_code != 200:
                 raise ErrorListingContainers
             return response.json()
         except httpx.RequestError as e:
             raise ErrorDockerEngineAPI(errors=e)
 
+    @classmethod
+    @timed("docker.list_stacks")
+    async def _list_apiruns_containers(cls) -> list:
+        """List the containers of every apiruns service.
+
+        Raises:
+            ErrorListingContainers: Error listing containers.
+            ErrorDockerEngineAPI: Docker API not is responding.
+
+        Returns:
+            list: Container list.
+        """
+        # Label values can't be filtered by prefix, only by key.
+        filters = encode_obj_to_url({"label": ["service"]})
+        url = f"{cls.DOCKER_HOST}/containers/json?all=true&filters={filters}"
+        try:
+            response = await cls.client.get(url, headers=cls.DOCKER_HEADERS)
+            if response.status_code != 200:
+                raise ErrorListingContainers
+        except httpx.RequestError as e:
+            raise ErrorDockerEngineAPI(errors=e)
+        return [
+            c
+            for c in response.json()
+            if cls._service_name(c.get("Labels") or {}) is not None
+        ]
+
+    @classmethod
+    def _service_name(cls, labels: dict) -> Optional[str]:
+        """Service of a container.
+
+        Args:
+            labels (dict): Container labels.
+
+        Returns:
+            Optional[str]: Service name, None if it isn't an apiruns container.
+        """
+        prefix = f"{cls.APIRUNS_LABEL}-"
+        label = labels.get("service", "")
+        if not label.startswith(prefix):
+            return None
+        return label.replace(prefix, "", 1)
+
     @classmethod
     def _build_labels_filters(cls, service_name: str) -> str:
         """Build labels filters
@@ -245,17 +598,20 @@ class DockerClient:
         return encode_obj_to_url(filters)
 
     @classmethod
-    def _delete_container(cls, _id: str):
-        url = f"{cls.DOCKER_HOST}/containers/{_id}?force=true"
+    @timed("docker.delete_container", arg="_id")
+    async def _delete_container(cls, _id: str):
+        # `v` removes the anonymous volumes of mongo with the container.
+        url = f"{cls.DOCKER_HOST}/containers/{_id}?force=true&v=true"
         try:
-            response = client.delete(url, headers=cls.DOCKER_HEADERS)
+            response = await cls.client.delete(url, headers=cls.DOCKER_HEADERS)
             if response.status_code != 204:
                 raise ErrorDeletingContainers
         except httpx.RequestError as e:
             raise ErrorDockerEngineAPI(errors=e)
 
     @classmethod
-    def _run_container(
+    @timed("docker.create_container", arg="name")
+    async def _run_container(
         cls,
         image: str,
         name: str,
@@ -263,8 +619,11 @@ class DockerClient:
         port: str,
         network_id: str,
         labels: dict,
+        host_port: Optional[str] = None,
+        command: Optional[list] = None,
+        volumes: Optional[dict] = None,
     ) -> str:
-        """Run a container.
+        """Create a container, its image must be already pulled.
 
         Args:
             image (str): docker image.
@@ -273,25 +632,28 @@ class DockerClient:
             port (str): port to expose.
             network_id (str): Network ID.
             labels (dict): dict of labels.
+            host_port (str, optional): Host port bound to `port`.
+            command (list, optional): Command overriding the image one.
+            volumes (dict, optional): Container path by volume name.
 
         Raises:
+            ErrorImageNotFound: Image isn't present.
             ErrorCreatingContainer: Error creating container.
             ErrorDockerEngineAPI: Docker API not is responding.
 
         Returns:
             str: Container ID.
         """
-        cls._pull_image(image)
         url = f"{cls.DOCKER_HOST}/containers/create?name={name}"
-        obj = ContainerConfig(
-            image=image,
-            port=port,
-            network_id=network_id,
-            labels=labels,
-            environment=environment,
+        obj = cls._build_container_config(
+            image, environment, port, network_id, labels, host_port, command, volumes
         )
         try:
-            response = client.post(url, json=obj.to_json(), headers=cls.DOCKER_HEADERS)
+            response = await cls.client.post(
+                url, json=obj.to_json(), headers=cls.DOCKER_HEADERS
+            )
+            if response.status_code == 404:
+                raise ErrorImageNotFound(errors=image)
             if response.status_code != 201:
                 raise ErrorCreatingContainer
             _id = response.json().get("Id")
@@ -300,7 +662,8 @@ class DockerClient:
             raise ErrorDockerEngineAPI(errors=e)
 
     @classmethod
-    def _start_container(cls, _id: str):
+    @timed("docker.start_container", arg="_id")
+    async def _start_container(cls, _id: str):
         """Start a container.
 
         Args:
@@ -312,162 +675,1333 @@ class DockerClient:
         """
         url = f"{cls.DOCKER_HOST}/containers/{_id}/start"
         try:
-            response = client.post(url, json={}, headers=cls.DOCKER_HEADERS)
-            if response.status_code != 204:
+            response = await cls.client.post(url, json={}, headers=cls.DOCKER_HEADERS)
+            # 304, it's already started.
+            if response.status_code not in (204, 304):
                 raise ErrorStartingAContainer
         except httpx.RequestError as e:
             raise ErrorDockerEngineAPI(errors=e)
 
     @classmethod
-    def _wait(cls, container_id: str):
-        """Wait by container.
+    @timed("docker.stop_container", arg="_id")
+    async def _stop_container(cls, _id: str):
+        """Stop a container.
 
         Args:
-            container_id (str): Container ID.
+            _id (str): Container ID.
 
         Raises:
-            ErrorContainerExited: Container was exited.
+            ErrorStoppingContainer: Error stopping container.
+            ErrorDockerEngineAPI: Docker API not is responding.
         """
-        while True:
-            time.sleep(1)
-            status = cls._get_container_status(container_id)
-            if status == cls.DOCKER_STATE_RUNNING:
-                break
-
-            if status == cls.DOCKER_STATE_EXITED:
-                raise ErrorContainerExited
+        url = f"{cls.DOCKER_HOST}/containers/{_id}/stop"
+        try:
+            response = await cls.client.post(
+                url, headers=cls.DOCKER_HEADERS, timeout=None
+            )
+            # 304, it's already stopped.
+            if response.status_code not in (204, 304):
+                raise ErrorStoppingContainer(errors=response.text)
+        except httpx.RequestError as e:
+            raise ErrorDockerEngineAPI(errors=e)
 
     @classmethod
-    def _build_labels(cls, name: str) -> dict:
-        """Build docker labels.
+    async def _inspect_container(cls, name: str) -> Optional[dict]:
+        """Inspect a container.
 
         Args:
-            name (str): API name.
+            name (str): Container name or ID.
+
+        Raises:
+            ErrorGettingContainerStatus: Error inspecting.
+            ErrorDockerEngineAPI: Docker API not is responding.
 
         Returns:
-            dict: Labels.
+            Optional[dict]: Container, None if it doesn't exist.
         """
-        lable = f"{cls.APIRUNS_LABEL}-{name}"
-        return {"service": lable}
+        url = f"{cls.DOCKER_HOST}/containers/{name}/json"
+        try:
+            response = await cls.client.get(url, headers=cls.DOCKER_HEADERS)
+        except httpx.RequestError as e:
+            raise ErrorDockerEngineAPI(errors=e)
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise ErrorGettingContainerStatus(errors=name)
+        return response.json()
 
     @classmethod
-    def compose_service(cls, name: str, start: bool):
-        """Compose services.
+    @timed("docker.create_volume", arg="name")
+    async def _create_volume(cls, name: str, labels: dict):
+        """Create a volume, it's kept if it already exists.
 
         Args:
-            name (str): Service main name.
-            start (bool): Start services.
+            name (str): Volume name.
+            labels (dict): Volume labels.
+
+        Raises:
+            ErrorCreatingVolume: Error creating volume.
+            ErrorDockerEngineAPI: Docker API not is responding.
         """
-        # Ping to docker.
-        cls._ping()
-        # Create apiruns network.
-        network = cls._create_network()
-        # Create labels
-        labels = cls._build_labels(name)
-        # Create db container.
-        typer.echo("Creating DB container.")
-        container_id = cls._run_container(
-            image=cls.APIRUNS_DB_IMAGE,
-            name=cls.APIRUNS_DB_NAME,
-            environment=[],
-            port=cls.APIRUNS_DB_PORTS,
-            network_id=network,
-            labels=labels,
-        )
-        if start:
-            cls._start_container(container_id)
-            cls._wait(container_id)
-
-        # Create API container.
-        typer.echo("Creating API container.")
-        container_id = cls._run_container(
-            image=cls.APIRUNS_API_IMAGE,
-            name=name,
-            environment=cls.APIRUNS_API_ENVS,
-            port=cls.APIRUNS_API_PORTS,
-            network_id=network,
-            labels=labels,
-        )
-        if start:
-            cls._start_container(container_id)
-            cls._wait(container_id)
+        url = f"{cls.DOCKER_HOST}/volumes/create"
+        try:
+            response = await cls.client.post(
+                url, json={"Name": name, "Labels": labels}, headers=cls.DOCKER_HEADERS
+            )
+            if response.status_code != 201:
+                raise ErrorCreatingVolume(errors=name)
+        except httpx.RequestError as e:
+            raise ErrorDockerEngineAPI(errors=e)
 
     @classmethod
-    def service_down(cls, name: str):
-        """Service down.
+    @timed("docker.delete_volume", arg="name")
+    async def _delete_volume(cls, name: str):
+        """Delete a volume if it exists.
 
         Args:
-            name (str): Service name.
+            name (str): Volume name.
+
+        Raises:
+            ErrorDeletingVolume: Error deleting volume, example it's in use.
+            ErrorDockerEngineAPI: Docker API not is responding.
         """
-        containers = cls._list_containers_by_name(name)
-        for c in containers:
-            typer.echo(f"Removing {c['Names']}")
-            cls._delete_container(c["Id"])
+        url = f"{cls.DOCKER_HOST}/volumes/{name}"
+        try:
+            response = await cls.client.delete(url, headers=cls.DOCKER_HEADERS)
+            if response.status_code not in (204, 404):
+                raise ErrorDeletingVolume(errors=name)
+        except httpx.RequestError as e:
+            raise ErrorDockerEngineAPI(errors=e)
+
+    @classmethod
+    @timed("docker.get_archive", arg="_id")
+    async def _get_archive(cls, _id: str, path: str, destination: Path) -> int:
+        """Download a container path as a gzipped tar.
 
+        The tar stream is compressed by chunks while it's read, so memory
+        doesn't grow with the data size. The file is replaced once it's
+        complete.
 
-class APIClient:
-    """API local Client"""
+        Args:
+            _id (str): Container ID.
+            path (str): Container path.
+            destination (Path): `.tar.gz` file.
 
-    HOST = "http://localhost:8000"
+        Raises:
+            ErrorCopyingData: Error reading the path.
+            ErrorDockerEngineAPI: Docker API not is responding.
+
+        Returns:
+            int: Bytes of the tar.
+        """
+        url = f"{cls.DOCKER_HOST}/containers/{_id}/archive?path={path}"
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        tmp = destination.with_name(f".{destination.name}.{os.getpid()}.tmp")
+        size = 0
+        try:
+            async with cls.client.stream("GET", url, timeout=None) as response:
+                if response.status_code != 200:
+                    raise ErrorCopyingData(errors=f"{_id}:{path}")
+                with gzip.open(tmp, "wb", compresslevel=cls.ARCHIVE_COMPRESSION) as f:
+                    async for chunk in response.aiter_raw(cls.ARCHIVE_CHUNK_SIZE):
+                        f.write(chunk)
+                        size += len(chunk)
+            os.replace(tmp, destination)
+        except httpx.RequestError as e:
+            raise ErrorDockerEngineAPI(errors=e)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        return size
 
     @classmethod
-    def _get(cls, path: str, headers: dict) -> Tuple[None, Any]:
-        """Get method http.
+    @timed("docker.put_archive", arg="_id")
+    async def _put_archive(cls, _id: str, path: str, source: Path):
+        """Extract a gzipped tar in a container path.
+
+        The file is sent by chunks, the engine decompresses it.
 
         Args:
-            path (str): Path name.
-            headers (dict): Headers request.
+            _id (str): Container ID.
+            path (str): Container path.
+            source (Path): `.tar.gz` file.
 
-        Returns:
-            Tuple[None, Any]: Json if was success else None.
+        Raises:
+            ErrorCopyingData: Error extracting the archive.
+            ErrorDockerEngineAPI: Docker API not is responding.
         """
-        url = f"{cls.HOST}{path}"
+
+        async def chunks():
+            with open(source, "rb") as f:
+                for chunk in iter(lambda: f.read(cls.ARCHIVE_CHUNK_SIZE), b""):
+                    yield chunk
+
+        url = f"{cls.DOCKER_HOST}/containers/{_id}/archive?path={path}&copyUIDGID=true"
+        headers = {"Content-Type": "application/x-tar"}
         try:
-            response = requests.get(url, headers=headers)
-            if response.status_code > 299:
-                return None
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            raise ErrorAPIClient(errors=e)
+            response = await cls.client.put(
+                url, content=chunks(), headers=headers, timeout=None
+            )
+            if response.status_code != 200:
+                raise ErrorCopyingData(errors=f"{_id}:{path}")
+        except httpx.RequestError as e:
+            raise ErrorDockerEngineAPI(errors=e)
 
     @classmethod
-    def _post(cls, path: str, data: dict, headers: dict) -> Tuple[None, Any]:
-        """Post method http.
+    def _build_events_filters(cls, container_id: str, labels: dict) -> str:
+        """Build filters of the container lifecycle events.
 
         Args:
-            path (str): Path name.
-            headers (dict): Headers request.
-            data (dict): Data to send.
+            container_id (str): Container ID.
+            labels (dict): Container labels.
 
         Returns:
-            Tuple[None, Any]: Json if was success else None.
+            str: filters encoded.
+        """
+        filters = {
+            "type": ["container"],
+            "container": [container_id],
+            "label": [f"{k}={v}" for k, v in labels.items()],
+            "event": [cls.DOCKER_EVENT_START, cls.DOCKER_EVENT_DIE],
+        }
+        return encode_obj_to_url(filters)
+
+    @classmethod
+    async def _watch_container(cls, container_id: str, labels: dict) -> None:
+        """Watch container events until it's running.
+
+        The events stream is opened before inspecting the container, so a
+        transition can't be lost between both requests.
+
+        Args:
+            container_id (str): Container ID.
+            labels (dict): Container labels.
+
+        Raises:
+            ErrorContainerExited: Container was exited.
+            ErrorGettingContainerStatus: Error getting events.
+            ErrorDockerEngineAPI: Docker API not is responding.
         """
-        url = f"{cls.HOST}{path}"
+        filters = cls._build_events_filters(container_id, labels)
+        url = f"{cls.DOCKER_HOST}/events?filters={filters}"
         try:
-            response = requests.post(url, json=data, headers=headers)
-            if response.status_code > 299:
-                return None
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            raise ErrorAPIClient(errors=e)
+            async with cls.client.stream(
+                "GET", url, headers=cls.DOCKER_HEADERS, timeout=None
+            ) as response:
+                if response.status_code != 200:
+                    raise ErrorGettingContainerStatus
+                status = await cls._get_container_status(container_id)
+                if status == cls.DOCKER_STATE_RUNNING:
+                    return
+                if status == cls.DOCKER_STATE_EXITED:
+                    raise ErrorContainerExited
+
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    action = event.get("Action") or event.get("status")
+                    if action == cls.DOCKER_EVENT_START:
+                        return
+                    if action == cls.DOCKER_EVENT_DIE:
+                        raise ErrorContainerExited(errors=event.get("Actor"))
+                raise ErrorGettingContainerStatus
+        except httpx.RequestError as e:
+            raise ErrorDockerEngineAPI(errors=e)
 
     @classmethod
-    def ping(cls) -> None:
-        """Ping to health services"""
-        path = "/ping"
-        while True:
-            response = cls._get(path, headers={})
-            if response:
-                break
-            time.sleep(1)
+    @timed("docker.wait", arg="container_id")
+    async def _wait(
+        cls, container_id: str, labels: dict, timeout: Optional[float] = None
+    ):
+        """Wait by container.
+
+        Args:
+            container_id (str): Container ID.
+            labels (dict): Container labels.
+            timeout (float, optional): Seconds to wait. Default
+                CONTAINER_READY_TIMEOUT.
+
+        Raises:
+            ErrorContainerExited: Container was exited.
+            ErrorContainerTimeout: Container isn't running after timeout.
+        """
+        timeout = timeout or cls.CONTAINER_READY_TIMEOUT
+        try:
+            await asyncio.wait_for(
+                cls._watch_container(container_id, labels), timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            raise ErrorContainerTimeout(errors=container_id)
 
     @classmethod
-    def create_models(cls, model_list: list) -> None:
-        """Create models in the service.
+    def _build_labels(cls, name: str) -> dict:
+        """Build docker labels.
 
         Args:
-            model_list (list): Model list.
+            name (str): API name.
+
+        Returns:
+            dict: Labels.
         """
-        path = "/admin/models"
-        for m in model_list:
-            cls._post(path, data=m, headers={})
+        lable = f"{cls.APIRUNS_LABEL}-{name}"
+        return {"service": lable}
+
+    @staticmethod
+    def _build_container_config(
+        image: str,
+        environment: list,
+        port: str,
+        network_id: str,
+        labels: dict,
+        host_port: Optional[str] = None,
+        command: Optional[list] = None,
+        volumes: Optional[dict] = None,
+        **_,
+    ) -> ContainerConfig:
+        """Build the config of a container from `_run_container` arguments.
+
+        Returns:
+            ContainerConfig: Config.
+        """
+        return ContainerConfig(
+            image=image,
+            port=port,
+            network_id=network_id,
+            labels=labels,
+            environment=environment,
+            host_port=host_port,
+            command=command or [],
+            volumes=volumes or {},
+        )
+
+    @classmethod
+    @timed("docker.reconcile_container", arg="name")
+    async def _reconcile_container(
+        cls, existing: Optional[dict], name: str, **config
+    ) -> Tuple[str, bool]:
+        """Reuse a container if its config didn't change, else create it.
+
+        Args:
+            existing (dict, optional): Container of `/containers/json` with
+                the same name.
+            name (str): Container name.
+            config (dict): `_run_container` arguments.
+
+        Returns:
+            Tuple[str, bool]: Container ID & if it's already running.
+        """
+        if existing is not None:
+            wanted = cls._build_container_config(**config).fingerprint()
+            labels = existing.get("Labels") or {}
+            if labels.get(ContainerConfig.FINGERPRINT_LABEL) == wanted:
+                return existing["Id"], existing.get("State") == cls.DOCKER_STATE_RUNNING
+            await cls._delete_container(existing["Id"])
+        return await cls._create_container(name=name, **config), False
+
+    @classmethod
+    async def _create_container(cls, **config) -> str:
+        """Create a container, pulling again its image if it was removed.
+
+        Args:
+            config (dict): `_run_container` arguments.
+
+        Returns:
+            str: Container ID.
+        """
+        try:
+            return await cls._run_container(**config)
+        except ErrorImageNotFound:
+            # The image cache is stale.
+            ImageCache.invalidate(config["image"])
+            await cls._ensure_image(config["image"])
+            return await cls._run_container(**config)
+
+    @classmethod
+    def _build_db_name(cls, name: str) -> str:
+        """Build the DB container name of a service.
+
+        Args:
+            name (str): API name.
+
+        Returns:
+            str: Container name.
+        """
+        return f"{cls.APIRUNS_DB_NAME}-{name}"
+
+    @classmethod
+    def _build_volume_name(cls, name: str) -> str:
+        """Build the DB data volume name of a service.
+
+        Args:
+            name (str): API name.
+
+        Returns:
+            str: example: apiruns-myapi-data
+        """
+        return f"apiruns-{name}-data"
+
+    @classmethod
+    def _build_volume_labels(cls, name: str) -> dict:
+        """Build the DB data volume labels of a service.
+
+        Args:
+            name (str): API name.
+
+        Returns:
+            dict: Labels.
+        """
+        return {**cls._build_labels(name), cls.APIRUNS_VOLUME_LABEL: name}
+
+    @classmethod
+    def _build_db_config(
+        cls, name: str, offset: int, network: str, images: ServiceImages
+    ) -> dict:
+        """Build the DB container config of a service.
+
+        The data is kept in a named volume, so it outlives the container.
+
+        Args:
+            name (str): API name.
+            offset (int): Service position, see `_build_host_ports`.
+            network (str): Network ID.
+            images (ServiceImages): Images to use.
+
+        Returns:
+            dict: `_run_container` arguments.
+        """
+        _, db_port = cls._build_host_ports(offset)
+        return dict(
+            image=images.db,
+            name=cls._build_db_name(name),
+            environment=[],
+            port=cls.APIRUNS_DB_PORTS,
+            network_id=network,
+            labels=cls._build_labels(name),
+            host_port=db_port,
+            volumes={cls._build_volume_name(name): cls.APIRUNS_DB_DATA_PATH},
+        )
+
+    @classmethod
+    def _build_api_envs(cls, db_name: str) -> list:
+        """Build the API environment.
+
+        Args:
+            db_name (str): DB container name.
+
+        Returns:
+            list: Environment.
+        """
+        engine_uri = f"ENGINE_URI=mongodb://{db_name}:{cls.APIRUNS_DB_PORTS}/"
+        return cls.APIRUNS_API_ENVS + [engine_uri]
+
+    @classmethod
+    def _build_host_ports(cls, offset: int) -> Tuple[str, str]:
+        """Build the host ports of a service.
+
+        Every service of a manifest is offset from the default ports by its
+        position, so they don't collide.
+
+        Args:
+            offset (int): Service position.
+
+        Returns:
+            Tuple[str, str]: API & DB host ports.
+        """
+        api = int(cls.APIRUNS_API_PORTS) + offset
+        db = int(cls.APIRUNS_DB_PORTS) + offset
+        return str(api), str(db)
+
+    @classmethod
+    async def _prepare(cls, images: ServiceImages, proxy: bool = False) -> str:
+        """Ping Docker, create the network & pull the images once.
+
+        Args:
+            images (ServiceImages): Images to use.
+            proxy (bool, optional): Pull the load balancer image too.
+
+        Returns:
+            str: Network ID.
+        """
+        await cls._ping()
+        pulls = [images.db, images.api] + ([images.proxy] if proxy else [])
+        network, *_ = await asyncio.gather(
+            cls._create_network(), *(cls._ensure_image(i) for i in pulls)
+        )
+        return network
+
+    @classmethod
+    def _build_proxy_config(cls, names: list, balance: str) -> str:
+        """Build the load balancer config.
+
+        Args:
+            names (list): API replicas container names.
+            balance (str): Balance method, see APIRUNS_BALANCE_METHODS.
+
+        Returns:
+            str: nginx config.
+        """
+        servers = " ".join(f"server {n}:{cls.APIRUNS_API_PORTS};" for n in names)
+        return cls.APIRUNS_PROXY_CONF.format(
+            method=cls.APIRUNS_BALANCE_METHODS[balance],
+            servers=servers,
+            port=cls.APIRUNS_API_PORTS,
+        )
+
+    @classmethod
+    async def _start(
+        cls, container_id: str, labels: dict, timeout: Optional[float] = None
+    ):
+        """Start a container & wait until it's running.
+
+        Args:
+            container_id (str): Container ID.
+            labels (dict): Container labels.
+            timeout (float, optional): Seconds to wait.
+        """
+        await cls._start_container(container_id)
+        await cls._wait(container_id, labels, timeout)
+
+    @classmethod
+    async def _ensure_running(
+        cls, container: Tuple[str, bool], labels: dict, timeout: Optional[float] = None
+    ):
+        """Start a container unless it's already running.
+
+        Args:
+            container (Tuple[str, bool]): Container ID & if it's running.
+            labels (dict): Container labels.
+            timeout (float, optional): Seconds to wait.
+        """
+        _id, running = container
+        if not running:
+            await cls._start(_id, labels, timeout)
+
+    @classmethod
+    @timed("docker.compose", arg="name")
+    async def _compose(
+        cls,
+        name: str,
+        offset: int,
+        network: str,
+        images: ServiceImages,
+        start: bool,
+        timeout: Optional[float] = None,
+        replicas: int = 1,
+        balance: str = "round-robin",
+    ) -> list:
+        """Create, and optionally start, the containers of a service.
+
+        Containers left by a previous `build` or `up` are reused if their
+        fingerprint label matches the wanted config, else recreated. The
+        ones not wanted anymore, like scaled down replicas, are removed.
+        Many API replicas share the DB and get host ports allocated by
+        Docker, a load balancer listens on the service port. A running
+        load balancer is recreated if some replica isn't running yet.
+
+        Args:
+            name (str): API name.
+            offset (int): Service position, see `_build_host_ports`.
+            network (str): Network ID.
+            images (ServiceImages): Images to use.
+            start (bool): Start containers.
+            timeout (float, optional): Seconds to wait by each container.
+            replicas (int, optional): API containers.
+            balance (str, optional): Balance method, see
+                APIRUNS_BALANCE_METHODS.
+
+        Returns:
+            list: Container IDs, DB, API replicas & load balancer.
+        """
+        labels = cls._build_labels(name)
+        db_config = cls._build_db_config(name, offset, network, images)
+        db_name = db_config["name"]
+        api_port, _ = cls._build_host_ports(offset)
+        if replicas > 1:
+            api_names = [f"{name}-{i}" for i in range(replicas)]
+            api_host_port = ""
+        else:
+            api_names = [name]
+            api_host_port = api_port
+
+        api_configs = [
+            dict(
+                image=images.api,
+                name=api_name,
+                environment=cls._build_api_envs(db_name),
+                port=cls.APIRUNS_API_PORTS,
+                network_id=network,
+                labels=labels,
+                host_port=api_host_port,
+            )
+            for api_name in api_names
+        ]
+        proxy_configs = []
+        if replicas > 1:
+            config = cls._build_proxy_config(api_names, balance)
+            proxy_configs.append(
+                dict(
+                    image=images.proxy,
+                    name=f"{name}-{cls.APIRUNS_PROXY_NAME}",
+                    environment=[f"APIRUNS_PROXY_CONF={config}"],
+                    port=cls.APIRUNS_API_PORTS,
+                    network_id=network,
+                    labels=labels,
+                    host_port=api_port,
+                    command=cls.APIRUNS_PROXY_CMD,
+                )
+            )
+
+        configs = [db_config] + api_configs + proxy_configs
+        containers, _ = await asyncio.gather(
+            cls._list_containers_by_name(name),
+            cls._create_volume(
+                cls._build_volume_name(name), cls._build_volume_labels(name)
+            ),
+        )
+        existing = {c["Names"][0].lstrip("/"): c for c in containers}
+        wanted = {c["name"] for c in configs}
+        stale = [c for n, c in existing.items() if n not in wanted]
+        if stale:
+            await cls._delete_containers(stale)
+
+        typer.echo(f"Creating `{name}` DB & API containers.")
+        if proxy_configs:
+            typer.echo(f"Creating `{name}` load balancer, {replicas} replicas.")
+        # Only the DB needs to exist before the API starts, so the DB & the
+        # replicas are reconciled at once.
+        db, *apis = await asyncio.gather(
+            *(
+                cls._reconcile_container(existing.get(c["name"]), **c)
+                for c in [db_config] + api_configs
+            )
+        )
+        proxies = []
+        for c in proxy_configs:
+            proxy = existing.get(c["name"])
+            running = proxy and proxy.get("State") == cls.DOCKER_STATE_RUNNING
+            if running and not all(r for _, r in apis):
+                # nginx resolved the replicas when it started, the ones
+                # started again may have other IPs.
+                await cls._delete_container(proxy["Id"])
+                proxy = None
+            proxies.append(await cls._reconcile_container(proxy, **c))
+        reused = sum(
+            1
+            for c, (_id, _) in zip(configs, [db] + apis + proxies)
+            if existing.get(c["name"], {}).get("Id") == _id
+        )
+        if reused:
+            typer.echo(
+                f"Reusing {reused}/{len(configs)} unchanged `{name}` containers."
+            )
+
+        if start:
+            # The API needs the DB running & the load balancer resolves the
+            # replicas names when it starts.
+            await cls._ensure_running(db, labels, timeout)
+            await asyncio.gather(
+                *(cls._ensure_running(a, labels, timeout) for a in apis)
+            )
+            for proxy in proxies:
+                await cls._ensure_running(proxy, labels, timeout)
+        return [_id for _id, _ in [db] + apis + proxies]
+
+    @classmethod
+    @timed("docker.compose_services")
+    async def compose_services(
+        cls,
+        services: Dict[str, int],
+        start: bool,
+        timeout: Optional[float] = None,
+        images: Optional[ServiceImages] = None,
+        parallel: Optional[int] = None,
+        replicas: int = 1,
+        balance: str = "round-robin",
+    ) -> Dict[str, list]:
+        """Compose many services concurrently.
+
+        Network & images are shared, so they're made once before composing
+        up to `parallel` services at a time.
+
+        Args:
+            services (dict): Position by API name, see `_build_host_ports`.
+            start (bool): Start services.
+            timeout (float, optional): Seconds to wait by each container.
+            images (ServiceImages, optional): Images to use. Default latest.
+            parallel (int, optional): Services composed at a time. Default
+                COMPOSE_PARALLELISM.
+            replicas (int, optional): API containers by service.
+            balance (str, optional): Balance method of the replicas.
+
+        Returns:
+            dict: Container IDs by API name.
+        """
+        images = images or ServiceImages()
+        network = await cls._prepare(images, proxy=replicas > 1)
+        semaphore = asyncio.Semaphore(parallel or cls.COMPOSE_PARALLELISM)
+
+        async def compose(name: str, offset: int) -> list:
+            async with semaphore:
+                return await cls._compose(
+                    name, offset, network, images, start, timeout, replicas, balance
+                )
+
+        containers = await asyncio.gather(
+            *(compose(name, offset) for name, offset in services.items())
+        )
+        return dict(zip(services, containers))
+
+    @classmethod
+    async def compose_service(
+        cls,
+        name: str,
+        start: bool,
+        timeout: Optional[float] = None,
+        images: Optional[ServiceImages] = None,
+    ) -> list:
+        """Compose a service on the default ports.
+
+        Args:
+            name (str): Service main name.
+            start (bool): Start services.
+            timeout (float, optional): Seconds to wait by each container.
+            images (ServiceImages, optional): Images to use. Default latest.
+
+        Returns:
+            list: Container IDs.
+        """
+        services = await cls.compose_services({name: 0}, start, timeout, images)
+        return services[name]
+
+    @classmethod
+    async def _delete_containers(cls, containers: list):
+        """Delete containers concurrently.
+
+        Args:
+            containers (list): Containers of `/containers/json`.
+        """
+        for c in containers:
+            typer.echo(f"Removing {c['Names']}")
+        await asyncio.gather(*(cls._delete_container(c["Id"]) for c in containers))
+
+    @classmethod
+    def _build_prune_filters(cls, label: str, all_volumes: bool = False) -> str:
+        """Build prune filters.
+
+        Args:
+            label (str): Label filter, `key` or `key=value`.
+            all_volumes (bool, optional): Prune named volumes too, needs
+                PRUNE_ALL_API_VERSION.
+
+        Returns:
+            str: filters encoded.
+        """
+        filters = {"label": [label]}
+        if all_volumes:
+            # Since API 1.42 only anonymous volumes are pruned without `all`.
+            filters["all"] = ["true"]
+        return encode_obj_to_url(filters)
+
+    @classmethod
+    @timed("docker.prune", arg="kind")
+    async def _prune(cls, kind: str, filters: str) -> dict:
+        """Delete the unused networks or volumes matching filters.
+
+        Args:
+            kind (str): `networks` or `volumes`.
+            filters (str): filters encoded.
+
+        Raises:
+            ErrorPruningResources: Error pruning.
+            ErrorDockerEngineAPI: Docker API not is responding.
+
+        Returns:
+            dict: example:
+                {'VolumesDeleted': ['apiruns-myapi-data'], 'SpaceReclaimed': 1024}
+        """
+        url = f"{cls.DOCKER_HOST}/{kind}/prune?filters={filters}"
+        try:
+            response = await cls.client.post(url, headers=cls.DOCKER_HEADERS)
+            if response.status_code != 200:
+                raise ErrorPruningResources(errors=response.text)
+            return response.json() or {}
+        except httpx.RequestError as e:
+            raise ErrorDockerEngineAPI(errors=e)
+
+    @classmethod
+    async def _prune_resources(cls, names: Optional[list] = None):
+        """Prune the volumes of services & the network.
+
+        Args:
+            names (list, optional): Service names. Default the volumes of
+                every service, whether their containers exist or not.
+        """
+        # Before API 1.42 every unused volume is pruned, named ones included.
+        all_volumes = await cls._api_version() >= cls.PRUNE_ALL_API_VERSION
+        if names is None:
+            labels = [cls.APIRUNS_VOLUME_LABEL]
+        else:
+            labels = [f"{cls.APIRUNS_VOLUME_LABEL}={name}" for name in names]
+        volumes, space = [], 0
+        # The engine runs one prune of a kind at a time, so they're sequential.
+        for label in labels:
+            filters = cls._build_prune_filters(label, all_volumes)
+            report = await cls._prune("volumes", filters)
+            volumes.extend(report.get("VolumesDeleted") or [])
+            space += report.get("SpaceReclaimed") or 0
+        # The network is shared, it's only removed once no container uses it.
+        filters = cls._build_prune_filters(f"service={cls.APIRUNS_LABEL}")
+        report = await cls._prune("networks", filters)
+        networks = report.get("NetworksDeleted") or []
+        typer.echo(
+            f"Pruned {len(volumes)} volumes ({space / 1024 / 1024:.1f} MB) "
+            f"& {len(networks)} networks"
+        )
+
+    @classmethod
+    @timed("docker.service_down", arg="name")
+    async def service_down(cls, name: str):
+        """Service down.
+
+        Args:
+            name (str): Service name.
+        """
+        containers = await cls._list_containers_by_name(name)
+        await cls._delete_containers(containers)
+
+    @classmethod
+    async def services_down(
+        cls, names: Optional[list] = None, prune: bool = False
+    ) -> list:
+        """Many services down, concurrently.
+
+        Args:
+            names (list, optional): Service names. Default every apiruns
+                service, listed in a single request.
+            prune (bool, optional): Prune the services volumes & the network.
+                Without names, every apiruns volume is pruned.
+
+        Returns:
+            list: Service names.
+        """
+        if names is None:
+            containers = await cls._list_apiruns_containers()
+            down = sorted({cls._service_name(c["Labels"]) for c in containers})
+            await cls._delete_containers(containers)
+        else:
+            down = names
+            await asyncio.gather(*(cls.service_down(name) for name in names))
+        if prune:
+            # Volumes of every service, their containers may be gone already.
+            await cls._prune_resources(names)
+        return down
+
+    @classmethod
+    @timed("docker.snapshot", arg="name")
+    async def snapshot(
+        cls, name: str, destination: Path, timeout: Optional[float] = None
+    ) -> int:
+        """Save the DB data of a service.
+
+        A running DB is stopped while its files are read, so the snapshot
+        is consistent, and started again.
+
+        Args:
+            name (str): API name.
+            destination (Path): `.tar.gz` file.
+            timeout (float, optional): Seconds to wait for the DB restart.
+
+        Raises:
+            ErrorGettingContainerStatus: The DB container doesn't exist.
+
+        Returns:
+            int: Bytes of the data.
+        """
+        db_name = cls._build_db_name(name)
+        container = await cls._inspect_container(db_name)
+        if container is None:
+            raise ErrorGettingContainerStatus(errors=f"{db_name} doesn't exist")
+        running = container["State"].get("Status") == cls.DOCKER_STATE_RUNNING
+        if running:
+            typer.echo(f"Stopping `{db_name}` while it's saved.")
+            await cls._stop_container(container["Id"])
+        try:
+            return await cls._get_archive(
+                container["Id"], cls.APIRUNS_DB_DATA_PATH, destination
+            )
+        finally:
+            if running:
+                await cls._start(container["Id"], cls._build_labels(name), timeout)
+
+    @classmethod
+    @timed("docker.restore", arg="name")
+    async def _restore(
+        cls,
+        name: str,
+        offset: int,
+        network: str,
+        images: ServiceImages,
+        source: Path,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """Replace the DB data of a service with a snapshot.
+
+        The DB container & its volume are made again, so no file of the
+        previous data is left, then the snapshot is extracted before the
+        DB starts.
+
+        Args:
+            name (str): API name.
+            offset (int): Service position, see `_build_host_ports`.
+            network (str): Network ID.
+            images (ServiceImages): Images to use.
+            source (Path): `.tar.gz` file.
+            timeout (float, optional): Seconds to wait for the DB.
+
+        Returns:
+            str: DB container ID.
+        """
+        config = cls._build_db_config(name, offset, network, images)
+        volume = cls._build_volume_name(name)
+        container = await cls._inspect_container(config["name"])
+        if container is not None:
+            await cls._delete_container(container["Id"])
+        await cls._delete_volume(volume)
+        await cls._create_volume(volume, cls._build_volume_labels(name))
+        db_id = await cls._create_container(**config)
+        # The tar holds the data directory, it's extracted in its parent.
+        parent = posixpath.dirname(cls.APIRUNS_DB_DATA_PATH)
+        await cls._put_archive(db_id, parent, source)
+        await cls._start(db_id, config["labels"], timeout)
+        return db_id
+
+    @classmethod
+    async def snapshot_services(
+        cls, destinations: Dict[str, Path], timeout: Optional[float] = None
+    ) -> Dict[str, int]:
+        """Save the DB data of many services concurrently.
+
+        Args:
+            destinations (dict): `.tar.gz` file by API name.
+            timeout (float, optional): Seconds to wait for the DB restarts.
+
+        Returns:
+            dict: Bytes of the data by API name.
+        """
+        sizes = await asyncio.gather(
+            *(cls.snapshot(n, path, timeout) for n, path in destinations.items())
+        )
+        return dict(zip(destinations, sizes))
+
+    @classmethod
+    async def restore_services(
+        cls,
+        services: Dict[str, int],
+        sources: Dict[str, Path],
+        images: Optional[ServiceImages] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, str]:
+        """Restore the DB data of many services concurrently.
+
+        Args:
+            services (dict): Position by API name, see `_build_host_ports`.
+            sources (dict): `.tar.gz` file by API name.
+            images (ServiceImages, optional): Images to use. Default latest.
+            timeout (float, optional): Seconds to wait for the DBs.
+
+        Returns:
+            dict: DB container ID by API name.
+        """
+        images = images or ServiceImages()
+        network = await cls._prepare(images)
+        ids = await asyncio.gather(
+            *(
+                cls._restore(n, services[n], network, images, sources[n], timeout)
+                for n in sources
+            )
+        )
+        return dict(zip(sources, ids))
+
+
+class DockerClient:
+    """Docker Client, blocking wrapper of `AsyncDockerClient`."""
+
+    @staticmethod
+    def _run(coroutine) -> Any:
+        """Run a coroutine inside a Docker session.
+
+        Args:
+            coroutine (Coroutine): `AsyncDockerClient` call.
+
+        Returns:
+            Any: Coroutine result.
+        """
+
+        async def main():
+            async with AsyncDockerClient.session():
+                return await coroutine
+
+        return asyncio.run(main())
+
+    @classmethod
+    def compose_service(
+        cls,
+        name: str,
+        start: bool,
+        timeout: Optional[float] = None,
+        images: Optional[ServiceImages] = None,
+    ):
+        """Compose services.
+
+        Args:
+            name (str): Service main name.
+            start (bool): Start services.
+            timeout (float, optional): Seconds to wait by each container.
+            images (ServiceImages, optional): Images to use.
+
+        Returns:
+            list: Container IDs.
+        """
+        return cls._run(AsyncDockerClient.compose_service(name, start, timeout, images))
+
+    @classmethod
+    def compose_services(
+        cls,
+        services: Dict[str, int],
+        start: bool,
+        timeout: Optional[float] = None,
+        images: Optional[ServiceImages] = None,
+        parallel: Optional[int] = None,
+        replicas: int = 1,
+        balance: str = "round-robin",
+    ) -> Dict[str, list]:
+        """Compose many services concurrently.
+
+        Args:
+            services (dict): Position by API name.
+            start (bool): Start services.
+            timeout (float, optional): Seconds to wait by each container.
+            images (ServiceImages, optional): Images to use.
+            parallel (int, optional): Services composed at a time.
+            replicas (int, optional): API containers by service.
+            balance (str, optional): Balance method of the replicas.
+
+        Returns:
+            dict: Container IDs by API name.
+        """
+        return cls._run(
+            AsyncDockerClient.compose_services(
+                services, start, timeout, images, parallel, replicas, balance
+            )
+        )
+
+    @staticmethod
+    def api_port(offset: int) -> str:
+        """API host port of a service.
+
+        Args:
+            offset (int): Service position.
+
+        Returns:
+            str: Host port.
+        """
+        return AsyncDockerClient._build_host_ports(offset)[0]
+
+    @staticmethod
+    def db_port(offset: int) -> str:
+        """DB host port of a service.
+
+        Args:
+            offset (int): Service position.
+
+        Returns:
+            str: Host port.
+        """
+        return AsyncDockerClient._build_host_ports(offset)[1]
+
+    @classmethod
+    def running_services(cls, names: list) -> Dict[str, list]:
+        """Running containers of many services.
+
+        Args:
+            names (list): Service names.
+
+        Returns:
+            dict: Container IDs, sorted, by service name.
+        """
+
+        async def list_services():
+            return await asyncio.gather(
+                *(AsyncDockerClient._list_containers_by_name(n) for n in names)
+            )
+
+        services = cls._run(list_services())
+        return {
+            name: sorted(
+                c["Id"]
+                for c in containers
+                if c.get("State") == AsyncDockerClient.DOCKER_STATE_RUNNING
+            )
+            for name, containers in zip(names, services)
+        }
+
+    @classmethod
+    def service_down(cls, name: str):
+        """Service down.
+
+        Args:
+            name (str): Service name.
+        """
+        cls._run(AsyncDockerClient.service_down(name))
+
+    @classmethod
+    def services_down(cls, names: Optional[list] = None, prune: bool = False) -> list:
+        """Many services down.
+
+        Args:
+            names (list, optional): Service names. Default every apiruns
+                service.
+            prune (bool, optional): Prune the services volumes & the network.
+
+        Returns:
+            list: Service names.
+        """
+        return cls._run(AsyncDockerClient.services_down(names, prune))
+
+    @classmethod
+    def snapshot_services(
+        cls, destinations: Dict[str, Path], timeout: Optional[float] = None
+    ) -> Dict[str, int]:
+        """Save the DB data of many services.
+
+        Args:
+            destinations (dict): `.tar.gz` file by API name.
+            timeout (float, optional): Seconds to wait for the DB restarts.
+
+        Returns:
+            dict: Bytes of the data by API name.
+        """
+        return cls._run(AsyncDockerClient.snapshot_services(destinations, timeout))
+
+    @classmethod
+    def restore_services(
+        cls,
+        services: Dict[str, int],
+        sources: Dict[str, Path],
+        images: Optional[ServiceImages] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, str]:
+        """Restore the DB data of many services.
+
+        Args:
+            services (dict): Position by API name.
+            sources (dict): `.tar.gz` file by API name.
+            images (ServiceImages, optional): Images to use.
+            timeout (float, optional): Seconds to wait for the DBs.
+
+        Returns:
+            dict: DB container ID by API name.
+        """
+        return cls._run(
+            AsyncDockerClient.restore_services(services, sources, images, timeout)
+        )
+
+
+class APIClient:
+    """API local Client"""
+
+    HOST = "http://localhost:8000"
+    # The pool holds a connection per registration worker.
+    TRANSPORT = TransportSettings(max_connections=8, max_keepalive=8)
+    PING_TIMEOUT = httpx.Timeout(2.0, connect=0.5)
+    PING_DEADLINE = 60.0
+    RETRY_FIRST_DELAY = 0.05
+    RETRY_MAX_DELAY = 2.0
+    MODELS_PATH = "/admin/models"
+    MODELS_WORKERS = 8
+    MODELS_RETRIES = 3
+
+    session: Optional[httpx.Client] = None
+
+    @classmethod
+    def _get_session(cls) -> httpx.Client:
+        """Get the keep-alive client, created on first use.
+
+        Its pool & timeouts are TRANSPORT, overridden by `APIRUNS_API_*`
+        variables.
+
+        Returns:
+            httpx.Client: HTTP client.
+        """
+        if cls.session is None:
+            cls.session = sync_client(cls.TRANSPORT.from_env("api"), "api")
+        return cls.session
+
+    @classmethod
+    def build_host(cls, port: str) -> str:
+        """Build the host of an API listening on another port.
+
+        Args:
+            port (str): Host port.
+
+        Returns:
+            str: example: http://localhost:8001
+        """
+        url = urlsplit(cls.HOST)
+        return url._replace(netloc=f"{url.hostname}:{port}").geturl()
+
+    @classmethod
+    def _get(
+        cls,
+        path: str,
+        headers: dict,
+        timeout: Optional[httpx.Timeout] = None,
+        host: Optional[str] = None,
+    ) -> Tuple[None, Any]:
+        """Get method http.
+
+        Args:
+            path (str): Path name.
+            headers (dict): Headers request.
+            timeout (httpx.Timeout, optional): Default the client timeout.
+            host (str, optional): API host. Default HOST.
+
+        Returns:
+            Tuple[None, Any]: Json if was success else None.
+        """
+        url = f"{host or cls.HOST}{path}"
+        try:
+            response = cls._get_session().get(
+                url, headers=headers, timeout=timeout or httpx.USE_CLIENT_DEFAULT
+            )
+            if response.status_code > 299:
+                return None
+            return response.json()
+        except (httpx.RequestError, ValueError) as e:
+            raise ErrorAPIClient(errors=e)
+
+    @classmethod
+    def _backoff(cls, attempt: int) -> float:
+        """Delay before the next retry, exponential with jitter.
+
+        Args:
+            attempt (int): Failed attempts so far.
+
+        Returns:
+            float: Seconds to sleep.
+        """
+        delay = min(cls.RETRY_FIRST_DELAY * 2**attempt, cls.RETRY_MAX_DELAY)
+        return delay * random.uniform(0.5, 1.0)
+
+    @classmethod
+    @timed("api.ping", arg="host")
+    def ping(
+        cls, deadline: Optional[float] = None, host: Optional[str] = None
+    ) -> float:
+        """Ping to health services until they're ready.
+
+        Args:
+            deadline (float, optional): Seconds to wait. Default PING_DEADLINE.
+            host (str, optional): API host. Default HOST.
+
+        Raises:
+            ErrorAPINotReady: API isn't ready after the deadline.
+
+        Returns:
+            float: Seconds until the API was ready.
+        """
+        path = "/ping"
+        host = host or cls.HOST
+        deadline = deadline or cls.PING_DEADLINE
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            try:
+                if cls._get(path, headers={}, timeout=cls.PING_TIMEOUT, host=host):
+                    return time.monotonic() - started
+            except ErrorAPIClient:
+                # The API isn't listening yet.
+                pass
+
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                raise ErrorAPINotReady(errors=f"{host}{path}")
+            time.sleep(min(cls._backoff(attempt), remaining))
+            attempt += 1
+
+    @classmethod
+    def _create_model(cls, model: dict, host: Optional[str] = None) -> Optional[str]:
+        """Create a model, retrying on server & connection errors.
+
+        Args:
+            model (dict): Model definition.
+            host (str, optional): API host. Default HOST.
+
+        Returns:
+            Optional[str]: Error if the model wasn't created else None.
+        """
+        url = f"{host or cls.HOST}{cls.MODELS_PATH}"
+        error = None
+        for attempt in range(cls.MODELS_RETRIES + 1):
+            if attempt:
+                time.sleep(cls._backoff(attempt))
+            try:
+                response = cls._get_session().post(url, json=model, headers={})
+            except httpx.RequestError as e:
+                error = str(e)
+                continue
+
+            if response.status_code <= 299:
+                return None
+            error = f"{response.status_code} {response.text}"
+            if response.status_code < 500:
+                break
+        return error
+
+    @classmethod
+    @timed("api.create_models")
+    def create_models(
+        cls,
+        model_list: Iterable[dict],
+        workers: Optional[int] = None,
+        host: Optional[str] = None,
+    ) -> None:
+        """Create models in the service.
+
+        Args:
+            model_list (Iterable[dict]): Models, a list or a lazy iterator.
+            workers (int, optional): Concurrent requests. Default MODELS_WORKERS.
+            host (str, optional): API host. Default HOST.
+
+        Raises:
+            ErrorCreatingModels: Some models weren't created.
+        """
+        workers = workers or cls.MODELS_WORKERS
+        failed = {}
+        total = 0
+        # Models are submitted as they come, with a bounded window in flight,
+        # so an iterator is never read ahead.
+        pending = deque()
+
+        def collect():
+            i, model, future = pending.popleft()
+            error = future.result()
+            if error is not None:
+                failed[model.get("path", str(i))] = error
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for total, model in enumerate(model_list, 1):
+                pending.append(
+                    (total - 1, model, executor.submit(cls._create_model, model, host))
+                )
+                if len(pending) >= workers * 2:
+                    collect()
+            while pending:
+                collect()
+
+        typer.echo(f"Models created: {total - len(failed)}/{total}")
+        if failed:
+            for path, error in failed.items():
+                typer.echo(f"Failed `{path}`: {error}")
+            raise ErrorCreatingModels(errors=failed)
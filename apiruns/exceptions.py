@@ -15,6 +15,14 @@ class ErrorReadingFile(Exception):
         self.errors = errors
 
 
+class ErrorServiceNotFound(Exception):
+    """Service isn't in the manifest."""
+
+    def __init__(self, errors: str = None):
+        self.message = "Service isn't in the manifest."
+        self.errors = errors
+
+
 # Docker Client
 
 
@@ -58,6 +66,14 @@ class ErrorStartingAContainer(Exception):
         self.errors = errors
 
 
+class ErrorStoppingContainer(Exception):
+    """Error stopping a container."""
+
+    def __init__(self, errors: str = None):
+        self.message = "Error stopping a container."
+        self.errors = errors
+
+
 class ErrorContainerExited(Exception):
     """There is a container exited."""
 
@@ -66,6 +82,14 @@ class ErrorContainerExited(Exception):
         self.errors = errors
 
 
+class ErrorContainerTimeout(Exception):
+    """Container isn't running after timeout."""
+
+    def __init__(self, errors: str = None):
+        self.message = "Container isn't running after timeout."
+        self.errors = errors
+
+
 class ErrorListingContainers(Exception):
     """Error listing containers."""
 
@@ -82,6 +106,14 @@ class ErrorDeletingContainers(Exception):
         self.errors = errors
 
 
+class ErrorPruningResources(Exception):
+    """Error pruning networks or volumes."""
+
+    def __init__(self, errors: str = None):
+        self.message = "Error pruning networks or volumes."
+        self.errors = errors
+
+
 class ErrorPullingImage(Exception):
     """Error pulling image."""
 
@@ -90,6 +122,14 @@ class ErrorPullingImage(Exception):
         self.errors = errors
 
 
+class ErrorImageNotFound(Exception):
+    """Image not found."""
+
+    def __init__(self, errors: str = None):
+        self.message = "Image not found."
+        self.errors = errors
+
+
 # Apiruns client
 
 
@@ -99,3 +139,94 @@ class ErrorAPIClient(Exception):
     def __init__(self, errors: str = None):
         self.message = "Error with request to API rest local."
         self.errors = errors
+
+
+class ErrorAPINotReady(Exception):
+    """API rest local isn't ready."""
+
+    def __init__(self, errors: str = None):
+        self.message = "API rest local isn't ready."
+        self.errors = errors
+
+
+class ErrorCreatingModels(Exception):
+    """Error creating models."""
+
+    def __init__(self, errors: dict = None):
+        self.message = "Error creating models."
+        self.errors = errors
+
+
+# Seed
+
+
+class ErrorMissingDependency(Exception):
+    """Optional dependency isn't installed."""
+
+    def __init__(self, errors: str = None):
+        self.message = "Optional dependency isn't installed."
+        self.errors = errors
+
+
+class ErrorSeedingData(Exception):
+    """Error inserting documents in the DB."""
+
+    def __init__(self, errors: str = None):
+        self.message = "Error inserting documents in the DB."
+        self.errors = errors
+
+
+# Snapshots
+
+
+class ErrorCreatingVolume(Exception):
+    """Error creating volume."""
+
+    def __init__(self, errors: str = None):
+        self.message = "Error creating volume."
+        self.errors = errors
+
+
+class ErrorDeletingVolume(Exception):
+    """Error deleting volume."""
+
+    def __init__(self, errors: str = None):
+        self.message = "Error deleting volume."
+        self.errors = errors
+
+
+class ErrorCopyingData(Exception):
+    """Error copying data from or to a container."""
+
+    def __init__(self, errors: str = None):
+        self.message = "Error copying data from or to a container."
+        self.errors = errors
+
+
+class ErrorSnapshotNotFound(Exception):
+    """Snapshot doesn't exist."""
+
+    def __init__(self, errors: str = None):
+        self.message = "Snapshot doesn't exist."
+        self.errors = errors
+
+
+class ErrorInvalidSnapshotName(Exception):
+    """Snapshot name isn't valid."""
+
+    def __init__(self, errors: str = None):
+        self.message = (
+            "Snapshot name isn't valid, use letters, digits, `.`, `_` or `-`."
+        )
+        self.errors = errors
+
+
+# Artifacts
+
+
+class ErrorReadingArtifact(Exception):
+    """Error reading build artifact."""
+
+    def __init__(self, errors: str = None):
+        self.message = "Error reading build artifact, run `apiruns build` again."
+        self.errors = errors
@@ -0,0 +1,191 @@
+import random
+import string
+from datetime import date, datetime, timedelta
+from typing import Any, Callable
+
+try:
+    from re import _constants as sre
+    from re import _parser as sre_parse
+except ImportError:  # pragma: no cover, python < 3.11
+    import sre_constants as sre
+    import sre_parse
+
+Generator = Callable[[random.Random], Any]
+
+PRINTABLE = string.ascii_letters + string.digits
+CATEGORIES = {
+    sre.CATEGORY_DIGIT: string.digits,
+    sre.CATEGORY_NOT_DIGIT: string.ascii_letters,
+    sre.CATEGORY_WORD: string.ascii_letters + string.digits + "_",
+    sre.CATEGORY_NOT_WORD: "-.,;:!",
+    sre.CATEGORY_SPACE: " ",
+    sre.CATEGORY_NOT_SPACE: PRINTABLE,
+}
+# Unbounded repeats (`*`, `+`, `{n,}`) are cut this far from their minimum.
+MAX_REPEAT_EXTRA = 8
+DEFAULT_MAX_LENGTH = 12
+DEFAULT_MAX_NUMBER = 1000
+EPOCH = datetime(2020, 1, 1)
+
+
+class RegexGenerator:
+    """Strings matching a regular expression.
+
+    The pattern is parsed once with the `re` parser, every string is made
+    by walking the parsed tree. Anchors are ignored and lookarounds or
+    backreferences aren't supported.
+
+    Args:
+        pattern (str): Regular expression.
+    """
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.tree = sre_parse.parse(pattern)
+
+    def __call__(self, rng: random.Random) -> str:
+        return "".join(self._walk(self.tree, rng))
+
+    def _walk(self, tree, rng: random.Random) -> list:
+        chars = []
+        for op, av in tree:
+            if op in (sre.MAX_REPEAT, sre.MIN_REPEAT):
+                low, high, sub = av
+                high = min(high, low + MAX_REPEAT_EXTRA)
+                for _ in range(rng.randint(low, high)):
+                    chars.extend(self._walk(sub, rng))
+            elif op == sre.SUBPATTERN:
+                chars.extend(self._walk(av[-1], rng))
+            elif op == sre.BRANCH:
+                chars.extend(self._walk(rng.choice(av[1]), rng))
+            elif op != sre.AT:
+                chars.append(self._char(op, av, rng))
+        return chars
+
+    def _char(self, op, av, rng: random.Random) -> str:
+        if op == sre.LITERAL:
+            return chr(av)
+        if op == sre.NOT_LITERAL:
+            return rng.choice(PRINTABLE.replace(chr(av), ""))
+        if op == sre.ANY:
+            return rng.choice(PRINTABLE)
+        if op == sre.IN:
+            return rng.choice(self._charset(av))
+        if op == sre.CATEGORY:
+            return rng.choice(CATEGORIES[av])
+        raise ValueError(f"Unsupported regex `{self.pattern}`")
+
+    @staticmethod
+    def _charset(items) -> str:
+        chars = []
+        negate = False
+        for op, av in items:
+            if op == sre.NEGATE:
+                negate = True
+            elif op == sre.LITERAL:
+                chars.append(chr(av))
+            elif op == sre.RANGE:
+                chars.extend(chr(c) for c in range(av[0], av[1] + 1))
+            elif op == sre.CATEGORY:
+                chars.extend(CATEGORIES[av])
+        if negate:
+            return "".join(c for c in PRINTABLE if c not in chars)
+        return "".join(chars)
+
+
+class PayloadGenerator:
+    """Documents valid against a Cerberus schema.
+
+    The schema is compiled once to a generator by field, so making a
+    document doesn't walk the schema rules again. Supported rules are
+    `type`, `required`, `allowed`, `min`, `max`, `minlength`, `maxlength`,
+    `regex` and nested `schema`.
+
+    Args:
+        schema (dict): Cerberus schema of the endpoint.
+        optional (float, optional): Probability of including a field that
+            isn't required. Default 1.0, every field.
+
+    Example:
+        >>> generator = PayloadGenerator({"age": {"type": "integer", "min": 18}})
+        >>> generator(random.Random(1))
+        {'age': 885}
+    """
+
+    def __init__(self, schema: dict, optional: float = 1.0):
+        self.optional = optional
+        self.fields = [
+            (name, bool(rules.get("required")), self._compile(rules))
+            for name, rules in schema.items()
+            if isinstance(rules, dict)
+        ]
+
+    def __call__(self, rng: random.Random) -> dict:
+        return {
+            name: generate(rng)
+            for name, required, generate in self.fields
+            if required or rng.random() < self.optional
+        }
+
+    def _compile(self, rules: dict) -> Generator:
+        """Compile the rules of a field.
+
+        Args:
+            rules (dict): Cerberus rules.
+
+        Returns:
+            Generator: Function of a random generator returning a value.
+        """
+        if "allowed" in rules:
+            allowed = list(rules["allowed"])
+            return lambda rng: rng.choice(allowed)
+
+        kind = rules.get("type", "string")
+        if isinstance(kind, list):
+            kind = kind[0]
+        compiler = getattr(self, f"_compile_{kind}", self._compile_string)
+        return compiler(rules)
+
+    def _compile_string(self, rules: dict) -> Generator:
+        if rules.get("regex"):
+            return RegexGenerator(rules["regex"])
+        low = rules.get("minlength", 1 if rules.get("empty") is False else 0)
+        high = rules.get("maxlength", max(low, DEFAULT_MAX_LENGTH))
+        low = max(low, 1) if high else 0
+        return lambda rng: "".join(rng.choices(PRINTABLE, k=rng.randint(low, high)))
+
+    def _compile_integer(self, rules: dict) -> Generator:
+        low = int(rules.get("min", 0))
+        high = int(rules.get("max", max(low, 0) + DEFAULT_MAX_NUMBER))
+        return lambda rng: rng.randint(low, high)
+
+    def _compile_float(self, rules: dict) -> Generator:
+        low = float(rules.get("min", 0))
+        high = float(rules.get("max", max(low, 0) + DEFAULT_MAX_NUMBER))
+        return lambda rng: round(rng.uniform(low, high), 2)
+
+    _compile_number = _compile_float
+
+    def _compile_boolean(self, rules: dict) -> Generator:
+        return lambda rng: rng.random() < 0.5
+
+    def _compile_datetime(self, rules: dict) -> Generator:
+        # Dates are sent as ISO strings, json has no date type.
+        seconds = 10**8
+        return lambda rng: (
+            EPOCH + timedelta(seconds=rng.randrange(seconds))
+        ).isoformat()
+
+    def _compile_date(self, rules: dict) -> Generator:
+        start = date(2020, 1, 1)
+        return lambda rng: (start + timedelta(days=rng.randrange(3650))).isoformat()
+
+    def _compile_dict(self, rules: dict) -> Generator:
+        return PayloadGenerator(rules.get("schema") or {}, self.optional)
+
+    def _compile_list(self, rules: dict) -> Generator:
+        items = rules.get("schema")
+        item = self._compile(items) if isinstance(items, dict) else self._compile({})
+        low = rules.get("minlength", 0)
+        high = rules.get("maxlength", low + 3)
+        return lambda rng: [item(rng) for _ in range(rng.randint(low, high))]
@@ -1,12 +1,21 @@
+from enum import Enum
 from typing import Optional
 import typer
 from apiruns import __version__ as package_version
-from .services import Apiruns
 
 
+# Commands import services on call, so `--help` & `version` don't pay for
+# httpx, cerberus and yaml.
 app = typer.Typer(add_completion=False)
 
 
+class Balance(str, Enum):
+    """Balance methods of the API replicas."""
+
+    round_robin = "round-robin"
+    least_conn = "least-conn"
+
+
 @app.command()
 def version():
     """Get current version. 💬"""
@@ -20,9 +29,70 @@ def build(
         help="Apiruns configuration file.",
     ),
     version: Optional[str] = None,
+    api_image: Optional[str] = typer.Option(
+        None,
+        help="API image pinned by tag or digest.",
+    ),
+    db_image: Optional[str] = typer.Option(
+        None,
+        help="DB image pinned by tag or digest.",
+    ),
+    cache: bool = typer.Option(
+        True,
+        help="Reuse the manifest parsed & validated before if it didn't change.",
+    ),
+    parallel: Optional[int] = typer.Option(
+        4,
+        min=1,
+        help="Services of the manifest composed at a time.",
+    ),
+    replicas: int = typer.Option(
+        1,
+        min=0,
+        help="API containers by service behind a load balancer, 0 is one by CPU.",
+    ),
+    balance: Balance = typer.Option(
+        Balance.round_robin,
+        help="Balance method of the API replicas.",
+    ),
+    output: Optional[str] = typer.Option(
+        "apiruns-build.json",
+        help="Compiled manifest written for `up --from-artifact`, empty to skip.",
+    ),
+    timings: bool = typer.Option(
+        False,
+        help="Print how long every phase took.",
+    ),
+    trace: Optional[str] = typer.Option(
+        None,
+        help="Write the phases timings as a Chrome trace JSON file.",
+    ),
+    stats: bool = typer.Option(
+        False,
+        help="Print the Docker Engine & API requests by endpoint.",
+    ),
+    stats_file: Optional[str] = typer.Option(
+        None,
+        help="Write the requests latency histograms in Prometheus text format.",
+    ),
 ):
     """Build images & validate schema. 🔧"""
-    Apiruns.build(file, version)
+    from .services import Apiruns
+    from .stats import recording
+    from .timings import tracing
+
+    with tracing(timings, trace), recording(stats, stats_file, "build"):
+        Apiruns.build(
+            file,
+            version,
+            api_image=api_image,
+            db_image=db_image,
+            cache=cache,
+            parallel=parallel,
+            replicas=replicas,
+            balance=balance.value,
+            output=output,
+        )
 
 
 @app.command()
@@ -30,18 +100,274 @@ def up(
     file: Optional[str] = typer.Option(
         "apiruns-compose.yml",
         help="Apiruns configuration file.",
-    )
+    ),
+    timeout: Optional[float] = typer.Option(
+        60.0,
+        help="Seconds to wait for each container and the API to be ready.",
+    ),
+    version: Optional[str] = None,
+    api_image: Optional[str] = typer.Option(
+        None,
+        help="API image pinned by tag or digest.",
+    ),
+    db_image: Optional[str] = typer.Option(
+        None,
+        help="DB image pinned by tag or digest.",
+    ),
+    cache: bool = typer.Option(
+        True,
+        help="Reuse the manifest parsed & validated before if it didn't change.",
+    ),
+    reconcile: bool = typer.Option(
+        False,
+        help="Keep running containers and only create new or changed models.",
+    ),
+    parallel: Optional[int] = typer.Option(
+        4,
+        min=1,
+        help="Services of the manifest composed at a time.",
+    ),
+    replicas: int = typer.Option(
+        1,
+        min=0,
+        help="API containers by service behind a load balancer, 0 is one by CPU.",
+    ),
+    balance: Balance = typer.Option(
+        Balance.round_robin,
+        help="Balance method of the API replicas.",
+    ),
+    artifact: Optional[str] = typer.Option(
+        None,
+        "--from-artifact",
+        help="Start the services compiled by `build`, the file isn't read.",
+    ),
+    stream: bool = typer.Option(
+        False,
+        help="Parse & create the endpoints one at a time, for very large manifests.",
+    ),
+    timings: bool = typer.Option(
+        False,
+        help="Print how long every phase took.",
+    ),
+    trace: Optional[str] = typer.Option(
+        None,
+        help="Write the phases timings as a Chrome trace JSON file.",
+    ),
+    stats: bool = typer.Option(
+        False,
+        help="Print the Docker Engine & API requests by endpoint.",
+    ),
+    stats_file: Optional[str] = typer.Option(
+        None,
+        help="Write the requests latency histograms in Prometheus text format.",
+    ),
 ):
     """Make your API rest. 🚀"""
-    Apiruns.up(file)
+    from .services import Apiruns
+    from .stats import recording
+    from .timings import tracing
+
+    with tracing(timings, trace), recording(stats, stats_file, "up"):
+        Apiruns.up(
+            file,
+            version=version,
+            timeout=timeout,
+            api_image=api_image,
+            db_image=db_image,
+            cache=cache,
+            reconcile=reconcile,
+            parallel=parallel,
+            replicas=replicas,
+            balance=balance.value,
+            artifact=artifact,
+            stream=stream,
+        )
 
 
 @app.command()
-def down(
+def dev(
+    file: Optional[str] = typer.Option(
+        "apiruns-compose.yml",
+        help="Apiruns configuration file.",
+    ),
+    watch: bool = typer.Option(
+        False,
+        help="Watch the file and reload the changed models on every save.",
+    ),
+    polling: bool = typer.Option(
+        False,
+        help="Watch the file by polling, for file systems without inotify.",
+    ),
+    timeout: Optional[float] = typer.Option(
+        60.0,
+        help="Seconds to wait for each container and the API to be ready.",
+    ),
+    version: Optional[str] = None,
+    api_image: Optional[str] = typer.Option(
+        None,
+        help="API image pinned by tag or digest.",
+    ),
+    db_image: Optional[str] = typer.Option(
+        None,
+        help="DB image pinned by tag or digest.",
+    ),
+):
+    """Run your API rest & hot reload its models. 🔁"""
+    from .services import Apiruns
+
+    Apiruns.dev(
+        file,
+        watch=watch,
+        polling=polling,
+        version=version,
+        timeout=timeout,
+        api_image=api_image,
+        db_image=db_image,
+    )
+
+
+@app.command()
+def bench(
     file: Optional[str] = typer.Option(
         "apiruns-compose.yml",
         help="Apiruns configuration file.",
+    ),
+    service: Optional[str] = typer.Option(
+        None,
+        help="Only load this service. Default every service of the file.",
+    ),
+    concurrency: int = typer.Option(16, min=1, help="Requests in flight."),
+    rate: float = typer.Option(
+        0.0,
+        min=0.0,
+        help="Target requests per second, 0 is as fast as possible.",
+    ),
+    duration: float = typer.Option(10.0, min=0.1, help="Seconds by service."),
+    output: Optional[str] = typer.Option(None, help="JSON report path."),
+    seed: Optional[int] = typer.Option(None, help="Payloads random seed."),
+):
+    """Load test the endpoints with payloads made from the schemas. 📈"""
+    from .services import Apiruns
+
+    Apiruns.bench(
+        file,
+        service=service,
+        concurrency=concurrency,
+        rate=rate,
+        duration=duration,
+        output=output,
+        seed=seed,
     )
+
+
+@app.command()
+def seed(
+    count: int = typer.Option(..., min=1, help="Documents by endpoint."),
+    file: Optional[str] = typer.Option(
+        "apiruns-compose.yml",
+        help="Apiruns configuration file.",
+    ),
+    service: Optional[str] = typer.Option(
+        None,
+        help="Only seed this service. Default every service of the file.",
+    ),
+    batch_size: int = typer.Option(1000, min=1, help="Documents by insert."),
+    seed: Optional[int] = typer.Option(None, help="Documents random seed."),
+):
+    """Insert synthetic documents made from the schemas in the DB. 🌱"""
+    from .services import Apiruns
+
+    Apiruns.seed(file, count, service=service, batch_size=batch_size, seed=seed)
+
+
+@app.command()
+def snapshot(
+    name: str = typer.Argument(..., help="Snapshot name."),
+    file: Optional[str] = typer.Option(
+        "apiruns-compose.yml",
+        help="Apiruns configuration file.",
+    ),
+    service: Optional[str] = typer.Option(
+        None,
+        help="Only save this service. Default every service of the file.",
+    ),
+    timeout: Optional[float] = typer.Option(
+        60.0,
+        help="Seconds to wait for each DB to be running again.",
+    ),
+):
+    """Save the DB data of the services. 📸"""
+    from .services import Apiruns
+
+    Apiruns.snapshot(name, file, service=service, timeout=timeout)
+
+
+@app.command()
+def restore(
+    name: str = typer.Argument(..., help="Snapshot name."),
+    file: Optional[str] = typer.Option(
+        "apiruns-compose.yml",
+        help="Apiruns configuration file.",
+    ),
+    service: Optional[str] = typer.Option(
+        None,
+        help="Only restore this service. Default every service of the file.",
+    ),
+    db_image: Optional[str] = typer.Option(
+        None,
+        help="DB image pinned by tag or digest.",
+    ),
+    timeout: Optional[float] = typer.Option(
+        60.0,
+        help="Seconds to wait for each DB to be running.",
+    ),
+):
+    """Replace the DB data of the services with a snapshot. ⏪"""
+    from .services import Apiruns
+
+    Apiruns.restore(name, file, service=service, db_image=db_image, timeout=timeout)
+
+
+@app.command()
+def down(
+    file: Optional[str] = typer.Option(
+        "apiruns-compose.yml",
+        help="Apiruns configuration file.",
+    ),
+    service: Optional[str] = typer.Option(
+        None,
+        help="Only remove this service. Default every service of the file.",
+    ),
+    all_stacks: bool = typer.Option(
+        False,
+        "--all",
+        help="Remove every apiruns service, whatever the file.",
+    ),
+    prune: bool = typer.Option(
+        False,
+        help="Also remove the services volumes and the network if unused.",
+    ),
+    timings: bool = typer.Option(
+        False,
+        help="Print how long every phase took.",
+    ),
+    trace: Optional[str] = typer.Option(
+        None,
+        help="Write the phases timings as a Chrome trace JSON file.",
+    ),
+    stats: bool = typer.Option(
+        False,
+        help="Print the Docker Engine & API requests by endpoint.",
+    ),
+    stats_file: Optional[str] = typer.Option(
+        None,
+        help="Write the requests latency histograms in Prometheus text format.",
+    ),
 ):
     """Stops containers and removes containers. 🌪"""
-    Apiruns.down(file)
+    from .services import Apiruns
+    from .stats import recording
+    from .timings import tracing
+
+    with tracing(timings, trace), recording(stats, stats_file, "down"):
+        Apiruns.down(file, service=service, prune=prune, all_stacks=all_stacks)
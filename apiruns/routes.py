@@ -0,0 +1,126 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+
+class RouteNode:
+    """Segment of the paths of a service."""
+
+    __slots__ = ("children", "index", "path", "nested")
+
+    def __init__(self):
+        self.children: Dict[str, "RouteNode"] = {}
+        self.index: Optional[int] = None
+        self.path: Optional[str] = None
+        # First child that is an endpoint.
+        self.nested: Optional["RouteNode"] = None
+
+
+class RouteTrie:
+    """Paths of the endpoints of a service, by segment.
+
+    The API serves an endpoint `/users` on `/users` and its items on
+    `/users/{id}`. Paths are compared without empty segments, so
+    `/users/` duplicates `/users`, and `/users/books` is shadowed by the
+    items of `/users`. Adding a path costs its length, a manifest is
+    checked in linear time.
+    """
+
+    ITEM = "{id}"
+
+    def __init__(self):
+        self.root = RouteNode()
+
+    @staticmethod
+    def segments(path: str) -> Tuple[str, ...]:
+        """Segments of a path.
+
+        Args:
+            path (str): Endpoint path.
+
+        Returns:
+            Tuple[str, ...]: Segments, example ('users', 'books').
+        """
+        return tuple(s for s in path.split("/") if s)
+
+    @classmethod
+    def item_route(cls, path: str) -> str:
+        return "/".join(("",) + cls.segments(path) + (cls.ITEM,))
+
+    def add(self, path: str, index: int) -> Optional[str]:
+        """Add the path of an endpoint, unless it conflicts with another.
+
+        Args:
+            path (str): Endpoint path.
+            index (int): Endpoint position.
+
+        Returns:
+            Optional[str]: Conflict with the paths added before, None if
+                the path was added.
+        """
+        parent, node = None, self.root
+        for segment in self.segments(path):
+            parent = node
+            node = node.children.setdefault(segment, RouteNode())
+        if node.index is not None:
+            return f"duplicates `{node.path}` at {node.index}"
+        if parent is not None and parent.index is not None:
+            route = self.item_route(parent.path)
+            return f"shadowed by `{route}` of `{parent.path}` at {parent.index}"
+        if node.nested is not None:
+            route = self.item_route(path)
+            return f"`{route}` shadows `{node.nested.path}` at {node.nested.index}"
+        node.index, node.path = index, path
+        if parent is not None and parent.nested is None:
+            parent.nested = node
+        return None
+
+    @classmethod
+    def build(cls, data: Iterable[dict]) -> Tuple["RouteTrie", dict]:
+        """Build the trie of the endpoints.
+
+        Endpoints without a string path are ignored, their schema errors
+        are reported by the validation.
+
+        Args:
+            data (Iterable[dict]): Endpoints, a list or a lazy iterator.
+
+        Returns:
+            Tuple[RouteTrie, dict]: Trie & errors by position of the
+                endpoints in conflict, not added.
+                example:
+                    {
+                        3: {
+                            'path': '/users/',
+                            'errors': {'path': ['duplicates `/users` at 0']}
+                        }
+                    }
+        """
+        trie, errors = cls(), {}
+        for i, d in enumerate(data):
+            path = d.get("path") if isinstance(d, dict) else None
+            if not isinstance(path, str):
+                continue
+            conflict = trie.add(path, i)
+            if conflict:
+                errors[i] = {"path": path, "errors": {"path": [conflict]}}
+        return trie, errors
+
+    def to_table(self) -> dict:
+        """Precomputed route table, to load the routes without parsing paths.
+
+        Returns:
+            dict: Children by segment, `""` holds the position of the
+                endpoint of a node.
+                example:
+                    {'users': {'': 0, 'books': {'': 1}}}
+        """
+
+        def table(node: RouteNode) -> dict:
+            routes = {} if node.index is None else {"": node.index}
+            for segment, child in node.children.items():
+                # Paths in conflict leave nodes without endpoints.
+                routes[segment] = table(child)
+                if not routes[segment]:
+                    del routes[segment]
+            return routes
+
+        return table(self.root)
@@ -0,0 +1,200 @@
+import time
+import random
+import typer
+from itertools import islice
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Iterator, Optional
+from .generators import PayloadGenerator
+from .exceptions import ErrorMissingDependency
+from .exceptions import ErrorSeedingData
+
+
+@dataclass
+class SeedProgress:
+    """Documents inserted in a collection."""
+
+    collection: str
+    total: int
+    interval: float = 1.0
+    inserted: int = 0
+    started: float = field(default_factory=time.monotonic)
+    reported: float = field(default_factory=time.monotonic)
+
+    def add(self, count: int) -> None:
+        self.inserted += count
+
+    def rate(self) -> float:
+        """Insertion rate.
+
+        Returns:
+            float: Documents per second.
+        """
+        elapsed = time.monotonic() - self.started
+        return self.inserted / elapsed if elapsed > 0 else 0.0
+
+    def should_report(self) -> bool:
+        """Throttle reports to one per interval.
+
+        Returns:
+            bool: True if the progress must be reported.
+        """
+        now = time.monotonic()
+        if now - self.reported < self.interval:
+            return False
+        self.reported = now
+        return True
+
+    def render(self, done: bool = False) -> str:
+        """Progress to text.
+
+        Args:
+            done (bool, optional): Seed finished.
+
+        Returns:
+            str: example:
+                `users`: 250000/1000000 docs (52000 docs/s)
+        """
+        if done:
+            elapsed = time.monotonic() - self.started
+            return (
+                f"Seeded `{self.collection}`: {self.inserted} docs "
+                f"in {elapsed:.1f}s ({self.rate():.0f} docs/s)"
+            )
+        return (
+            f"`{self.collection}`: {self.inserted}/{self.total} docs "
+            f"({self.rate():.0f} docs/s)"
+        )
+
+
+class Seeder:
+    """Synthetic documents inserted in bulk in the service DB.
+
+    Documents are made from the endpoint schema and inserted by batches
+    with `insert_many`, skipping the REST API. The next batch is made
+    while the previous one is inserted, so memory is bounded by two
+    batches whatever the count.
+    """
+
+    DB_NAME = "apiruns"
+    BATCH_SIZE = 1000
+    CONNECT_TIMEOUT_MS = 5000
+
+    @classmethod
+    def connect(cls, port: str) -> Any:
+        """Connect to the service DB.
+
+        Args:
+            port (str): DB host port.
+
+        Raises:
+            ErrorMissingDependency: pymongo isn't installed.
+
+        Returns:
+            pymongo.database.Database: Database.
+        """
+        try:
+            import pymongo
+        except ImportError:
+            raise ErrorMissingDependency(
+                errors="pymongo, install it with `pip install apiruns[seed]`"
+            )
+        client = pymongo.MongoClient(
+            f"mongodb://localhost:{port}/",
+            serverSelectionTimeoutMS=cls.CONNECT_TIMEOUT_MS,
+        )
+        return client[cls.DB_NAME]
+
+    @staticmethod
+    def collection_name(endpoint: dict) -> str:
+        """Collection of an endpoint, its name else its path.
+
+        Args:
+            endpoint (dict): Endpoint of the manifest.
+
+        Returns:
+            str: example: `/users/` is `users`.
+        """
+        return endpoint.get("name") or endpoint["path"].strip("/").replace("/", "_")
+
+    @staticmethod
+    def documents(
+        schema: dict, count: int, rng: Optional[random.Random] = None
+    ) -> Iterator[dict]:
+        """Lazily make documents from a schema.
+
+        Args:
+            schema (dict): Cerberus schema.
+            count (int): Documents.
+            rng (random.Random, optional): Random generator.
+
+        Yields:
+            dict: Document.
+        """
+        rng = rng or random.Random()
+        generate = PayloadGenerator(schema)
+        for _ in range(count):
+            yield generate(rng)
+
+    @staticmethod
+    def batches(iterable: Iterable, size: int) -> Iterator[list]:
+        """Split an iterable in lists.
+
+        Args:
+            iterable (Iterable): Items.
+            size (int): Items by list.
+
+        Yields:
+            list: Up to `size` items.
+        """
+        iterator = iter(iterable)
+        while True:
+            batch = list(islice(iterator, size))
+            if not batch:
+                return
+            yield batch
+
+    @classmethod
+    def insert(
+        cls,
+        collection: Any,
+        documents: Iterable[dict],
+        progress: SeedProgress,
+        batch_size: Optional[int] = None,
+    ) -> int:
+        """Insert documents by batches.
+
+        Args:
+            collection (pymongo.collection.Collection): Collection.
+            documents (Iterable[dict]): Documents.
+            progress (SeedProgress): Progress, reported every interval.
+            batch_size (int, optional): Documents by batch. Default
+                BATCH_SIZE.
+
+        Raises:
+            ErrorSeedingData: A batch wasn't inserted.
+
+        Returns:
+            int: Documents inserted.
+        """
+        batch_size = batch_size or cls.BATCH_SIZE
+
+        def insert_many(batch: list) -> int:
+            collection.insert_many(batch, ordered=False)
+            return len(batch)
+
+        pending = None
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            try:
+                for batch in cls.batches(documents, batch_size):
+                    if pending is not None:
+                        progress.add(pending.result())
+                    pending = executor.submit(insert_many, batch)
+                    if progress.should_report():
+                        typer.echo(progress.render())
+                if pending is not None:
+                    progress.add(pending.result())
+            except Exception as e:
+                raise ErrorSeedingData(errors=str(e))
+        typer.echo(progress.render(done=True))
+        return progress.inserted
@@ -1,13 +1,58 @@
-from typing import Tuple
-from cerberus import Validator
+import os
+import yaml
+import threading
+from typing import Dict, Iterator, Optional, TYPE_CHECKING
+from concurrent.futures import ProcessPoolExecutor
 from .utils import load_yaml
+from .utils import parse_yaml
+from .utils import read_bytes
+from .utils import iter_yaml_keys
+from .utils import iter_yaml_list
+from .utils import iter_yaml_list_field
+from .cache import ManifestCache
+from .routes import RouteTrie
+from .timings import timed
 from .exceptions import ErrorReadingFile
 from .exceptions import ErrorValidatingSchema
 
+if TYPE_CHECKING:  # pragma: no cover
+    from cerberus import Validator
+
 
 class SerializerBase:
     """Serialize Base"""
 
+    VALIDATORS_CACHE_SIZE = 32
+    # Validators keep the state of the document being validated, so every
+    # thread has its own.
+    _local = threading.local()
+
+    @classmethod
+    def _get_validator(cls, schema: dict) -> "Validator":
+        """Get a validator compiled once per schema.
+
+        Building a validator normalizes the schema, so it's reused for
+        every document validated against the same schema object, by thread.
+
+        Args:
+            schema (dict): Cerberus schema.
+
+        Returns:
+            Validator: Validator.
+        """
+        from cerberus import Validator
+
+        validators = getattr(cls._local, "validators", None)
+        if validators is None:
+            validators = cls._local.validators = {}
+        cached = validators.get(id(schema))
+        if cached is None or cached[0] is not schema:
+            if len(validators) >= cls.VALIDATORS_CACHE_SIZE:
+                validators.clear()
+            cached = (schema, Validator(schema, purge_unknown=False))
+            validators[id(schema)] = cached
+        return cached[1]
+
     @classmethod
     def _validate(cls, schema: dict, data: dict) -> dict:
         """Validate schema & data.
@@ -19,7 +64,9 @@ class SerializerBase:
         Returns:
             dict: Errors.
         """
-        v = Validator(schema, purge_unknown=False)
+        if not isinstance(data, dict):
+            return {"": ["must be of dict type"]}
+        v = cls._get_validator(schema)
         v.validate(data)
         return v.errors
 
@@ -35,6 +82,7 @@ class FileSerializer(SerializerBase):
         ErrorValidatingSchema: Error validating schema.
     """
 
+    PARALLEL_THRESHOLD = 5000
     FILE_SCHEMA = {
         "path": {
             "type": "string",
@@ -58,7 +106,7 @@ class FileSerializer(SerializerBase):
     }
 
     @classmethod
-    def read_file(cls, file_path: str) -> Tuple[str, dict]:
+    def read_file(cls, file_path: str) -> Dict[str, list]:
         """Read apiruns compose file.
 
         Args:
@@ -66,29 +114,265 @@ class FileSerializer(SerializerBase):
 
         Raises:
             ErrorReadingFile: Error reading file.
+            ErrorValidatingSchema: Services without a list of endpoints.
 
         Returns:
-            Tuple[str, dict]: _description_
+            Dict[str, list]: Endpoints by API name.
         """
         data = load_yaml(file_path)
-        if not data.keys():
+        return cls._get_services(data)
+
+    @classmethod
+    def _get_services(cls, data: dict) -> Dict[str, list]:
+        """Get the services of a manifest, every top-level key is an API.
+
+        Args:
+            data (dict): Manifest.
+
+        Raises:
+            ErrorReadingFile: Manifest without services.
+            ErrorValidatingSchema: Services without a list of endpoints,
+                errors by API name.
+
+        Returns:
+            Dict[str, list]: Endpoints by API name, in manifest order.
+        """
+        if not isinstance(data, dict) or not data.keys():
             raise ErrorReadingFile
+        services = {str(name): endpoints for name, endpoints in data.items()}
+        errors = {
+            name: ["must be of list type"]
+            for name, endpoints in services.items()
+            if not isinstance(endpoints, list)
+        }
+        if errors:
+            raise ErrorValidatingSchema(errors=errors)
+        return services
+
+    @classmethod
+    def parse(cls, content: bytes) -> Dict[str, list]:
+        """Parse apiruns compose content, without validating it.
+
+        Args:
+            content (bytes): Manifest content.
+
+        Raises:
+            ErrorReadingFile: Invalid yaml or manifest without services.
+            ErrorValidatingSchema: Services without a list of endpoints.
+
+        Returns:
+            Dict[str, list]: Endpoints by API name.
+        """
+        try:
+            data = parse_yaml(content)
+        except yaml.YAMLError as e:
+            raise ErrorReadingFile(errors=str(e))
+        return cls._get_services(data)
+
+    @classmethod
+    def service_names(cls, file_path: str) -> list:
+        """Read the API names of a manifest, skipping their endpoints.
+
+        Args:
+            file_path (str): Relative path.
+
+        Raises:
+            ErrorReadingFile: Invalid yaml or manifest without services.
+
+        Returns:
+            list: API names, in manifest order.
+        """
+        try:
+            names = [str(name) for name in iter_yaml_keys(file_path)]
+        except (yaml.YAMLError, ValueError) as e:
+            raise ErrorReadingFile(errors=str(e))
+        if not names:
+            raise ErrorReadingFile
+        return names
+
+    @classmethod
+    def stream_routes(cls, file_path: str, names: list) -> Dict[str, RouteTrie]:
+        """Find duplicated or shadowed paths, reading only the paths.
+
+        Every endpoint but its path is skipped, so memory only grows with
+        the paths. Run it before `stream`, which doesn't check them.
+
+        Args:
+            file_path (str): Relative path.
+            names (list): API names.
+
+        Raises:
+            ErrorReadingFile: Invalid yaml or endpoints that aren't a list.
+            ErrorValidatingSchema: Paths in conflict, errors by API name.
 
-        data_schema = list(data.keys())
-        api_name = data_schema[0]
-        return api_name, data.get(api_name)
+        Returns:
+            Dict[str, RouteTrie]: Routes by API name.
+        """
+        routes, errors = {}, {}
+        for name in names:
+            try:
+                paths = iter_yaml_list_field(file_path, name, "path")
+                routes[name], conflicts = RouteTrie.build({"path": p} for p in paths)
+            except (yaml.YAMLError, ValueError) as e:
+                raise ErrorReadingFile(errors=str(e))
+            if conflicts:
+                errors[name] = conflicts
+        if errors:
+            raise ErrorValidatingSchema(errors=errors)
+        return routes
 
     @classmethod
-    def validate(cls, data: list) -> None:
-        """Validate data to save.
+    def stream(cls, file_path: str, name: str, errors: dict) -> Iterator[dict]:
+        """Lazily read & validate the endpoints of an API.
+
+        Endpoints are parsed one at a time, so memory stays flat. Invalid
+        endpoints are skipped, paths in conflict are found by
+        `stream_routes`.
+
+        Args:
+            file_path (str): Relative path.
+            name (str): API name.
+            errors (dict): Errors by API name, filled with the invalid
+                endpoints errors by position.
+
+        Raises:
+            ErrorReadingFile: Invalid yaml or endpoints that aren't a list.
+
+        Yields:
+            dict: Valid endpoint.
+        """
+        try:
+            for i, endpoint in enumerate(iter_yaml_list(file_path, name)):
+                invalid = cls._validate_chunk(i, [endpoint])
+                if invalid:
+                    errors.setdefault(name, {}).update(invalid)
+                    continue
+                yield endpoint
+        except (yaml.YAMLError, ValueError) as e:
+            raise ErrorReadingFile(errors=str(e))
+
+    @classmethod
+    @timed("manifest.load", arg="file_path")
+    def load(cls, file_path: str, cache: bool = True) -> Dict[str, list]:
+        """Read & validate apiruns compose file.
+
+        Args:
+            file_path (str): Relative path.
+            cache (bool, optional): Reuse the manifest parsed & validated
+                before if its content didn't change. Default True.
+
+        Raises:
+            ErrorReadingFile: Error reading file.
+            ErrorValidatingSchema: Error validating schema, errors by API name.
+
+        Returns:
+            Dict[str, list]: Endpoints by API name.
+        """
+        content = read_bytes(file_path)
+        if cache:
+            cached = ManifestCache.get(file_path, content)
+            if cached:
+                return cached
+
+        services = cls.parse(content)
+        errors = {}
+        for name, data_schema in services.items():
+            try:
+                cls.validate(data_schema)
+            except ErrorValidatingSchema as e:
+                errors[name] = e.errors
+        if errors:
+            raise ErrorValidatingSchema(errors=errors)
+        if cache:
+            ManifestCache.set(file_path, content, services)
+        return services
+
+    @classmethod
+    def _validate_chunk(cls, start: int, data: list) -> dict:
+        """Validate endpoints, collecting every error.
+
+        Args:
+            start (int): Position of the first endpoint.
+            data (list): Endpoints.
+
+        Returns:
+            dict: Errors by position.
+                example:
+                    {3: {'path': '/users', 'errors': {'schema': ['required field']}}}
+        """
+        errors = {}
+        for i, d in enumerate(data, start):
+            e = cls._validate(cls.FILE_SCHEMA, d)
+            if e:
+                path = d.get("path") if isinstance(d, dict) else None
+                errors[i] = {"path": path, "errors": e}
+        return errors
+
+    @classmethod
+    @timed("manifest.validate")
+    def validate(cls, data: list, workers: Optional[int] = None) -> None:
+        """Validate data to save, paths in conflict included.
+
+        Manifests from PARALLEL_THRESHOLD endpoints are split across a
+        process pool.
 
         Args:
             data (list): Data to save.
+            workers (int, optional): Processes, 1 disables the pool.
+                Default CPU count.
+
+        Raises:
+            ErrorValidatingSchema: Data isn't valid, errors by position.
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(data) < cls.PARALLEL_THRESHOLD:
+            errors = cls._validate_chunk(0, data)
+        else:
+            size = -(-len(data) // workers)
+            starts = list(range(0, len(data), size))
+            stops = [i + size for i in starts]
+            chunks = [data[i:j] for i, j in zip(starts, stops)]
+            errors = {}
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for e in executor.map(cls._validate_chunk, starts, chunks):
+                    errors.update(e)
+
+        _, conflicts = RouteTrie.build(data)
+        errors = {**conflicts, **errors}
+        if errors:
+            raise ErrorValidatingSchema(errors=errors)
+
+    @classmethod
+    def validate_endpoints(cls, endpoints: Dict[int, dict]) -> None:
+        """Validate some endpoints of a manifest, without the paths checks.
+
+        Args:
+            endpoints (Dict[int, dict]): Endpoint by position in the manifest.
+
+        Raises:
+            ErrorValidatingSchema: Endpoints aren't valid, errors by position
+                in the manifest.
+        """
+        errors = {}
+        for i, endpoint in endpoints.items():
+            errors.update(cls._validate_chunk(i, [endpoint]))
+        if errors:
+            raise ErrorValidatingSchema(errors=errors)
+
+    @classmethod
+    def check_routes(cls, data: list) -> RouteTrie:
+        """Find duplicated or shadowed paths.
+
+        Args:
+            data (list): Endpoints.
 
         Raises:
-            ErrorValidatingSchema: Data isn't valid.
+            ErrorValidatingSchema: Paths in conflict, errors by position.
+
+        Returns:
+            RouteTrie: Routes of the endpoints.
         """
-        for d in data:
-            errors = cls._validate(cls.FILE_SCHEMA, d)
-            if errors:
-                raise ErrorValidatingSchema(errors=errors)
+        routes, conflicts = RouteTrie.build(data)
+        if conflicts:
+            raise ErrorValidatingSchema(errors=conflicts)
+        return routes
@@ -1,47 +1,693 @@
 from .serializers import FileSerializer
+from .bench import LoadGenerator
+from .bench import render_report
+from .seed import Seeder
+from .seed import SeedProgress
 from .clients import DockerClient
 from .clients import APIClient
+from .clients import ServiceImages
+from .artifact import Artifact
+from .cache import ModelsState
+from .cache import Snapshots
+from .utils import fingerprint
+from .timings import span
+from .timings import timed
+from .utils import read_bytes
+from .watch import FileWatcher
+from .exceptions import ErrorCreatingModels
+from .exceptions import ErrorReadingFile
+from .exceptions import ErrorValidatingSchema
+from .exceptions import ErrorSnapshotNotFound
+from .exceptions import ErrorServiceNotFound
+from concurrent.futures import ThreadPoolExecutor
+import os
+import json
+import time
+import asyncio
+import random
 import typer
+from dataclasses import replace
+from typing import Iterable, Iterator, Tuple
+
+# A bad save is reported, the next one is reloaded.
+RELOAD_ERRORS = (
+    ErrorReadingFile,
+    ErrorValidatingSchema,
+    ErrorCreatingModels,
+)
 
 
 class Apiruns:
     @classmethod
-    def build(cls, file_path: str, version: str = "0.0.1"):
+    @timed("apiruns.build")
+    def build(
+        cls,
+        file_path: str,
+        version: str = None,
+        api_image: str = None,
+        db_image: str = None,
+        cache: bool = True,
+        parallel: int = None,
+        replicas: int = 1,
+        balance: str = "round-robin",
+        output: str = None,
+    ):
         """Command to build the services.
 
         Args:
             file_path (str): Relative file path.
-            version (str, optional): Deployment version. Default 0.0.1.
+            version (str, optional): API image tag. Default latest.
+            api_image (str, optional): API image pinned by tag or digest.
+            db_image (str, optional): DB image pinned by tag or digest.
+            cache (bool, optional): Use the parsed manifest cache.
+            parallel (int, optional): Services built at a time.
+            replicas (int, optional): API containers by service, 0 is one
+                by CPU.
+            balance (str, optional): Balance method of the replicas.
+            output (str, optional): Write the compiled manifest there, for
+                `up --from-artifact`.
         """
-        api_name, data_schema = FileSerializer.read_file(file_path)
-        FileSerializer.validate(data_schema)
-        typer.echo("Building API")
-        DockerClient.compose_service(api_name, start=False)
+        services = FileSerializer.load(file_path, cache=cache)
+        images = ServiceImages.build(version, api_image, db_image)
+        typer.echo(f"Building {', '.join(services)}")
+        DockerClient.compose_services(
+            cls._offsets(services),
+            start=False,
+            images=images,
+            parallel=parallel,
+            replicas=cls._replicas(replicas),
+            balance=balance,
+        )
         typer.echo("Services made.")
+        if output:
+            digest = Artifact.write(output, services, Artifact.resolve_images(images))
+            typer.echo(f"Artifact written to {output} (sha256:{digest[:12]})")
 
     @classmethod
-    def up(cls, file_path: str, version: str = "0.0.1"):
+    @timed("apiruns.up")
+    def up(
+        cls,
+        file_path: str,
+        version: str = None,
+        timeout: float = None,
+        api_image: str = None,
+        db_image: str = None,
+        cache: bool = True,
+        reconcile: bool = False,
+        parallel: int = None,
+        replicas: int = 1,
+        balance: str = "round-robin",
+        artifact: str = None,
+        stream: bool = False,
+    ):
         """Command to build & start the services.
 
         Args:
             file_path (str): Relative file path.
-            version (str, optional): Deployment version. Default 0.0.1.
+            version (str, optional): API image tag. Default latest.
+            timeout (float, optional): Seconds to wait by each container.
+            api_image (str, optional): API image pinned by tag or digest.
+            db_image (str, optional): DB image pinned by tag or digest.
+            cache (bool, optional): Use the parsed manifest cache.
+            reconcile (bool, optional): Keep running containers and only
+                create new or changed models.
+            parallel (int, optional): Services started at a time.
+            replicas (int, optional): API containers by service behind a
+                load balancer, 0 is one by CPU.
+            balance (str, optional): Balance method of the replicas.
+            artifact (str, optional): Start the services of a `build`
+                artifact rather than the file, with its images unless
+                others are given.
+            stream (bool, optional): Parse, validate & create the endpoints
+                one at a time, memory stays flat whatever the manifest size.
+                The manifest cache isn't used.
+
+        Raises:
+            ErrorCreatingModels: Some models weren't created, errors by
+                API name.
+            ErrorValidatingSchema: Streamed endpoints skipped as invalid or,
+                before any container is made, paths in conflict, errors by
+                API name.
         """
-        api_name, data_schema = FileSerializer.read_file(file_path)
-        FileSerializer.validate(data_schema)
-        typer.echo("Building API")
-        DockerClient.compose_service(api_name, start=True)
+        invalid = {}
+        services, images = cls._load(
+            file_path, cache, artifact, version, api_image, db_image, stream, invalid
+        )
+        offsets = cls._offsets(services)
+        containers = DockerClient.running_services(list(services)) if reconcile else {}
+        registered = {
+            name: ModelsState.get(name, containers.get(name, [])) for name in services
+        }
+        pending = {n: offsets[n] for n in services if registered[n] is None}
+        if len(pending) < len(services):
+            running = [n for n in services if n not in pending]
+            typer.echo(f"Services already running: {', '.join(running)}")
+        if pending:
+            typer.echo(f"Building {', '.join(pending)}")
+            containers.update(
+                DockerClient.compose_services(
+                    pending,
+                    start=True,
+                    timeout=timeout,
+                    images=images,
+                    parallel=parallel,
+                    replicas=cls._replicas(replicas),
+                    balance=balance,
+                )
+            )
+            # Reused containers keep the models they were given.
+            for name in pending:
+                registered[name] = ModelsState.get(name, sorted(containers[name]))
+
         typer.echo("Starting services")
-        APIClient.ping()
-        APIClient.create_models(data_schema)
-        typer.echo("API listen on 8000")
+
+        def start(name: str):
+            port = DockerClient.api_port(offsets[name])
+            host = APIClient.build_host(port)
+            with span("apiruns.start", service=name):
+                elapsed = APIClient.ping(deadline=timeout, host=host)
+                typer.echo(f"`{name}` ready in {elapsed:.2f}s")
+                cls._create_models(
+                    name, containers[name], services[name], registered[name] or {}, host
+                )
+            typer.echo(f"`{name}` listen on {port}")
+
+        failed = {}
+        with ThreadPoolExecutor(max_workers=parallel or len(services)) as executor:
+            futures = {name: executor.submit(start, name) for name in services}
+            for name, future in futures.items():
+                try:
+                    future.result()
+                except ErrorCreatingModels as e:
+                    failed[name] = e.errors
+        if failed:
+            raise ErrorCreatingModels(errors=failed)
+        if invalid:
+            raise ErrorValidatingSchema(errors=invalid)
+
+    @staticmethod
+    def _load(
+        file_path: str,
+        cache: bool,
+        artifact: str = None,
+        version: str = None,
+        api_image: str = None,
+        db_image: str = None,
+        stream: bool = False,
+        invalid: dict = None,
+    ) -> Tuple[dict, ServiceImages]:
+        """Services & images from the file or a `build` artifact.
+
+        Args:
+            file_path (str): Relative file path.
+            cache (bool): Use the parsed manifest cache.
+            artifact (str, optional): Artifact path, skips parsing & validating
+                the file.
+            version (str, optional): API image tag.
+            api_image (str, optional): API image, overrides the artifact one.
+            db_image (str, optional): DB image, overrides the artifact one.
+            stream (bool, optional): Endpoints are lazy iterators reading the
+                file, one pass by API, once a pass by API checked the paths.
+            invalid (dict, optional): Filled with the errors by API name of
+                the streamed endpoints skipped.
+
+        Raises:
+            ErrorValidatingSchema: Streamed paths in conflict, errors by API
+                name.
+
+        Returns:
+            Tuple[dict, ServiceImages]: Endpoints by API name & images.
+        """
+        if artifact:
+            services, images = Artifact.load(artifact)
+        elif stream:
+            names = FileSerializer.service_names(file_path)
+            # Paths in conflict stop `up` before any container is made.
+            FileSerializer.stream_routes(file_path, names)
+            services = {
+                name: FileSerializer.stream(file_path, name, invalid) for name in names
+            }
+            images = None
+        else:
+            services, images = FileSerializer.load(file_path, cache=cache), None
+        given = ServiceImages.build(version, api_image, db_image)
+        if images is None:
+            return services, given
+        # Only the images given replace the ones pinned by the artifact.
+        overrides = {}
+        if version or api_image:
+            overrides["api"] = given.api
+        if db_image:
+            overrides["db"] = given.db
+        return services, replace(images, **overrides)
+
+    @staticmethod
+    def _replicas(replicas: int) -> int:
+        """API containers by service, 0 is one by CPU.
+
+        Args:
+            replicas (int): Replicas option.
+
+        Returns:
+            int: Replicas.
+        """
+        return replicas or os.cpu_count() or 1
+
+    @staticmethod
+    def _offsets(services: dict) -> dict:
+        """Position by API name, the host ports are offset by it.
+
+        Args:
+            services (dict): Endpoints by API name.
+
+        Returns:
+            dict: Position by API name.
+        """
+        return {name: offset for offset, name in enumerate(services)}
+
+    @staticmethod
+    def _names(services: dict, service: str = None) -> list:
+        """API names a command works on.
+
+        Args:
+            services (dict): Endpoints by API name.
+            service (str, optional): Only this service. Default all.
+
+        Raises:
+            ErrorServiceNotFound: The service isn't in the manifest.
+
+        Returns:
+            list: API names.
+        """
+        if not service:
+            return list(services)
+        if service not in services:
+            names = ", ".join(services)
+            raise ErrorServiceNotFound(errors=f"`{service}`, services: {names}")
+        return [service]
+
+    @staticmethod
+    def _changed_models(
+        data: Iterable[dict], registered: dict, models: dict
+    ) -> Iterator[dict]:
+        """Lazily filter the endpoints new or changed since they were registered.
+
+        Args:
+            data (Iterable[dict]): Endpoints.
+            registered (dict): Fingerprint by path of the models created.
+            models (dict): Filled with the fingerprint by path of every
+                endpoint read.
+
+        Yields:
+            dict: Endpoint.
+        """
+        for m in data:
+            models[m["path"]] = fingerprint(m)
+            if registered.get(m["path"]) != models[m["path"]]:
+                yield m
+
+    @classmethod
+    def _create_models(
+        cls,
+        api_name: str,
+        containers: list,
+        data: Iterable[dict],
+        registered: dict,
+        host: str = None,
+    ) -> None:
+        """Create new or changed models, saving their fingerprints.
+
+        Args:
+            api_name (str): API name.
+            containers (list): Container IDs of the service.
+            data (Iterable[dict]): Endpoints, a list or a lazy iterator.
+            registered (dict): Fingerprint by path of the models created.
+            host (str, optional): API host.
+
+        Raises:
+            ErrorCreatingModels: Some models weren't created.
+        """
+        models = {}
+        changed = cls._changed_models(data, registered, models)
+        failed = {}
+        try:
+            APIClient.create_models(changed, host=host)
+        except ErrorCreatingModels as e:
+            failed = e.errors
+            raise
+        finally:
+            state = {
+                path: registered.get(path) if path in failed else h
+                for path, h in models.items()
+            }
+            state = {path: h for path, h in state.items() if h}
+            ModelsState.set(api_name, containers, state)
+
+    @classmethod
+    def dev(
+        cls,
+        file_path: str,
+        watch: bool = False,
+        polling: bool = False,
+        version: str = None,
+        timeout: float = None,
+        api_image: str = None,
+        db_image: str = None,
+    ) -> None:
+        """Command to start the services, then hot reload their models.
+
+        Running containers are kept, like `up --reconcile`. While watching,
+        every save of the manifest pushes the new or changed endpoints to
+        the running APIs, without restarting any container.
+
+        Args:
+            file_path (str): Relative file path.
+            watch (bool, optional): Watch the manifest until interrupted.
+            polling (bool, optional): Watch by polling rather than inotify.
+            version (str, optional): API image tag. Default latest.
+            timeout (float, optional): Seconds to wait by each container.
+            api_image (str, optional): API image pinned by tag or digest.
+            db_image (str, optional): DB image pinned by tag or digest.
+        """
+        cls.up(
+            file_path,
+            version=version,
+            timeout=timeout,
+            api_image=api_image,
+            db_image=db_image,
+            reconcile=True,
+        )
+        if not watch:
+            return
+        with FileWatcher.create(file_path, polling=polling) as watcher:
+            typer.echo(f"Watching {file_path} with {watcher.KIND}, Ctrl+C to stop.")
+            try:
+                cls._watch(file_path, watcher)
+            except KeyboardInterrupt:
+                typer.echo("Stopped watching.")
 
     @classmethod
-    def down(cls, file_path: str):
-        """Down service.
+    def _watch(cls, file_path: str, watcher: FileWatcher) -> None:
+        """Reload the models on every change of the manifest.
 
         Args:
             file_path (str): Relative file path.
+            watcher (FileWatcher): Manifest watcher.
+        """
+        content = read_bytes(file_path)
+        services = FileSerializer.parse(content)
+        offsets = cls._offsets(services)
+        containers = DockerClient.running_services(list(services))
+        while True:
+            watcher.wait()
+            try:
+                changed = read_bytes(file_path)
+            except OSError:
+                # Replaced by the editor, the next event has the new file.
+                continue
+            if changed == content:
+                continue
+            content = changed
+            try:
+                cls._reload(content, offsets, containers)
+            except RELOAD_ERRORS as e:
+                typer.echo(f"{e.message} {e.errors}")
+
+    @classmethod
+    def _validate_changes(cls, services: dict, containers: dict) -> dict:
+        """Validate only the endpoints changed since they were registered.
+
+        Args:
+            services (dict): Endpoints by API name.
+            containers (dict): Container IDs by API name.
+
+        Raises:
+            ErrorValidatingSchema: Changed endpoints aren't valid, errors by
+                API name.
+
+        Returns:
+            dict: Endpoints & registered models by API name, of the services
+                with changes.
+        """
+        changes, errors = {}, {}
+        for name, data in services.items():
+            registered = ModelsState.get(name, containers[name]) or {}
+            changed = {}
+            for i, m in enumerate(data):
+                path = m.get("path") if isinstance(m, dict) else None
+                if registered.get(path) != fingerprint(m):
+                    changed[i] = m
+            try:
+                FileSerializer.validate_endpoints(changed)
+                FileSerializer.check_routes(data)
+            except ErrorValidatingSchema as e:
+                errors[name] = e.errors
+                continue
+            if changed:
+                changes[name] = (data, registered)
+        if errors:
+            raise ErrorValidatingSchema(errors=errors)
+        return changes
+
+    @classmethod
+    @timed("apiruns.reload")
+    def _reload(cls, content: bytes, offsets: dict, containers: dict) -> None:
+        """Validate & create the new or changed models of the running services.
+
+        Args:
+            content (bytes): Manifest content.
+            offsets (dict): Position by API name of the running services.
+            containers (dict): Container IDs by API name.
+
+        Raises:
+            ErrorReadingFile: Invalid manifest.
+            ErrorValidatingSchema: Changed endpoints aren't valid, errors by
+                API name.
+            ErrorCreatingModels: Some models weren't created, errors by
+                API name.
+        """
+        started = time.perf_counter()
+        services = FileSerializer.parse(content)
+        added = [name for name in services if name not in offsets]
+        if added:
+            typer.echo(f"New services need `apiruns up`: {', '.join(added)}")
+        changes = cls._validate_changes(
+            {n: d for n, d in services.items() if n in offsets}, containers
+        )
+        failed = {}
+        for name, (data, registered) in changes.items():
+            host = APIClient.build_host(DockerClient.api_port(offsets[name]))
+            try:
+                cls._create_models(name, containers[name], data, registered, host)
+            except ErrorCreatingModels as e:
+                failed[name] = e.errors
+        if failed:
+            raise ErrorCreatingModels(errors=failed)
+        elapsed = (time.perf_counter() - started) * 1000
+        updated = ", ".join(f"`{n}`" for n in changes) or "no models changed"
+        typer.echo(f"Reloaded {updated} in {elapsed:.0f} ms")
+
+    @classmethod
+    @timed("apiruns.bench")
+    def bench(
+        cls,
+        file_path: str,
+        service: str = None,
+        concurrency: int = 16,
+        rate: float = 0.0,
+        duration: float = 10.0,
+        output: str = None,
+        seed: int = None,
+    ) -> dict:
+        """Command to load test the running services.
+
+        Args:
+            file_path (str): Relative file path.
+            service (str, optional): Only load this service. Default all
+                services of the manifest, one after the other. Services
+                without endpoints are skipped.
+            concurrency (int, optional): Requests in flight.
+            rate (float, optional): Target requests per second, 0 is as
+                fast as possible.
+            duration (float, optional): Seconds by service.
+            output (str, optional): JSON report path.
+            seed (int, optional): Payloads random seed.
+
+        Raises:
+            ErrorServiceNotFound: The service isn't in the manifest.
+
+        Returns:
+            dict: Report by API name.
+        """
+        services = FileSerializer.load(file_path)
+        offsets = cls._offsets(services)
+        names = cls._names(services, service)
+        reports = {}
+        for name in names:
+            if not services[name]:
+                typer.echo(f"Skipping `{name}`, it has no endpoints.")
+                continue
+            host = APIClient.build_host(DockerClient.api_port(offsets[name]))
+            typer.echo(f"Loading `{name}` on {host} for {duration}s")
+            generator = LoadGenerator(
+                host, services[name], concurrency, rate, duration, seed
+            )
+            reports[name] = asyncio.run(generator.run())
+            typer.echo(render_report(name, reports[name]))
+        if output:
+            with open(output, "w") as f:
+                json.dump(reports, f, indent=2)
+        return reports
+
+    @classmethod
+    @timed("apiruns.seed")
+    def seed(
+        cls,
+        file_path: str,
+        count: int,
+        service: str = None,
+        batch_size: int = None,
+        seed: int = None,
+    ) -> dict:
+        """Command to insert synthetic documents in the services DB.
+
+        Args:
+            file_path (str): Relative file path.
+            count (int): Documents by endpoint.
+            service (str, optional): Only seed this service. Default all
+                services of the manifest.
+            batch_size (int, optional): Documents by insert.
+            seed (int, optional): Documents random seed.
+
+        Raises:
+            ErrorServiceNotFound: The service isn't in the manifest.
+
+        Returns:
+            dict: Documents inserted by collection, by API name.
+        """
+        services = FileSerializer.load(file_path)
+        offsets = cls._offsets(services)
+        names = cls._names(services, service)
+        rng = random.Random(seed)
+        inserted = {}
+        for name in names:
+            db = Seeder.connect(DockerClient.db_port(offsets[name]))
+            inserted[name] = {}
+            for endpoint in services[name]:
+                collection = Seeder.collection_name(endpoint)
+                documents = Seeder.documents(endpoint["schema"], count, rng)
+                progress = SeedProgress(f"{name}.{collection}", count)
+                inserted[name][collection] = Seeder.insert(
+                    db[collection], documents, progress, batch_size
+                )
+        return inserted
+
+    @classmethod
+    @timed("apiruns.snapshot")
+    def snapshot(
+        cls,
+        name: str,
+        file_path: str,
+        service: str = None,
+        timeout: float = None,
+    ) -> dict:
+        """Save the DB data of the services.
+
+        Args:
+            name (str): Snapshot name.
+            file_path (str): Relative file path.
+            service (str, optional): Only save this service. Default all
+                services of the manifest.
+            timeout (float, optional): Seconds to wait for the DB restarts.
+
+        Raises:
+            ErrorServiceNotFound: The service isn't in the manifest.
+
+        Returns:
+            dict: Bytes of the data by API name.
+        """
+        services = FileSerializer.read_file(file_path)
+        names = cls._names(services, service)
+        destinations = {n: Snapshots.path(name, n) for n in names}
+        started = time.monotonic()
+        sizes = DockerClient.snapshot_services(destinations, timeout)
+        mb = 1024 * 1024
+        for n, size in sizes.items():
+            compressed = destinations[n].stat().st_size
+            typer.echo(
+                f"`{n}`: {size / mb:.1f} MB, {compressed / mb:.1f} MB compressed"
+            )
+        elapsed = time.monotonic() - started
+        typer.echo(f"Snapshot `{name}` saved in {elapsed:.1f}s")
+        return sizes
+
+    @classmethod
+    @timed("apiruns.restore")
+    def restore(
+        cls,
+        name: str,
+        file_path: str,
+        service: str = None,
+        db_image: str = None,
+        timeout: float = None,
+    ) -> None:
+        """Replace the DB data of the services with a snapshot.
+
+        Args:
+            name (str): Snapshot name.
+            file_path (str): Relative file path.
+            service (str, optional): Only restore this service. Default all
+                services of the manifest.
+            db_image (str, optional): DB image pinned by tag or digest.
+            timeout (float, optional): Seconds to wait for the DBs.
+
+        Raises:
+            ErrorServiceNotFound: The service isn't in the manifest.
+            ErrorSnapshotNotFound: A service wasn't saved in the snapshot.
+        """
+        services = FileSerializer.read_file(file_path)
+        names = cls._names(services, service)
+        sources = {n: Snapshots.path(name, n) for n in names}
+        missing = [str(path) for path in sources.values() if not path.exists()]
+        if missing:
+            raise ErrorSnapshotNotFound(errors=missing)
+        started = time.monotonic()
+        DockerClient.restore_services(
+            cls._offsets(services),
+            sources,
+            images=ServiceImages.build(db=db_image),
+            timeout=timeout,
+        )
+        elapsed = time.monotonic() - started
+        typer.echo(f"Snapshot `{name}` restored in {elapsed:.1f}s")
+
+    @classmethod
+    @timed("apiruns.down")
+    def down(
+        cls,
+        file_path: str,
+        service: str = None,
+        prune: bool = False,
+        all_stacks: bool = False,
+    ):
+        """Down services.
+
+        Args:
+            file_path (str): Relative file path.
+            service (str, optional): Only down this service. Default all
+                services of the manifest.
+            prune (bool, optional): Also prune the services volumes & the
+                network if unused.
+            all_stacks (bool, optional): Down every apiruns service, whatever
+                the manifest.
+
+        Raises:
+            ErrorServiceNotFound: The service isn't in the manifest.
         """
-        api_name, _ = FileSerializer.read_file(file_path)
-        DockerClient.service_down(api_name)
+        if all_stacks:
+            if not DockerClient.services_down(None, prune=prune):
+                typer.echo("No apiruns services found.")
+            return
+        services = FileSerializer.read_file(file_path)
+        names = cls._names(services, service)
+        DockerClient.services_down(names, prune=prune)
@@ -0,0 +1,208 @@
+import os
+import re
+import bisect
+import threading
+import typer
+from pathlib import Path
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Resource names & ids are replaced, so every container, image, network or
+# volume shares a series.
+PATH_TEMPLATES = [
+    (re.compile(r"^/v[0-9.]+(?=/)"), ""),
+    (re.compile(r"^/containers/(?!create$|json$)[^/]+"), "/containers/{id}"),
+    (re.compile(r"^/images/(?!create$|json$).+?(?=/json$|$)"), "/images/{name}"),
+    (re.compile(r"^/networks/(?!create$|prune$)[^/]+"), "/networks/{name}"),
+    (re.compile(r"^/volumes/(?!create$|prune$)[^/]+"), "/volumes/{name}"),
+]
+
+
+@dataclass
+class Histogram:
+    """Latencies of a request series, Prometheus cumulative buckets."""
+
+    bounds: tuple
+    counts: list = field(default_factory=list)
+    count: int = 0
+    sum: float = 0.0
+    max: float = 0.0
+
+    def __post_init__(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+
+    def observe(self, value: float) -> None:
+        """Add a latency.
+
+        Args:
+            value (float): Seconds.
+        """
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def cumulative(self) -> list:
+        """Requests by upper bound.
+
+        Returns:
+            list: example: [('0.005', 3), ('0.01', 5), ('+Inf', 5)]
+        """
+        buckets = []
+        total = 0
+        for bound, count in zip(self.bounds + (None,), self.counts):
+            total += count
+            buckets.append(("+Inf" if bound is None else repr(bound), total))
+        return buckets
+
+
+class RequestStats:
+    """Docker Engine & API requests of a command.
+
+    Requests are recorded by client, method, path template & status, so
+    redundant calls of a command show up as a high count on one series.
+    Disabled by default, recording is then a flag check.
+    """
+
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+    METRIC = "apiruns_http_request_duration_seconds"
+
+    enabled = False
+    series: dict = {}
+    lock = threading.Lock()
+
+    @classmethod
+    def enable(cls) -> None:
+        """Start recording requests, dropping the previous ones."""
+        cls.series = {}
+        cls.enabled = True
+
+    @classmethod
+    def disable(cls) -> None:
+        cls.enabled = False
+
+    @staticmethod
+    def template(path: str) -> str:
+        """Path template of a request.
+
+        Args:
+            path (str): Request path, without query.
+
+        Returns:
+            str: example: `/containers/4cb8b69e/start` is `/containers/{id}/start`.
+        """
+        for pattern, replacement in PATH_TEMPLATES:
+            path = pattern.sub(replacement, path)
+        return path
+
+    @classmethod
+    def record(
+        cls, client: str, method: str, path: str, status: str, latency: float
+    ) -> None:
+        """Record a request.
+
+        Args:
+            client (str): `docker` or `api`.
+            method (str): HTTP method.
+            path (str): Request path, without query.
+            status (str): Status code, `error` if no response.
+            latency (float): Seconds until the response headers.
+        """
+        key = (client, method, cls.template(path), status)
+        with cls.lock:
+            if key not in cls.series:
+                cls.series[key] = Histogram(cls.BUCKETS)
+            cls.series[key].observe(latency)
+
+    @classmethod
+    def render(cls) -> str:
+        """Requests to text, most called first.
+
+        Returns:
+            str: Table.
+        """
+        if not cls.series:
+            return "No requests recorded."
+        header = f"{'client':<7} {'request':<40} {'status':>6} {'count':>6} "
+        header += f"{'total ms':>9} {'mean ms':>8} {'max ms':>8}"
+        lines = [header]
+        series = sorted(cls.series.items(), key=lambda s: (-s[1].count, s[0]))
+        for (client, method, path, status), h in series:
+            lines.append(
+                f"{client:<7} {method + ' ' + path:<40} {status:>6} {h.count:>6} "
+                f"{h.sum * 1000:>9.1f} {h.sum / h.count * 1000:>8.2f} "
+                f"{h.max * 1000:>8.2f}"
+            )
+        total = sum(h.count for h in cls.series.values())
+        lines.append(f"{total} requests")
+        return "\n".join(lines)
+
+    @classmethod
+    def to_prometheus(cls, command: str = "") -> str:
+        """Requests in Prometheus text format.
+
+        Args:
+            command (str, optional): `command` label, example `up`.
+
+        Returns:
+            str: Histogram by series, for the node exporter textfile collector.
+        """
+        lines = [
+            f"# HELP {cls.METRIC} Docker Engine & API requests of apiruns commands.",
+            f"# TYPE {cls.METRIC} histogram",
+        ]
+        for (client, method, path, status), h in sorted(cls.series.items()):
+            labels = (
+                f'command="{command}",client="{client}",method="{method}",'
+                f'path="{path}",status="{status}"'
+            )
+            for bound, count in h.cumulative():
+                lines.append(f'{cls.METRIC}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{cls.METRIC}_sum{{{labels}}} {h.sum:.6f}")
+            lines.append(f"{cls.METRIC}_count{{{labels}}} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def export(cls, path: str, command: str = "") -> None:
+        """Write the requests in Prometheus text format atomically.
+
+        The node exporter may read the file at any time, so it's written
+        aside and renamed.
+
+        Args:
+            path (str): File path, `*.prom` for the textfile collector.
+            command (str, optional): `command` label.
+        """
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            tmp.write_text(cls.to_prometheus(command))
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+
+@contextmanager
+def recording(stats: bool = False, stats_file: Optional[str] = None, command=""):
+    """Record the requests of a command when asked.
+
+    Args:
+        stats (bool, optional): Print the requests at the end.
+        stats_file (str, optional): Prometheus text file written at the end.
+        command (str, optional): Command name, a label of the metrics.
+    """
+    if not (stats or stats_file):
+        yield
+        return
+    RequestStats.enable()
+    try:
+        yield
+    finally:
+        RequestStats.disable()
+        if stats:
+            typer.echo(RequestStats.render())
+        if stats_file:
+            RequestStats.export(stats_file, command)
+            typer.echo(f"Stats written to {stats_file}")
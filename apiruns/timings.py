@@ -0,0 +1,244 @@
+import json
+import time
+import asyncio
+import inspect
+import threading
+import functools
+import typer
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+_depth: ContextVar = ContextVar("apiruns_span_depth", default=0)
+_disabled = nullcontext()
+
+
+class Tracer:
+    """Timing spans of a command.
+
+    Disabled by default, spans are a shared no-op context then. Spans of
+    concurrent asyncio tasks or threads get their own lane, so the trace
+    viewer doesn't nest them.
+    """
+
+    enabled = False
+    events: list = []
+    lanes: dict = {}
+    origin = 0.0
+    lock = threading.Lock()
+
+    @classmethod
+    def enable(cls) -> None:
+        """Start recording spans, dropping the previous ones."""
+        cls.events = []
+        cls.lanes = {}
+        cls.origin = time.perf_counter()
+        cls.enabled = True
+
+    @classmethod
+    def disable(cls) -> None:
+        cls.enabled = False
+
+    @classmethod
+    def _lane(cls) -> int:
+        try:
+            key = id(asyncio.current_task())
+        except RuntimeError:
+            key = threading.get_ident()
+        with cls.lock:
+            return cls.lanes.setdefault(key, len(cls.lanes) + 1)
+
+    @classmethod
+    def record(
+        cls, name: str, start: float, end: float, depth: int, lane: int, args: dict
+    ) -> None:
+        """Record a finished span.
+
+        Args:
+            name (str): Span name.
+            start (float): `perf_counter` at start.
+            end (float): `perf_counter` at end.
+            depth (int): Parent spans.
+            lane (int): Task or thread.
+            args (dict): Details.
+        """
+        event = {
+            "name": name,
+            "start": start - cls.origin,
+            "duration": end - start,
+            "depth": depth,
+            "lane": lane,
+            "args": args,
+        }
+        with cls.lock:
+            cls.events.append(event)
+
+    @classmethod
+    def to_chrome(cls) -> dict:
+        """Spans in Chrome trace event format.
+
+        Returns:
+            dict: Trace, `chrome://tracing` & Perfetto load it.
+        """
+        events = [
+            {
+                "name": e["name"],
+                "cat": e["name"].split(".")[0],
+                "ph": "X",
+                "ts": round(e["start"] * 1e6, 1),
+                "dur": round(e["duration"] * 1e6, 1),
+                "pid": 1,
+                "tid": e["lane"],
+                "args": e["args"],
+            }
+            for e in sorted(cls.events, key=lambda e: e["start"])
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    @classmethod
+    def export(cls, path: str) -> None:
+        """Write the Chrome trace.
+
+        Args:
+            path (str): JSON file path.
+        """
+        with open(path, "w") as f:
+            json.dump(cls.to_chrome(), f)
+
+    @classmethod
+    def waterfall(cls, width: int = 40) -> str:
+        """Spans as a text waterfall.
+
+        Args:
+            width (int, optional): Bars width.
+
+        Returns:
+            str: example, 10 wide:
+                     start        dur
+                  0.0 ms   812.4 ms |##########| apiruns.up
+                  0.3 ms     2.1 ms |#         |   docker.ping
+        """
+        events = sorted(cls.events, key=lambda e: (e["start"], -e["duration"]))
+        if not events:
+            return "No timings recorded."
+        total = max(e["start"] + e["duration"] for e in events) or 1.0
+        lines = [f"{'start':>10} {'dur':>10}"]
+        for e in events:
+            begin = int(e["start"] / total * width)
+            size = max(int(e["duration"] / total * width), 1)
+            bar = (" " * begin + "#" * size)[:width].ljust(width)
+            detail = " ".join(str(v) for v in e["args"].values())
+            name = "  " * e["depth"] + e["name"] + (f" {detail}" if detail else "")
+            lines.append(
+                f"{e['start'] * 1000:7.1f} ms {e['duration'] * 1000:7.1f} ms "
+                f"|{bar}| {name}"
+            )
+        return "\n".join(lines)
+
+
+class _Span:
+    __slots__ = ("name", "args", "start", "token")
+
+    def __init__(self, name: str, args: dict):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.token = _depth.set(_depth.get() + 1)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        _depth.reset(self.token)
+        Tracer.record(
+            self.name, self.start, end, _depth.get(), Tracer._lane(), self.args
+        )
+        return False
+
+
+@contextmanager
+def tracing(timings: bool = False, trace: Optional[str] = None):
+    """Record the spans of a command when asked.
+
+    Args:
+        timings (bool, optional): Print the waterfall at the end.
+        trace (str, optional): Chrome trace path written at the end.
+    """
+    if not (timings or trace):
+        yield
+        return
+    Tracer.enable()
+    try:
+        yield
+    finally:
+        Tracer.disable()
+        if timings:
+            typer.echo(Tracer.waterfall())
+        if trace:
+            Tracer.export(trace)
+            typer.echo(f"Trace written to {trace}")
+
+
+def span(name: str, **args):
+    """Time a block.
+
+    Args:
+        name (str): Span name, `<category>.<phase>`.
+        args (dict): Details shown in the trace.
+
+    Returns:
+        ContextManager: Span, a no-op if the tracer is disabled.
+
+    Example:
+        >>> with span("docker.pull", image="mongo:latest"):
+        ...     pass
+    """
+    if not Tracer.enabled:
+        return _disabled
+    return _Span(name, args)
+
+
+def timed(name: str, arg: Optional[str] = None) -> Callable:
+    """Time every call of a function or coroutine function.
+
+    Args:
+        name (str): Span name.
+        arg (str, optional): Parameter shown in the trace.
+
+    Returns:
+        Callable: Decorator.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        position = None
+        if arg:
+            position = list(inspect.signature(func).parameters).index(arg)
+
+        def details(args: tuple, kwargs: dict) -> dict:
+            if arg is None:
+                return {}
+            value = kwargs.get(arg, args[position] if position < len(args) else None)
+            return {} if value is None else {arg: value}
+
+        if asyncio.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not Tracer.enabled:
+                    return await func(*args, **kwargs)
+                with _Span(name, details(args, kwargs)):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not Tracer.enabled:
+                return func(*args, **kwargs)
+            with _Span(name, details(args, kwargs)):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,219 @@
+import os
+import time
+import httpx
+from dataclasses import dataclass, fields, replace
+from typing import Optional
+from .exceptions import ErrorMissingDependency
+from .stats import RequestStats
+
+TRUE_VALUES = ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class TransportSettings:
+    """Pool & timeouts of an HTTP client.
+
+    Every field is overridden by an `APIRUNS_<CLIENT>_<FIELD>` environment
+    variable, example `APIRUNS_API_MAX_CONNECTIONS=32`.
+
+    Args:
+        max_connections (int, optional): Connections of the pool.
+        max_keepalive (int, optional): Idle connections kept open.
+        keepalive_expiry (float, optional): Seconds an idle connection is kept.
+        connect_timeout (float, optional): Seconds to open a connection.
+        read_timeout (float, optional): Seconds to wait for data, also used
+            to send it.
+        pool_timeout (float, optional): Seconds to wait for a free connection.
+        http2 (bool, optional): Speak HTTP/2, needs the `http2` extra.
+    """
+
+    max_connections: int = 16
+    max_keepalive: int = 16
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    pool_timeout: float = 30.0
+    http2: bool = False
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            self.read_timeout,
+            connect=self.connect_timeout,
+            pool=self.pool_timeout,
+        )
+
+    def from_env(self, client: str) -> "TransportSettings":
+        """Settings overridden by the environment.
+
+        Args:
+            client (str): Client name, example `docker`.
+
+        Returns:
+            TransportSettings: New settings.
+        """
+        overrides = {}
+        for f in fields(self):
+            value = os.environ.get(f"APIRUNS_{client.upper()}_{f.name.upper()}")
+            if value is None:
+                continue
+            if f.type in (bool, "bool"):
+                overrides[f.name] = value.lower() in TRUE_VALUES
+            else:
+                overrides[f.name] = type(getattr(self, f.name))(value)
+        return replace(self, **overrides)
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """Transport recording every request in `RequestStats`.
+
+    Args:
+        transport (httpx.AsyncBaseTransport): Transport sending the requests.
+        client (str): Client label of the requests.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, client: str):
+        self.transport = transport
+        self.client = client
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not RequestStats.enabled:
+            return await self.transport.handle_async_request(request)
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = await self.transport.handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            RequestStats.record(
+                self.client,
+                request.method,
+                request.url.path,
+                status,
+                time.perf_counter() - started,
+            )
+
+    async def __aenter__(self):
+        await self.transport.__aenter__()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.transport.__aexit__(*args)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class InstrumentedSyncTransport(httpx.BaseTransport):
+    """Blocking transport recording every request in `RequestStats`.
+
+    Args:
+        transport (httpx.BaseTransport): Transport sending the requests.
+        client (str): Client label of the requests.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, client: str):
+        self.transport = transport
+        self.client = client
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if not RequestStats.enabled:
+            return self.transport.handle_request(request)
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = self.transport.handle_request(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            RequestStats.record(
+                self.client,
+                request.method,
+                request.url.path,
+                status,
+                time.perf_counter() - started,
+            )
+
+    def __enter__(self):
+        self.transport.__enter__()
+        return self
+
+    def __exit__(self, *args):
+        self.transport.__exit__(*args)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+def _transport_options(settings: TransportSettings) -> dict:
+    """Options of the httpx transports.
+
+    Both clients speak plain HTTP, to the engine socket or to a local port,
+    so TLS is never negotiated. Skipping the CA bundle load saves ~150 ms
+    by client.
+
+    Raises:
+        ErrorMissingDependency: HTTP/2 is asked and h2 isn't installed.
+    """
+    options = {"verify": False, "limits": settings.limits()}
+    if settings.http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            raise ErrorMissingDependency(
+                errors="h2, install it with `pip install apiruns[http2]`"
+            )
+        # Without TLS there is no ALPN, HTTP/2 is spoken with prior knowledge.
+        options.update(http1=False, http2=True)
+    return options
+
+
+def async_client(
+    settings: TransportSettings,
+    client: str,
+    uds: Optional[str] = None,
+    base_url: str = "",
+) -> httpx.AsyncClient:
+    """Pooled async client recording its requests.
+
+    Args:
+        settings (TransportSettings): Pool & timeouts.
+        client (str): Client label of the requests, example `docker`.
+        uds (str, optional): Unix socket path.
+        base_url (str, optional): Prefix of relative URLs.
+
+    Returns:
+        httpx.AsyncClient: Client, to be closed by the caller.
+    """
+    transport = httpx.AsyncHTTPTransport(uds=uds, **_transport_options(settings))
+    return httpx.AsyncClient(
+        transport=InstrumentedTransport(transport, client),
+        base_url=base_url,
+        timeout=settings.timeout(),
+        trust_env=False,
+    )
+
+
+def sync_client(settings: TransportSettings, client: str) -> httpx.Client:
+    """Pooled blocking client recording its requests, safe across threads.
+
+    Args:
+        settings (TransportSettings): Pool & timeouts.
+        client (str): Client label of the requests, example `api`.
+
+    Returns:
+        httpx.Client: Client.
+    """
+    transport = httpx.HTTPTransport(**_transport_options(settings))
+    return httpx.Client(
+        transport=InstrumentedSyncTransport(transport, client),
+        timeout=settings.timeout(),
+        trust_env=False,
+    )
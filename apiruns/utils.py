@@ -1,8 +1,104 @@
-from typing import Any
+from typing import Any, Iterator, Tuple, Union
 import yaml
 import json
+import hashlib
 import urllib.parse
 from pathlib import Path
+from yaml.composer import Composer
+from yaml.nodes import MappingNode
+from yaml.constructor import SafeConstructor
+from yaml.resolver import Resolver
+from yaml.events import CollectionEndEvent
+from yaml.events import CollectionStartEvent
+from yaml.events import MappingStartEvent
+from yaml.events import MappingEndEvent
+from yaml.events import SequenceStartEvent
+from yaml.events import SequenceEndEvent
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+    from yaml.cyaml import CParser as Parser
+except ImportError:  # pragma: no cover, PyYAML built without libyaml.
+    from yaml import SafeLoader
+    from yaml.reader import Reader
+    from yaml.scanner import Scanner
+    from yaml.parser import Parser as _Parser
+
+    class Parser(Reader, Scanner, _Parser):
+        def __init__(self, stream):
+            Reader.__init__(self, stream)
+            Scanner.__init__(self)
+            _Parser.__init__(self)
+
+
+class EventLoader(Parser, Composer, SafeConstructor, Resolver):
+    """Safe loader building one node at a time from the event stream.
+
+    Anchors stay defined for the whole stream, so aliases to nodes already
+    built still resolve.
+    """
+
+    def __init__(self, stream):
+        Parser.__init__(self, stream)
+        Composer.__init__(self)
+        SafeConstructor.__init__(self)
+        Resolver.__init__(self)
+
+    def start_mapping(self) -> None:
+        """Move into the top-level mapping of the document.
+
+        Raises:
+            ValueError: The document isn't a mapping.
+        """
+        self.get_event()
+        self.get_event()
+        if not self.check_event(MappingStartEvent):
+            raise ValueError("the document must be a mapping")
+        self.get_event()
+
+    def start_list(self, key: Any) -> bool:
+        """Move into the list under a key of the top-level mapping.
+
+        Raises:
+            ValueError: The document isn't a mapping or the value isn't a list.
+
+        Returns:
+            bool: False if the key isn't in the mapping.
+        """
+        self.start_mapping()
+        while not self.check_event(MappingEndEvent):
+            current = self.load_node()
+            if current != key:
+                # Built item by item, they may define anchors used later.
+                if not self.check_event(SequenceStartEvent):
+                    self.skip_node()
+                    continue
+                self.get_event()
+                while not self.check_event(SequenceEndEvent):
+                    self.compose_node(None, None)
+                self.get_event()
+                continue
+            if not self.check_event(SequenceStartEvent):
+                raise ValueError(f"`{key}` must be a list")
+            self.get_event()
+            return True
+        return False
+
+    def skip_node(self) -> None:
+        """Consume the events of a node without building it."""
+        depth = 0
+        while True:
+            event = self.get_event()
+            if isinstance(event, CollectionStartEvent):
+                depth += 1
+            elif isinstance(event, CollectionEndEvent):
+                depth -= 1
+            if depth == 0:
+                return
+
+    def load_node(self) -> Any:
+        """Build the next node."""
+        return self.construct_document(self.compose_node(None, None))
 
 
 def load_yaml(path_file: str):
@@ -12,8 +108,112 @@ def load_yaml(path_file: str):
         path_file (str): Path file.
     """
     filename = Path(path_file).resolve()
-    yaml_file = open(str(filename), "r")
-    return yaml.load(yaml_file, yaml.Loader)
+    with open(str(filename), "r") as yaml_file:
+        return yaml.load(yaml_file, SafeLoader)
+
+
+def parse_yaml(content: Union[str, bytes]) -> Any:
+    """Parse yaml content.
+
+    Args:
+        content (Union[str, bytes]): Yaml document.
+
+    Returns:
+        Any: Document.
+    """
+    return yaml.load(content, SafeLoader)
+
+
+def iter_yaml_keys(path_file: str) -> Iterator[Any]:
+    """Lazily read the keys of a yaml mapping, values are skipped.
+
+    Args:
+        path_file (str): Path file.
+
+    Raises:
+        yaml.YAMLError: Invalid yaml.
+        ValueError: The document isn't a mapping.
+
+    Yields:
+        Any: Key.
+    """
+    with open(str(Path(path_file).resolve()), "rb") as f:
+        loader = EventLoader(f)
+        loader.start_mapping()
+        while not loader.check_event(MappingEndEvent):
+            yield loader.load_node()
+            loader.skip_node()
+
+
+def iter_yaml_list(path_file: str, key: Any) -> Iterator[Any]:
+    """Lazily read the items of a list under a key of a yaml mapping.
+
+    Only an item is built at a time, so memory doesn't grow with the file.
+
+    Args:
+        path_file (str): Path file.
+        key (Any): Key of the list.
+
+    Raises:
+        yaml.YAMLError: Invalid yaml.
+        ValueError: The document isn't a mapping or the value isn't a list.
+
+    Yields:
+        Any: Item.
+    """
+    with open(str(Path(path_file).resolve()), "rb") as f:
+        loader = EventLoader(f)
+        if not loader.start_list(key):
+            return
+        while not loader.check_event(SequenceEndEvent):
+            yield loader.load_node()
+
+
+def iter_yaml_list_field(path_file: str, key: Any, field: Any) -> Iterator[Any]:
+    """Lazily read a field of the items of a list under a key of a yaml mapping.
+
+    Items are composed but only the field is built, so it's cheaper than
+    `iter_yaml_list` when the rest of the items isn't needed.
+
+    Args:
+        path_file (str): Path file.
+        key (Any): Key of the list.
+        field (Any): Key of the field in the items.
+
+    Raises:
+        yaml.YAMLError: Invalid yaml.
+        ValueError: The document isn't a mapping or the value isn't a list.
+
+    Yields:
+        Any: Field value, None if the item isn't a mapping or lacks it.
+    """
+    with open(str(Path(path_file).resolve()), "rb") as f:
+        loader = EventLoader(f)
+        if not loader.start_list(key):
+            return
+        while not loader.check_event(SequenceEndEvent):
+            node = loader.compose_node(None, None)
+            value = None
+            if isinstance(node, MappingNode):
+                # Merge keys, `<<: *base`, may give the field.
+                loader.flatten_mapping(node)
+                for key_node, value_node in node.value:
+                    if loader.construct_document(key_node) == field:
+                        value = loader.construct_document(value_node)
+            yield value
+
+
+def read_bytes(path_file: str) -> bytes:
+    """Read a file.
+
+    Args:
+        path_file (str): Path file.
+
+    Returns:
+        bytes: Content.
+    """
+    with open(str(Path(path_file).resolve()), "rb") as f:
+        return f.read()
 
 
 def encode_obj_to_url(obj: Any) -> str:
@@ -26,3 +226,50 @@ def encode_obj_to_url(obj: Any) -> str:
         str: url string
     """
     return urllib.parse.quote(json.dumps(obj))
+
+
+def fingerprint(obj: Any) -> str:
+    """Hash of a json object, independent of the keys order.
+
+    Args:
+        obj (Any): Object to hash.
+
+    Returns:
+        str: sha256 hex digest.
+    """
+    content = json.dumps(obj, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def split_image_reference(reference: str) -> Tuple[str, str]:
+    """Split an image reference in repository and tag or digest.
+
+    Args:
+        reference (str): Image reference.
+            example:
+                mongo, mongo:6.0, mongo@sha256:9d0f...
+
+    Returns:
+        Tuple[str, str]: Repository & tag or digest, default tag `latest`.
+    """
+    if "@" in reference:
+        repository, digest = reference.split("@", 1)
+        return repository, digest
+    repository, _, tag = reference.rpartition(":")
+    if repository and "/" not in tag:
+        return repository, tag
+    return reference, "latest"
+
+
+def normalize_image_reference(reference: str) -> str:
+    """Add the default tag to an image reference without tag or digest.
+
+    Args:
+        reference (str): Image reference.
+
+    Returns:
+        str: example: mongo:latest
+    """
+    repository, tag = split_image_reference(reference)
+    separator = "@" if ":" in tag else ":"
+    return f"{repository}{separator}{tag}"
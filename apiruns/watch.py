@@ -0,0 +1,175 @@
+import os
+import sys
+import time
+import ctypes
+import select
+import struct
+from abc import ABC
+from abc import abstractmethod
+from pathlib import Path
+from typing import Optional
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class FileWatcher(ABC):
+    """Changes of a file.
+
+    Wakeups may be spurious, example a file saved without changes, so
+    callers compare the content.
+
+    Args:
+        path (str): File path.
+    """
+
+    KIND = ""
+
+    def __init__(self, path: str):
+        self.path = Path(path).resolve()
+
+    @classmethod
+    def create(cls, path: str, polling: bool = False) -> "FileWatcher":
+        """Watch a file with inotify, else by polling.
+
+        Args:
+            path (str): File path.
+            polling (bool, optional): Always poll, example network file
+                systems inotify doesn't see.
+
+        Returns:
+            FileWatcher: Watcher, to be closed.
+        """
+        if not polling:
+            try:
+                return InotifyWatcher(path)
+            except OSError:
+                pass
+        return PollingWatcher(path)
+
+    @abstractmethod
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a change.
+
+        Args:
+            timeout (float, optional): Seconds to wait. Default forever.
+
+        Returns:
+            bool: True if the file changed.
+        """
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class InotifyWatcher(FileWatcher):
+    """File watched by inotify, Linux only.
+
+    The directory is watched rather than the file, editors often save
+    by writing a new file & renaming it over the old one.
+    """
+
+    KIND = "inotify"
+    MASK = IN_CLOSE_WRITE | IN_MOVED_TO
+    # Editors may write a file in a few steps, they're reported once.
+    DEBOUNCE = 0.02
+    READ_SIZE = 64 * 1024
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify isn't available")
+        libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify isn't available")
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        directory = str(self.path.parent).encode()
+        if libc.inotify_add_watch(self.fd, directory, self.MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, "inotify_add_watch")
+        self.name = self.path.name.encode()
+
+    def _read(self, timeout: Optional[float]) -> Optional[bool]:
+        """Read the pending events.
+
+        Returns:
+            Optional[bool]: None on timeout, else True if the file changed.
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return None
+        try:
+            data = os.read(self.fd, self.READ_SIZE)
+        except BlockingIOError:
+            return False
+        changed = False
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            end = offset + length
+            changed |= data[offset:end].rstrip(b"\0") == self.name
+            offset = end
+        return changed
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            changed = self._read(remaining)
+            if changed is None:
+                return False
+            if changed:
+                break
+        while self._read(self.DEBOUNCE) is not None:
+            pass
+        return True
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingWatcher(FileWatcher):
+    """File watched by its modification time, size & inode."""
+
+    KIND = "polling"
+    INTERVAL = 0.1
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.last = self._stat()
+
+    def _stat(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._stat()
+            if current != self.last:
+                self.last = current
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.INTERVAL)
@@ -0,0 +1 @@
+"""Apiruns CLI benchmarks."""
@@ -0,0 +1,47 @@
+"""Loading the services from the manifest or from a `build` artifact.
+
+Usage:
+    python -m benchmarks.bench_artifact [endpoints]
+"""
+import os
+import sys
+import time
+import tempfile
+import yaml
+from apiruns.artifact import Artifact
+from apiruns.clients import ServiceImages
+from apiruns.serializers import FileSerializer
+from benchmarks.bench_validation import build_manifest
+
+
+def measure(func) -> float:
+    """Measure a load function.
+
+    Returns:
+        float: Milliseconds.
+    """
+    started = time.perf_counter()
+    func()
+    return (time.perf_counter() - started) * 1000
+
+
+def main(size: int = 10000) -> None:
+    services = {"bench": build_manifest(size)}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["APIRUNS_CACHE_DIR"] = os.path.join(tmp, "cache")
+        manifest = os.path.join(tmp, "apiruns-compose.yml")
+        with open(manifest, "w") as f:
+            yaml.safe_dump(services, f)
+        artifact = os.path.join(tmp, "apiruns-build.json")
+        Artifact.write(artifact, services, ServiceImages())
+        cases = [
+            ("manifest", lambda: FileSerializer.load(manifest, cache=False)),
+            ("artifact", lambda: Artifact.load(artifact)),
+        ]
+        print(f"Loading {size} endpoints")
+        for name, func in cases:
+            print(f"{name:>10}: {measure(func):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
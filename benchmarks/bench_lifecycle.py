@@ -0,0 +1,282 @@
+"""CLI lifecycle benchmark against the fake Docker Engine & apiruns API.
+
+No Docker daemon is needed. Every scenario runs against fresh fakes and
+records wall time, requests by endpoint and allocations.
+
+Usage:
+    python -m benchmarks.bench_lifecycle [--latency 0.005] [--models 200]
+        [--output results.json] [--compare baseline.json]
+
+With `--compare`, exits with status 1 if a scenario makes more requests
+than the baseline or its wall time grows more than `--tolerance`.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from pathlib import Path
+from contextlib import contextmanager, redirect_stdout
+from apiruns.clients import APIClient
+from apiruns.clients import DockerClient
+from apiruns.clients import AsyncDockerClient
+from apiruns.services import Apiruns
+from apiruns.watch import FileWatcher
+from benchmarks.fakes import FakeAPI
+from benchmarks.fakes import FakeDockerEngine
+
+
+def build_models(size: int) -> list:
+    """Build endpoints definitions.
+
+    Args:
+        size (int): Endpoints.
+
+    Returns:
+        list: Endpoints.
+    """
+    return [
+        {"path": f"/resource{i}", "schema": {"name": {"type": "string"}}}
+        for i in range(size)
+    ]
+
+
+def build_data(size: int, files: int = 4) -> dict:
+    """Build DB files, compressible like mongo ones.
+
+    Args:
+        size (int): Bytes by file.
+        files (int, optional): Files.
+
+    Returns:
+        dict: Content by file name.
+    """
+    block = bytes(range(256)) * 16
+    return {
+        f"collection-{i}.wt": (block * (size // len(block) + 1))[:size]
+        for i in range(files)
+    }
+
+
+def write_manifest(path: Path, models: list) -> None:
+    """Write a manifest, json is valid yaml."""
+    path.write_text(json.dumps({"bench": models}))
+
+
+@contextmanager
+def environment(latency: float):
+    """Fakes wired to the clients in a temporary directory.
+
+    Args:
+        latency (float): Seconds added to every request.
+
+    Yields:
+        tuple: Temporary dir, fake engine & fake API.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = FakeDockerEngine(
+            os.path.join(tmp, "docker.sock"), latency={"*": latency}
+        )
+        api = FakeAPI(latency={"*": latency})
+        saved = (
+            AsyncDockerClient.DOCKER_SOCKET,
+            AsyncDockerClient.APIRUNS_API_PORTS,
+            APIClient.HOST,
+            APIClient.session,
+        )
+        cache = os.environ.get("APIRUNS_CACHE_DIR")
+        os.environ["APIRUNS_CACHE_DIR"] = os.path.join(tmp, "cache")
+        with engine, api:
+            AsyncDockerClient.DOCKER_SOCKET = engine.socket_path
+            # The first service of a manifest listens on the fake API port.
+            AsyncDockerClient.APIRUNS_API_PORTS = str(api.server.server_address[1])
+            APIClient.HOST = api.url
+            APIClient.session = None
+            try:
+                yield Path(tmp), engine, api
+            finally:
+                (
+                    AsyncDockerClient.DOCKER_SOCKET,
+                    AsyncDockerClient.APIRUNS_API_PORTS,
+                    APIClient.HOST,
+                    APIClient.session,
+                ) = saved
+                if cache is None:
+                    os.environ.pop("APIRUNS_CACHE_DIR")
+                else:
+                    os.environ["APIRUNS_CACHE_DIR"] = cache
+
+
+def measure(func, *fakes) -> dict:
+    """Measure a scenario.
+
+    Args:
+        func (Callable): Scenario.
+        fakes (FakeServer): Servers counting requests.
+
+    Returns:
+        dict: Wall time, requests & allocations.
+    """
+    for fake in fakes:
+        fake.reset_counters()
+    tracemalloc.start()
+    started = time.perf_counter()
+    with redirect_stdout(open(os.devnull, "w")):
+        func()
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    requests = {}
+    for fake in fakes:
+        requests.update(fake.requests)
+    return {
+        "wall_ms": round(wall * 1000, 2),
+        "request_count": sum(requests.values()),
+        "requests": dict(sorted(requests.items())),
+        "peak_alloc_kb": round(peak / 1024, 1),
+    }
+
+
+def run(latency: float = 0.0, models: int = 200) -> dict:
+    """Run every scenario.
+
+    Args:
+        latency (float): Seconds added to every request.
+        models (int): Endpoints of the manifest.
+
+    Returns:
+        dict: Results by scenario.
+    """
+    data = build_models(models)
+    results = {}
+
+    with environment(latency) as (_, engine, _):
+        results["compose_service_cold"] = measure(
+            lambda: DockerClient.compose_service("bench", start=True), engine
+        )
+        results["compose_service_unchanged"] = measure(
+            lambda: DockerClient.compose_service("bench", start=True), engine
+        )
+        results["service_down"] = measure(
+            lambda: DockerClient.service_down("bench"), engine
+        )
+        results["compose_service_warm"] = measure(
+            lambda: DockerClient.compose_service("bench", start=True), engine
+        )
+        services = {f"bench{i}": i for i in range(4)}
+        results["compose_services_4"] = measure(
+            lambda: DockerClient.compose_services(services, start=True), engine
+        )
+        results["compose_replicas_4"] = measure(
+            lambda: DockerClient.compose_services(
+                {"replicas": 4}, start=True, replicas=4
+            ),
+            engine,
+        )
+        results["down_all_prune"] = measure(
+            lambda: DockerClient.services_down(None, prune=True), engine
+        )
+
+    with environment(latency) as (_, _, api):
+        results["create_models"] = measure(lambda: APIClient.create_models(data), api)
+
+    with environment(latency) as (tmp, engine, _):
+        with redirect_stdout(open(os.devnull, "w")):
+            DockerClient.compose_service("bench", start=True)
+        volume = AsyncDockerClient._build_volume_name("bench")
+        engine.volumes[volume]["Files"] = build_data(2 * 1024 * 1024)
+        snapshot = tmp / "bench.tar.gz"
+        results["snapshot"] = measure(
+            lambda: DockerClient.snapshot_services({"bench": snapshot}), engine
+        )
+        results["restore"] = measure(
+            lambda: DockerClient.restore_services({"bench": 0}, {"bench": snapshot}),
+            engine,
+        )
+
+    with environment(latency) as (tmp, engine, api):
+        manifest = tmp / "apiruns-compose.yml"
+        write_manifest(manifest, data)
+        results["up"] = measure(lambda: Apiruns.up(str(manifest)), engine, api)
+
+        # From saving an edited endpoint until the API has it, as `dev --watch`.
+        offsets = Apiruns._offsets({"bench": data})
+        containers = DockerClient.running_services(["bench"])
+        edited = [dict(data[0], name="edited")] + data[1:]
+
+        def reload():
+            with FileWatcher.create(str(manifest)) as watcher:
+                write_manifest(manifest, edited)
+                watcher.wait(timeout=5)
+                Apiruns._reload(manifest.read_bytes(), offsets, containers)
+
+        results["reload_one_model"] = measure(reload, engine, api)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Compare results with a baseline.
+
+    Args:
+        results (dict): Current results.
+        baseline (dict): Previous results.
+        tolerance (float): Allowed wall time growth, 0.2 is 20%.
+
+    Returns:
+        list: Regressions.
+    """
+    regressions = []
+    for name, previous in baseline["scenarios"].items():
+        current = results["scenarios"].get(name)
+        if current is None:
+            continue
+        if current["request_count"] > previous["request_count"]:
+            regressions.append(
+                f"{name}: {current['request_count']} requests, "
+                f"baseline {previous['request_count']}"
+            )
+        if current["wall_ms"] > previous["wall_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: {current['wall_ms']} ms, baseline {previous['wall_ms']} ms"
+            )
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--models", type=int, default=200)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path)
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": platform.python_version(),
+        "latency_s": args.latency,
+        "models": args.models,
+        "scenarios": run(args.latency, args.models),
+    }
+    for name, r in results["scenarios"].items():
+        print(
+            f"{name:>25}: {r['wall_ms']:9.1f} ms {r['request_count']:5d} requests "
+            f"{r['peak_alloc_kb']:9.1f} KB peak"
+        )
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression {regression}")
+        return int(bool(regressions))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""CLI startup time, guarded by a budget.
+
+Usage:
+    python -m benchmarks.bench_startup [runs] [budget_ms]
+
+Exits with status 1 if a heavy dependency is imported at startup or the
+median overhead of `apiruns version` over a bare interpreter is over the
+budget. `--help` is only reported, rendering it imports rich.
+"""
+import sys
+import time
+import statistics
+import subprocess
+
+HEAVY_MODULES = {"httpx", "requests", "cerberus", "yaml"}
+COMMAND = "from apiruns.main import app; app()"
+
+
+def import_times() -> dict:
+    """Cumulative import time of every module imported by `apiruns.main`.
+
+    Returns:
+        dict: Microseconds by module.
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import apiruns.main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+def wall_time(args: list, runs: int) -> float:
+    """Median wall time of a python call.
+
+    Returns:
+        float: Milliseconds.
+    """
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, *args], capture_output=True, check=True)
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def main(runs: int = 10, budget: float = 100.0) -> int:
+    times = import_times()
+    heavy = HEAVY_MODULES & set(times)
+    top = sorted(times.items(), key=lambda t: t[1], reverse=True)[:5]
+    print("Slowest imports (cumulative):")
+    for module, us in top:
+        print(f"{module:>32}: {us / 1000:6.1f} ms")
+
+    if heavy:
+        print(f"Heavy modules imported at startup: {sorted(heavy)}")
+
+    runs = int(runs)
+    baseline = wall_time(["-c", "pass"], runs)
+    version = wall_time(["-c", COMMAND, "version"], runs) - baseline
+    help_ = wall_time(["-c", COMMAND, "--help"], runs) - baseline
+    status = "ok" if version <= budget else "over budget"
+    print(f"python: {baseline:.1f} ms")
+    print(f"apiruns version: +{version:.1f} ms ({status}, budget {budget:.0f} ms)")
+    print(f"apiruns --help: +{help_:.1f} ms")
+    return int(bool(heavy) or version > budget)
+
+
+if __name__ == "__main__":
+    sys.exit(main(*[float(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,56 @@
+"""Peak memory of loading a manifest whole or streaming its endpoints.
+
+Usage:
+    python -m benchmarks.bench_stream [endpoints]
+"""
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import yaml
+from apiruns.serializers import FileSerializer
+from benchmarks.bench_validation import build_manifest
+
+
+def measure(func) -> tuple:
+    """Measure a load function.
+
+    Returns:
+        tuple: Milliseconds & peak MiB allocated.
+    """
+    tracemalloc.start()
+    started = time.perf_counter()
+    func()
+    elapsed = (time.perf_counter() - started) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def stream(manifest: str) -> None:
+    errors = {}
+    names = FileSerializer.service_names(manifest)
+    FileSerializer.stream_routes(manifest, names)
+    for name in names:
+        for _ in FileSerializer.stream(manifest, name, errors):
+            pass
+
+
+def main(size: int = 10000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest = os.path.join(tmp, "apiruns-compose.yml")
+        with open(manifest, "w") as f:
+            yaml.safe_dump({"bench": build_manifest(size)}, f)
+        cases = [
+            ("load", lambda: FileSerializer.load(manifest, cache=False)),
+            ("stream", lambda: stream(manifest)),
+        ]
+        print(f"Reading {size} endpoints")
+        for name, func in cases:
+            elapsed, peak = measure(func)
+            print(f"{name:>10}: {elapsed:8.1f} ms {peak:8.1f} MiB peak")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,66 @@
+"""Validation cost per endpoint, before & after reusing the validator.
+
+Usage:
+    python -m benchmarks.bench_validation [endpoints]
+"""
+import sys
+import time
+from cerberus import Validator
+from apiruns.serializers import FileSerializer
+
+
+def build_manifest(size: int) -> list:
+    """Build a manifest with `size` endpoints.
+
+    Args:
+        size (int): Endpoints.
+
+    Returns:
+        list: Endpoints.
+    """
+    return [
+        {
+            "path": f"/resource{i}/",
+            "name": f"resource-{i}",
+            "schema": {
+                "username": {"type": "string", "required": True},
+                "age": {"type": "integer", "required": True},
+                "is_admin": {"type": "boolean"},
+            },
+        }
+        for i in range(size)
+    ]
+
+
+def validate_without_reuse(data: list) -> None:
+    """Validation as it was, a new validator by endpoint."""
+    for d in data:
+        v = Validator(FileSerializer.FILE_SCHEMA, purge_unknown=False)
+        v.validate(d)
+
+
+def measure(func, data: list) -> float:
+    """Measure a validation function.
+
+    Returns:
+        float: Microseconds per endpoint.
+    """
+    started = time.perf_counter()
+    func(data)
+    return (time.perf_counter() - started) / len(data) * 1e6
+
+
+def main(size: int = 10000) -> None:
+    data = build_manifest(size)
+    cases = [
+        ("validator by endpoint", validate_without_reuse),
+        ("reused validator", lambda d: FileSerializer.validate(d, workers=1)),
+        ("process pool", FileSerializer.validate),
+    ]
+    print(f"Validating {size} endpoints")
+    for name, func in cases:
+        print(f"{name:>24}: {measure(func, data):8.1f} us/endpoint")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
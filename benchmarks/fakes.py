@@ -0,0 +1,536 @@
+"""In-process stand-ins of the Docker Engine API and the apiruns API.
+
+Both servers count requests by path template and can add latency by
+endpoint, example:
+
+    with FakeDockerEngine(socket_path, latency={"POST /images/create": 0.5}):
+        ...
+"""
+import io
+import re
+import json
+import time
+import uuid
+import queue
+import select
+import socket
+import tarfile
+import threading
+import socketserver
+from collections import Counter
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server on a unix socket."""
+
+    daemon_threads = True
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """Dispatch requests to the routes of the fake server."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _handle(self):
+        fake = self.server.fake
+        url = urlsplit(self.path)
+        body = self.read_body()
+        for method, pattern, template, func in fake.routes:
+            match = pattern.match(url.path)
+            if method == self.command and match:
+                fake.record(f"{method} {template}")
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                data = body or None
+                if body and self.headers.get("Content-Type") == "application/json":
+                    data = json.loads(body)
+                return func(self, *match.groups(), params=params, data=data)
+        fake.record(f"{self.command} {url.path}")
+        self.send_json(404, {"message": "page not found"})
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding") != "chunked":
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b";")[0], 16)
+            chunk = self.rfile.read(size)
+            self.rfile.readline()
+            if not size:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+    def send_bytes(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status: int, data=None):
+        body = b"" if data is None else json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def start_stream(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def send_chunk(self, data: dict):
+        line = json.dumps(data).encode() + b"\n"
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+
+    def end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def client_closed(self, timeout: float) -> bool:
+        readable, _, _ = select.select([self.connection], [], [], timeout)
+        return bool(readable) and not self.connection.recv(1, socket.MSG_PEEK)
+
+
+class FakeServer:
+    """Base of the fake servers.
+
+    Args:
+        latency (dict, optional): Seconds by `METHOD /path/{template}`.
+    """
+
+    ROUTES = []
+
+    def __init__(self, latency: dict = None):
+        self.latency = latency or {}
+        self.requests = Counter()
+        self.lock = threading.Lock()
+        self.server = None
+        self.thread = None
+        self.routes = [
+            (method, self._compile(template), template, getattr(self, name))
+            for method, template, name in self.ROUTES
+        ]
+
+    @staticmethod
+    def _compile(template: str):
+        pattern = re.escape(template)
+        pattern = re.sub(r"\\\{name\\\}", "(.+)", pattern)
+        pattern = re.sub(r"\\\{\w+\\\}", "([^/]+)", pattern)
+        return re.compile(f"^{pattern}$")
+
+    def record(self, endpoint: str):
+        with self.lock:
+            self.requests[endpoint] += 1
+        delay = self.latency.get(endpoint, self.latency.get("*", 0))
+        if delay:
+            time.sleep(delay)
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests.clear()
+
+    def _build_server(self):
+        raise NotImplementedError
+
+    def start(self):
+        self.server = self._build_server()
+        self.server.fake = self
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+class FakeDockerEngine(FakeServer):
+    """Docker Engine API stand-in on a unix socket.
+
+    Args:
+        socket_path (str): Unix socket path.
+        latency (dict, optional): Seconds by `METHOD /path/{template}`.
+        layers (int, optional): Layers reported by every image pull.
+    """
+
+    ROUTES = [
+        ("GET", "/_ping", "ping"),
+        ("GET", "/version", "version"),
+        ("GET", "/networks/{id}", "get_network"),
+        ("POST", "/networks/create", "create_network"),
+        ("POST", "/networks/prune", "prune_networks"),
+        ("POST", "/volumes/prune", "prune_volumes"),
+        ("GET", "/images/{name}/json", "get_image"),
+        ("POST", "/images/create", "pull_image"),
+        ("POST", "/containers/create", "create_container"),
+        ("GET", "/containers/json", "list_containers"),
+        ("GET", "/containers/{id}/json", "inspect_container"),
+        ("POST", "/containers/{id}/start", "start_container"),
+        ("DELETE", "/containers/{id}", "delete_container"),
+        ("POST", "/containers/{id}/stop", "stop_container"),
+        ("GET", "/containers/{id}/archive", "get_archive"),
+        ("PUT", "/containers/{id}/archive", "put_archive"),
+        ("POST", "/volumes/create", "create_volume"),
+        ("DELETE", "/volumes/{name}", "delete_volume"),
+        ("GET", "/events", "events"),
+    ]
+
+    def __init__(self, socket_path: str, latency: dict = None, layers: int = 3):
+        super().__init__(latency)
+        self.socket_path = socket_path
+        self.layers = layers
+        self.networks = {}
+        self.images = set()
+        self.containers = {}
+        self.volumes = {}
+        self.subscribers = []
+        self.closing = threading.Event()
+
+    def _build_server(self):
+        return UnixHTTPServer(self.socket_path, FakeHandler)
+
+    def stop(self):
+        self.closing.set()
+        super().stop()
+
+    # State
+
+    def publish(self, container: dict, action: str):
+        event = {
+            "Type": "container",
+            "Action": action,
+            "status": action,
+            "id": container["Id"],
+            "Actor": {"ID": container["Id"], "Attributes": container["Labels"]},
+        }
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for filters, q in subscribers:
+            if self._match_event(filters, event):
+                q.put(event)
+
+    @staticmethod
+    def _match_event(filters: dict, event: dict) -> bool:
+        ids = filters.get("container")
+        actions = filters.get("event")
+        return (not ids or event["id"] in ids) and (
+            not actions or event["Action"] in actions
+        )
+
+    @staticmethod
+    def _match_labels(filters: dict, labels: dict) -> bool:
+        for label in filters.get("label", []):
+            key, _, value = label.partition("=")
+            if key not in labels or (value and labels[key] != value):
+                return False
+        return True
+
+    @staticmethod
+    def _binds(container: dict) -> dict:
+        binds = (container["Config"].get("HostConfig") or {}).get("Binds") or []
+        return dict(reversed(b.split(":", 1)) for b in binds)
+
+    def _volume_at(self, container: dict, path: str):
+        """Volume mounted at a path of a container, & the path inside it."""
+        for target, volume in self._binds(container).items():
+            if path == target or path.startswith(target + "/"):
+                return self.volumes[volume], path.replace(target, "", 1).lstrip("/")
+            if target.startswith(path.rstrip("/") + "/"):
+                start = len(path.rstrip("/")) + 1
+                prefix = target[start:]
+                return self.volumes[volume], prefix
+        return None, ""
+
+    def _find(self, _id: str):
+        for c in self.containers.values():
+            if c["Id"] == _id or c["Name"] == _id:
+                return c
+        return None
+
+    # Routes
+
+    def ping(self, handler, params, data):
+        handler.send_json(200, "OK")
+
+    def version(self, handler, params, data):
+        handler.send_json(200, {"Version": "24.0.7", "ApiVersion": "1.43"})
+
+    def get_network(self, handler, name, params, data):
+        if name not in self.networks:
+            return handler.send_json(404, {"message": "network not found"})
+        network = self.networks[name]
+        handler.send_json(200, {"Id": network["Id"], "Name": name})
+
+    def create_network(self, handler, params, data):
+        _id = uuid.uuid4().hex
+        self.networks[data["name"]] = {"Id": _id, "Labels": data.get("Labels") or {}}
+        handler.send_json(201, {"Id": _id})
+
+    def prune_networks(self, handler, params, data):
+        filters = json.loads(params.get("filters", "{}"))
+        used = {
+            name
+            for c in self.containers.values()
+            for name in c["Config"]["NetworkingConfig"]["EndpointsConfig"]
+        }
+        deleted = [
+            name
+            for name, network in self.networks.items()
+            if name not in used and self._match_labels(filters, network["Labels"])
+        ]
+        for name in deleted:
+            del self.networks[name]
+        handler.send_json(200, {"NetworksDeleted": deleted})
+
+    def prune_volumes(self, handler, params, data):
+        filters = json.loads(params.get("filters", "{}"))
+        used = {v for c in self.containers.values() for v in self._binds(c).values()}
+        deleted = [
+            name
+            for name, volume in self.volumes.items()
+            if name not in used and self._match_labels(filters, volume["Labels"])
+        ]
+        space = 0
+        for name in deleted:
+            space += sum(len(f) for f in self.volumes.pop(name)["Files"].values())
+        handler.send_json(200, {"VolumesDeleted": deleted, "SpaceReclaimed": space})
+
+    def create_volume(self, handler, params, data):
+        volume = self.volumes.setdefault(data["Name"], {"Labels": {}, "Files": {}})
+        volume["Labels"] = data.get("Labels") or volume["Labels"]
+        handler.send_json(201, {"Name": data["Name"], "Labels": volume["Labels"]})
+
+    def delete_volume(self, handler, name, params, data):
+        if name not in self.volumes:
+            return handler.send_json(404, {"message": "no such volume"})
+        if any(name in self._binds(c).values() for c in self.containers.values()):
+            return handler.send_json(409, {"message": "volume is in use"})
+        del self.volumes[name]
+        handler.send_json(204)
+
+    def stop_container(self, handler, _id, params, data):
+        container = self._find(_id)
+        if not container:
+            return handler.send_json(404, {"message": "No such container"})
+        if container["State"] != "running":
+            return handler.send_json(304)
+        container["State"] = "exited"
+        handler.send_json(204)
+        self.publish(container, "die")
+
+    def get_archive(self, handler, _id, params, data):
+        container = self._find(_id)
+        if not container:
+            return handler.send_json(404, {"message": "No such container"})
+        path = params["path"]
+        volume, _ = self._volume_at(container, path)
+        if volume is None:
+            return handler.send_json(404, {"message": "Could not find the file"})
+        # A path archive holds its base name as top directory, like docker cp.
+        top = path.rstrip("/").rsplit("/", 1)[-1]
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as tar:
+            for name, content in sorted(volume["Files"].items()):
+                info = tarfile.TarInfo(f"{top}/{name}")
+                info.size = len(content)
+                tar.addfile(info, io.BytesIO(content))
+        handler.send_bytes(200, buffer.getvalue(), "application/x-tar")
+
+    def put_archive(self, handler, _id, params, data):
+        container = self._find(_id)
+        if not container:
+            return handler.send_json(404, {"message": "No such container"})
+        volume, prefix = self._volume_at(container, params["path"])
+        if volume is None:
+            return handler.send_json(404, {"message": "Could not find the file"})
+        with tarfile.open(fileobj=io.BytesIO(data or b""), mode="r:*") as tar:
+            for member in tar.getmembers():
+                if member.isfile() and member.name.startswith(prefix + "/"):
+                    name = member.name.replace(prefix + "/", "", 1)
+                    volume["Files"][name] = tar.extractfile(member).read()
+        handler.send_json(200)
+
+    def get_image(self, handler, name, params, data):
+        if name not in self.images:
+            return handler.send_json(404, {"message": "No such image"})
+        digest = f"{name.rsplit(':', 1)[0]}@sha256:{uuid.uuid4().hex}"
+        handler.send_json(200, {"Id": f"sha256:{name}", "RepoDigests": [digest]})
+
+    def pull_image(self, handler, params, data):
+        tag = params.get("tag", "latest")
+        separator = "@" if ":" in tag else ":"
+        handler.start_stream()
+        handler.send_chunk({"status": f"Pulling from {params['fromImage']}"})
+        size = 1024 * 1024
+        for i in range(self.layers):
+            layer = f"layer{i}"
+            for current in (size // 2, size):
+                detail = {"current": current, "total": size}
+                handler.send_chunk(
+                    {"status": "Downloading", "progressDetail": detail, "id": layer}
+                )
+            handler.send_chunk({"status": "Pull complete", "id": layer})
+        handler.end_stream()
+        self.images.add(f"{params['fromImage']}{separator}{tag}")
+
+    def create_container(self, handler, params, data):
+        name = params["name"]
+        if name in self.containers:
+            return handler.send_json(409, {"message": "Conflict"})
+        if data["Image"] not in self.images:
+            return handler.send_json(404, {"message": "No such image"})
+        for volume in self._binds({"Config": data}).values():
+            self.volumes.setdefault(volume, {"Labels": {}, "Files": {}})
+        self.containers[name] = {
+            "Id": uuid.uuid4().hex,
+            "Name": name,
+            "Names": [f"/{name}"],
+            "Image": data["Image"],
+            "Labels": data.get("Labels") or {},
+            "State": "created",
+            "Config": data,
+        }
+        handler.send_json(201, {"Id": self.containers[name]["Id"]})
+
+    def list_containers(self, handler, params, data):
+        filters = json.loads(params.get("filters", "{}"))
+        everything = params.get("all") in ("1", "true")
+        keys = ("Id", "Names", "Image", "Labels", "State")
+        containers = []
+        for c in self.containers.values():
+            running = everything or c["State"] == "running"
+            if running and self._match_labels(filters, c["Labels"]):
+                containers.append({k: c[k] for k in keys})
+        handler.send_json(200, containers)
+
+    def inspect_container(self, handler, _id, params, data):
+        container = self._find(_id)
+        if not container:
+            return handler.send_json(404, {"message": "No such container"})
+        handler.send_json(
+            200,
+            {
+                "Id": container["Id"],
+                "Name": f"/{container['Name']}",
+                "State": {"Status": container["State"]},
+                "Config": {"Labels": container["Labels"]},
+            },
+        )
+
+    def start_container(self, handler, _id, params, data):
+        container = self._find(_id)
+        if not container:
+            return handler.send_json(404, {"message": "No such container"})
+        if container["State"] == "running":
+            return handler.send_json(304)
+        container["State"] = "running"
+        handler.send_json(204)
+        self.publish(container, "start")
+
+    def delete_container(self, handler, _id, params, data):
+        container = self._find(_id)
+        if not container:
+            return handler.send_json(404, {"message": "No such container"})
+        del self.containers[container["Name"]]
+        handler.send_json(204)
+        self.publish(container, "destroy")
+
+    def events(self, handler, params, data):
+        filters = json.loads(params.get("filters", "{}"))
+        q = queue.Queue()
+        with self.lock:
+            self.subscribers.append((filters, q))
+        try:
+            handler.start_stream()
+            while not self.closing.is_set():
+                try:
+                    handler.send_chunk(q.get(timeout=0.01))
+                except queue.Empty:
+                    if handler.client_closed(0.01):
+                        break
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self.lock:
+                self.subscribers.remove((filters, q))
+            handler.close_connection = True
+
+
+class FakeAPI(FakeServer):
+    """apiruns API stand-in on localhost.
+
+    Args:
+        latency (dict, optional): Seconds by `METHOD /path/{template}`.
+    """
+
+    ROUTES = [
+        ("GET", "/ping", "ping"),
+        ("POST", "/admin/models", "create_model"),
+        ("POST", "/{resource}", "create_resource"),
+        ("GET", "/{resource}/{id}", "get_resource"),
+        ("PUT", "/{resource}/{id}", "update_resource"),
+        ("DELETE", "/{resource}/{id}", "delete_resource"),
+    ]
+
+    def __init__(self, latency: dict = None):
+        super().__init__(latency)
+        self.models = {}
+        self.resources = {}
+
+    def _build_server(self):
+        return ThreadingHTTPServer(("127.0.0.1", 0), FakeHandler)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def ping(self, handler, params, data):
+        handler.send_json(200, {"status": "ok"})
+
+    def create_model(self, handler, params, data):
+        with self.lock:
+            self.models[data["path"]] = data
+        handler.send_json(201, data)
+
+    def create_resource(self, handler, resource, params, data):
+        _id = uuid.uuid4().hex
+        with self.lock:
+            self.resources[(resource, _id)] = data
+        handler.send_json(201, dict(data or {}, public_id=_id))
+
+    def get_resource(self, handler, resource, _id, params, data):
+        if (resource, _id) not in self.resources:
+            return handler.send_json(404, {"message": "not found"})
+        handler.send_json(200, dict(self.resources[(resource, _id)], public_id=_id))
+
+    def update_resource(self, handler, resource, _id, params, data):
+        if (resource, _id) not in self.resources:
+            return handler.send_json(404, {"message": "not found"})
+        with self.lock:
+            self.resources[(resource, _id)] = data
+        handler.send_json(200, dict(data or {}, public_id=_id))
+
+    def delete_resource(self, handler, resource, _id, params, data):
+        with self.lock:
+            found = self.resources.pop((resource, _id), None)
+        handler.send_json(404 if found is None else 204)
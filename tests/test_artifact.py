@@ -0,0 +1,82 @@
+import json
+import pytest
+from apiruns.artifact import Artifact
+from apiruns.cache import ImageCache
+from apiruns.clients import ServiceImages
+from apiruns.exceptions import ErrorReadingArtifact
+
+services = {
+    "users": [{"path": "/users", "schema": {"name": {"type": "string"}}}],
+    "books": [{"path": "/books", "schema": {"title": {"type": "string"}}}],
+}
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("APIRUNS_CACHE_DIR", str(tmp_path / "cache"))
+
+
+def test_compile_is_canonical():
+    reordered = {
+        "users": [{"schema": {"name": {"type": "string"}}, "path": "/users"}],
+        "books": services["books"],
+    }
+    artifact = Artifact.compile(services, ServiceImages())
+    # Asserts
+    assert artifact == Artifact.compile(reordered, ServiceImages())
+    assert [s["name"] for s in artifact["services"]] == ["users", "books"]
+    assert artifact["services"][0]["routes"] == {"users": {"": 0}}
+    assert artifact["images"] == {
+        "api": "josesalasdev/apiruns:latest",
+        "db": "mongo:latest",
+        "proxy": "nginx:alpine",
+    }
+
+
+def test_write_and_load(tmp_path):
+    path = tmp_path / "apiruns-build.json"
+    images = ServiceImages(db="mongo@sha256:9d0f")
+    digest = Artifact.write(str(path), services, images)
+    loaded, loaded_images = Artifact.load(str(path))
+    # Asserts
+    assert list(loaded) == ["users", "books"]
+    assert loaded == services
+    assert loaded_images == images
+    content = json.loads(path.read_text())
+    assert content["hash"] == digest
+    assert "\n" not in path.read_text()
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_load_missing(tmp_path):
+    with pytest.raises(ErrorReadingArtifact):
+        Artifact.load(str(tmp_path / "missing.json"))
+
+
+def test_load_tampered(tmp_path):
+    path = tmp_path / "apiruns-build.json"
+    Artifact.write(str(path), services, ServiceImages())
+    content = json.loads(path.read_text())
+    content["services"][0]["endpoints"] = []
+    path.write_text(json.dumps(content))
+    with pytest.raises(ErrorReadingArtifact) as e:
+        Artifact.load(str(path))
+    # Asserts
+    assert "hash" in e.value.errors
+
+
+def test_load_other_format(tmp_path):
+    path = tmp_path / "apiruns-build.json"
+    path.write_text(json.dumps({"format": 99}))
+    with pytest.raises(ErrorReadingArtifact):
+        Artifact.load(str(path))
+
+
+def test_resolve_images(cache):
+    ImageCache.set("mongo:latest", "sha256:1b2c", "mongo@sha256:9d0f")
+    ImageCache.set("nginx:alpine", "sha256:3d4e", None)
+    images = Artifact.resolve_images(ServiceImages())
+    # Asserts
+    assert images == ServiceImages(
+        api="josesalasdev/apiruns:latest", db="mongo@sha256:9d0f", proxy="nginx:alpine"
+    )
@@ -0,0 +1,87 @@
+import socket
+import json
+import pytest
+from asyncio import run
+from apiruns.bench import EndpointStats
+from apiruns.bench import LoadGenerator
+from apiruns.bench import render_report
+from benchmarks.fakes import FakeAPI
+
+
+@pytest.fixture
+def api():
+    with FakeAPI() as api:
+        yield api
+
+
+endpoints = [
+    {"path": "/users/", "schema": {"name": {"type": "string", "required": True}}},
+    {"path": "/books", "schema": {"pages": {"type": "integer", "min": 1}}},
+]
+
+
+def test_endpoint_stats():
+    stats = EndpointStats()
+    for i in range(1, 101):
+        stats.record(i / 1000, ok=i != 100)
+
+    # Asserts
+    assert stats.percentile(50) == 0.05
+    assert stats.percentile(99) == 0.099
+    assert stats.to_json(elapsed=2.0) == {
+        "requests": 100,
+        "errors": 1,
+        "rps": 50.0,
+        "p50_ms": 50.0,
+        "p95_ms": 95.0,
+        "p99_ms": 99.0,
+    }
+    assert EndpointStats().percentile(50) == 0.0
+
+
+def test_load_generator_closed_loop(api):
+    generator = LoadGenerator(api.url, endpoints, concurrency=4, duration=0.3, seed=1)
+    report = run(generator.run())
+
+    # Asserts
+    assert set(report) == {
+        f"{method} {path}"
+        for method in LoadGenerator.METHODS
+        for path in ("/users", "/users/{id}", "/books", "/books/{id}")
+        if (method == "POST") == ("{id}" not in path)
+    }
+    assert all(r["errors"] == 0 and r["requests"] > 0 for r in report.values())
+    assert api.requests["POST /{resource}"] == report["POST /users"]["requests"] + (
+        report["POST /books"]["requests"]
+    )
+    assert not api.resources
+    json.dumps(report)
+
+
+def test_load_generator_open_loop(api):
+    generator = LoadGenerator(api.url, endpoints, rate=200, duration=0.2)
+    report = run(generator.run())
+
+    # Asserts, an iteration every 20ms.
+    posts = report["POST /users"]["requests"] + report["POST /books"]["requests"]
+    assert 5 <= posts <= 11
+
+
+def test_load_generator_connection_errors():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    host = f"http://127.0.0.1:{port}"
+    generator = LoadGenerator(host, endpoints[:1], concurrency=2, duration=0.05)
+    report = run(generator.run())
+
+    # Asserts
+    assert list(report) == ["POST /users"]
+    assert report["POST /users"]["errors"] == report["POST /users"]["requests"]
+
+
+def test_render_report():
+    report = {"POST /users": EndpointStats([0.001, 0.002]).to_json(1.0)}
+    text = render_report("myapi", report)
+    assert text.splitlines()[0] == "`myapi`"
+    assert "POST /users" in text.splitlines()[2]
@@ -0,0 +1,56 @@
+from apiruns.clients import DockerClient
+from benchmarks import bench_lifecycle
+
+
+def test_lifecycle_against_fakes():
+    results = bench_lifecycle.run(latency=0.0, models=5)
+
+    cold = results["compose_service_cold"]["requests"]
+    warm = results["compose_service_warm"]["requests"]
+    assert cold["POST /images/create"] == 2
+    assert "POST /images/create" not in warm
+    assert "GET /images/{name}/json" not in warm
+    assert results["service_down"]["request_count"] == 3
+    unchanged = results["compose_service_unchanged"]["requests"]
+    assert "POST /containers/create" not in unchanged
+    assert "POST /containers/{id}/start" not in unchanged
+    # One listing for the warm, the 4 & the replicas services, then a single
+    # prune of every apiruns volume.
+    down_all = results["down_all_prune"]["requests"]
+    assert down_all["GET /containers/json"] == 1
+    assert down_all["DELETE /containers/{id}"] == 2 + 4 * 2 + 1 + 4 + 1
+    assert down_all["POST /volumes/prune"] == 1
+    assert down_all["POST /networks/prune"] == 1
+    assert results["create_models"]["requests"] == {"POST /admin/models": 5}
+    assert results["up"]["requests"]["POST /admin/models"] == 5
+    assert results["reload_one_model"]["requests"] == {"POST /admin/models": 1}
+    assert results["reload_one_model"]["wall_ms"] < 1000
+
+
+def test_snapshot_restore_against_fakes():
+    with bench_lifecycle.environment(0.0) as (tmp, engine, _):
+        DockerClient.compose_service("bench", start=True)
+        volume = engine.volumes["apiruns-bench-data"]
+        data = bench_lifecycle.build_data(64 * 1024, files=2)
+        volume["Files"] = dict(data)
+        snapshot = tmp / "snapshots" / "bench.tar.gz"
+
+        sizes = DockerClient.snapshot_services({"bench": snapshot})
+        volume["Files"]["stale.wt"] = b"left by a later run"
+        DockerClient.restore_services({"bench": 0}, {"bench": snapshot})
+
+        # Asserts
+        assert sizes["bench"] > snapshot.stat().st_size
+        assert engine.volumes["apiruns-bench-data"]["Files"] == data
+        db = engine.containers["dbmongo-bench"]
+        assert db["State"] == "running"
+        assert db["Labels"]["service"] == "apiruns_offline-bench"
+
+
+def test_compare_regressions():
+    baseline = {"scenarios": {"up": {"request_count": 10, "wall_ms": 100.0}}}
+    same = {"scenarios": {"up": {"request_count": 10, "wall_ms": 110.0}}}
+    worse = {"scenarios": {"up": {"request_count": 11, "wall_ms": 130.0}}}
+
+    assert bench_lifecycle.compare(same, baseline, 0.2) == []
+    assert len(bench_lifecycle.compare(worse, baseline, 0.2)) == 2
@@ -0,0 +1,102 @@
+import pytest
+from unittest.mock import patch
+from apiruns.cache import cache_dir
+from apiruns.cache import read_json
+from apiruns.cache import write_json
+from apiruns.cache import ImageCache
+from apiruns.cache import ManifestCache
+from apiruns.cache import ModelsState
+from apiruns.cache import Snapshots
+from apiruns.exceptions import ErrorInvalidSnapshotName
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("APIRUNS_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_cache_dir(cache):
+    assert cache_dir() == cache
+
+
+def test_cache_dir_default(monkeypatch):
+    monkeypatch.delenv("APIRUNS_CACHE_DIR")
+    monkeypatch.setenv("XDG_CACHE_HOME", "/tmp/xdg")
+    assert str(cache_dir()) == "/tmp/xdg/apiruns"
+
+
+def test_write_and_read_json(cache):
+    path = cache / "sub" / "file.json"
+    write_json(path, {"a": 1})
+    assert read_json(path) == {"a": 1}
+
+
+def test_read_json_missing_or_corrupt(cache):
+    assert read_json(cache / "missing.json") is None
+    (cache / "corrupt.json").write_text("{")
+    assert read_json(cache / "corrupt.json") is None
+
+
+def test_image_cache_set_and_get():
+    ImageCache.set("mongo:latest", "sha256:1", "mongo@sha256:9")
+    entry = ImageCache.get("mongo:latest")
+    assert entry["id"] == "sha256:1"
+    assert entry["digest"] == "mongo@sha256:9"
+    assert ImageCache.get("mongo:6.0") is None
+
+
+@patch("apiruns.cache.time.time")
+def test_image_cache_tag_expires(mock_time):
+    mock_time.return_value = 1000.0
+    ImageCache.set("mongo:latest", "sha256:1", None)
+    mock_time.return_value = 1000.0 + ImageCache.TTL + 1
+    assert ImageCache.get("mongo:latest") is None
+
+
+@patch("apiruns.cache.time.time")
+def test_image_cache_digest_never_expires(mock_time):
+    mock_time.return_value = 1000.0
+    ImageCache.set("mongo@sha256:9", "sha256:1", "mongo@sha256:9")
+    mock_time.return_value = 1000.0 + ImageCache.TTL + 1
+    assert ImageCache.get("mongo@sha256:9")["id"] == "sha256:1"
+
+
+def test_image_cache_invalidate():
+    ImageCache.set("mongo:latest", "sha256:1", None)
+    ImageCache.invalidate("mongo:latest")
+    ImageCache.invalidate("mongo:6.0")
+    assert ImageCache.get("mongo:latest") is None
+
+
+def test_manifest_cache(tmp_path):
+    path = str(tmp_path / "api.yml")
+    ManifestCache.set(path, b"content", {"myapi": [{"path": "/users"}]})
+    assert ManifestCache.get(path, b"content") == {"myapi": [{"path": "/users"}]}
+    assert ManifestCache.get(path, b"changed") is None
+
+
+def test_manifest_cache_not_serializable(tmp_path):
+    path = str(tmp_path / "api.yml")
+    ManifestCache.set(path, b"content", {"myapi": [{"path": {1, 2}}]})
+    assert ManifestCache.get(path, b"content") is None
+    assert not list(tmp_path.glob("**/*.tmp"))
+
+
+def test_models_state():
+    ModelsState.set("myapi", ["C2", "C1"], {"/users": "abc"})
+    assert ModelsState.get("myapi", ["C1", "C2"]) == {"/users": "abc"}
+    assert ModelsState.get("myapi", ["C1", "C3"]) is None
+    assert ModelsState.get("myapi", []) is None
+    assert ModelsState.get("other", ["C1", "C2"]) is None
+
+
+def test_snapshots_path(cache):
+    path = Snapshots.path("baseline-1.0", "users")
+    assert path == cache / "snapshots" / "baseline-1.0" / "users.tar.gz"
+
+
+@pytest.mark.parametrize("name", ["", "../etc", "a/b", ".hidden"])
+def test_snapshots_invalid_name(name):
+    with pytest.raises(ErrorInvalidSnapshotName):
+        Snapshots.path(name, "users")
@@ -1,19 +1,36 @@
+import gzip
+import json
 import httpx
 import pytest
-import requests
-from unittest.mock import patch, call
+import asyncio
+from asyncio import run
+from urllib.parse import unquote
+from unittest.mock import patch, call, AsyncMock, MagicMock
 from apiruns.exceptions import ErrorDockerEngineAPI
 from apiruns.exceptions import ErrorCreatingNetwork
 from apiruns.exceptions import ErrorPullingImage
 from apiruns.exceptions import ErrorGettingContainerStatus
 from apiruns.exceptions import ErrorListingContainers
 from apiruns.exceptions import ErrorDeletingContainers
+from apiruns.exceptions import ErrorPruningResources
+from apiruns.exceptions import ErrorCreatingVolume
+from apiruns.exceptions import ErrorDeletingVolume
+from apiruns.exceptions import ErrorCopyingData
+from apiruns.exceptions import ErrorStoppingContainer
 from apiruns.exceptions import ErrorCreatingContainer
 from apiruns.exceptions import ErrorStartingAContainer
 from apiruns.exceptions import ErrorContainerExited
+from apiruns.exceptions import ErrorContainerTimeout
 from apiruns.exceptions import ErrorAPIClient
+from apiruns.exceptions import ErrorImageNotFound
+from apiruns.exceptions import ErrorAPINotReady
+from apiruns.exceptions import ErrorCreatingModels
 from apiruns.clients import ContainerConfig
+from apiruns.clients import PullProgress
+from apiruns.clients import ServiceImages
+from apiruns.cache import ImageCache
 from apiruns.clients import DockerClient
+from apiruns.clients import AsyncDockerClient
 from apiruns.clients import APIClient
 from dataclasses import dataclass
 from dataclasses import field
@@ -29,6 +46,31 @@ class MockResponse:
         return self.data
 
 
+@dataclass
+class MockStream:
+    status_code: int = 200
+    lines: list = field(default_factory=list)
+    text: str = ""
+    chunks: list = field(default_factory=list)
+
+    async def __aenter__(self):
+        return self
+
+    async def aread(self):
+        return self.text.encode()
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def aiter_lines(self):
+        for line in self.lines:
+            yield line
+
+    async def aiter_raw(self, chunk_size=None):
+        for chunk in self.chunks:
+            yield chunk
+
+
 class TestContainerConfig:
     def init(self) -> ContainerConfig:
         return ContainerConfig(
@@ -49,6 +91,26 @@ class TestContainerConfig:
         expec = obj._build_port_bind()
         assert expec == {"27017/tcp": [{"HostIp": "", "HostPort": "27017"}]}
 
+    def test_to_json_with_volumes(self):
+        obj = self.init()
+        obj.volumes = {"apiruns-users-data": "/data/db"}
+        resp = obj.to_json()
+        assert resp["HostConfig"] == {"Binds": ["apiruns-users-data:/data/db"]}
+
+    def test_to_json_with_command_and_docker_host_port(self):
+        obj = self.init()
+        obj.host_port = ""
+        obj.command = ["nginx"]
+        resp = obj.to_json()
+        assert resp["Cmd"] == ["nginx"]
+        assert resp["PortBindings"] == {"27017/tcp": [{"HostIp": "", "HostPort": ""}]}
+
+    def test_build_port_bind_with_host_port(self):
+        obj = self.init()
+        obj.host_port = "27018"
+        expec = obj._build_port_bind()
+        assert expec == {"27017/tcp": [{"HostIp": "", "HostPort": "27018"}]}
+
     def test_to_json(self):
         obj = self.init()
         resp = obj.to_json()
@@ -56,29 +118,108 @@ class TestContainerConfig:
             "Env": ["PORT=27017"],
             "ExposedPorts": {"27017/tcp": {}},
             "Image": "mongo",
-            "Labels": {"service": "apiruns"},
+            "Labels": {"service": "apiruns", "apiruns.fingerprint": obj.fingerprint()},
             "NetworkingConfig": {"EndpointsConfig": {"apiruns": {"NetworkID": "N123"}}},
             "PortBindings": {"27017/tcp": [{"HostIp": "", "HostPort": "27017"}]},
         }
         assert resp == expec
 
+    def test_fingerprint(self):
+        obj = self.init()
+        same = self.init()
+        fingerprint = obj.fingerprint()
+        # Asserts
+        assert len(fingerprint) == 64
+        assert same.fingerprint() == fingerprint
+        same.environment = ["PORT=27018"]
+        assert same.fingerprint() != fingerprint
 
-class TestDockerClient:
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("APIRUNS_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+class TestServiceImages:
+    def test_defaults(self):
+        images = ServiceImages()
+        assert images.api == "josesalasdev/apiruns:latest"
+        assert images.db == "mongo:latest"
+
+    def test_build_with_version(self):
+        images = ServiceImages.build(version="1.0.1")
+        assert images.api == "josesalasdev/apiruns:1.0.1"
+
+    def test_build_with_references(self):
+        images = ServiceImages.build(
+            version="1.0.1", api="my/api@sha256:9d0f", db="mongo:6.0"
+        )
+        assert images.api == "my/api@sha256:9d0f"
+        assert images.db == "mongo:6.0"
+
+
+class TestPullProgress:
+    def test_update(self):
+        progress = PullProgress("mongo")
+        progress.update({"status": "Pulling from library/mongo"})
+        progress.update({"status": "Pulling fs layer", "id": "L1"})
+        progress.update(
+            {
+                "status": "Downloading",
+                "progressDetail": {"current": 512, "total": 1024},
+                "id": "L1",
+            }
+        )
+        progress.update(
+            {
+                "status": "Downloading",
+                "progressDetail": {"current": 10, "total": 2048},
+                "id": "L2",
+            }
+        )
+        # Asserts
+        assert progress.downloaded == 522
+        assert progress.total == 3072
+        progress.update({"status": "Download complete", "id": "L1"})
+        assert progress.layers["L1"] == (1024, 1024)
+        assert progress.render().startswith("`mongo`: 1/2 layers")
+
+    def test_should_report(self):
+        progress = PullProgress("mongo", interval=60)
+        assert progress.should_report() is False
+        progress.reported -= 61
+        assert progress.should_report() is True
+        assert progress.should_report() is False
+
+    def test_render_done(self):
+        progress = PullProgress("mongo")
+        progress.layers = {"L1": (2 * 1024 * 1024, 2 * 1024 * 1024)}
+        assert progress.render(done=True).startswith("Pulled `mongo`: 2.0 MB in")
+
+
+class TestAsyncDockerClient:
 
     headers = {"Content-Type": "application/json"}
+    labels = {"service": "apiruns_offline-MyAPI"}
 
-    @patch("apiruns.clients.client.get")
+    @pytest.fixture(autouse=True)
+    def session(self):
+        with patch.object(AsyncDockerClient, "client", MagicMock()):
+            yield
+
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
     def test_create_network_error_with_docker(self, mock_client):
         # Mocks
         mock_client.side_effect = httpx.RequestError("error")
         # Asserts
         with pytest.raises(ErrorDockerEngineAPI):
-            DockerClient._create_network()
+            run(AsyncDockerClient._create_network())
 
-    @patch("apiruns.clients.client.get")
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
     def test_create_network_exists(self, mock_client):
         mock_client.return_value = MockResponse(data={"Id": "123"})
-        resp = DockerClient._create_network()
+        resp = run(AsyncDockerClient._create_network())
 
         # Asserts
         assert resp == "123"
@@ -86,13 +227,13 @@ class TestDockerClient:
             "http://localhost/networks/apiruns", headers=self.headers
         )
 
-    @patch("apiruns.clients.client")
+    @patch("apiruns.clients.AsyncDockerClient.client", new_callable=AsyncMock)
     def test_create_network_new(self, mock_client):
         mock_client.get.return_value = MockResponse(status_code=404)
         mock_client.post.return_value = MockResponse(
             status_code=201, data={"Id": "1234"}
         )
-        resp = DockerClient._create_network()
+        resp = run(AsyncDockerClient._create_network())
 
         # Asserts
         assert resp == "1234"
@@ -102,227 +243,398 @@ class TestDockerClient:
         mock_client.post.assert_called_once_with(
             "http://localhost/networks/create",
             headers=self.headers,
-            json={"name": "apiruns"},
+            json={"name": "apiruns", "Labels": {"service": "apiruns_offline"}},
         )
 
-    @patch("apiruns.clients.client")
+    @patch("apiruns.clients.AsyncDockerClient.client", new_callable=AsyncMock)
     def test_create_network_error_with_post_request(self, mock_client):
         mock_client.get.return_value = MockResponse(status_code=404)
         mock_client.post.return_value = MockResponse(
             status_code=500,
         )
         with pytest.raises(ErrorCreatingNetwork):
-            DockerClient._create_network()
+            run(AsyncDockerClient._create_network())
 
-    @patch("apiruns.clients.client.get")
-    def test_pull_image_error(self, mock_client):
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
+    def test_get_image_error(self, mock_client):
         # Mocks
         mock_client.side_effect = httpx.RequestError("error")
         # Asserts
         with pytest.raises(ErrorDockerEngineAPI):
-            DockerClient._pull_image("mongo")
+            run(AsyncDockerClient._get_image("mongo:latest"))
 
-    @patch("apiruns.clients.client")
-    def test_pull_image_with_image_exists(self, mock_client):
-        mock_client.get.return_value = MockResponse(
-            status_code=200, data={"name": "mongo"}
-        )
-        resp = DockerClient._pull_image("mongo")
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
+    def test_get_image_success(self, mock_client):
+        mock_client.return_value = MockResponse(data={"Id": "sha256:1"})
+        resp = run(AsyncDockerClient._get_image("mongo@sha256:9d0f"))
 
         # Asserts
-        assert resp == None
-        mock_client.get.assert_called_once_with(
-            "http://localhost/images/mongo:latest/json", headers=self.headers
+        assert resp == {"Id": "sha256:1"}
+        mock_client.assert_called_once_with(
+            "http://localhost/images/mongo@sha256:9d0f/json", headers=self.headers
         )
 
-    @patch("apiruns.clients.client")
+    @patch("apiruns.clients.AsyncDockerClient._pull_image")
+    @patch("apiruns.clients.AsyncDockerClient._get_image")
+    def test_ensure_image_cached(self, mock_get, mock_pull, cache):
+        ImageCache.set("mongo:latest", "sha256:1", None)
+        resp = run(AsyncDockerClient._ensure_image("mongo:latest"))
+
+        # Asserts
+        assert resp["id"] == "sha256:1"
+        mock_get.assert_not_called()
+        mock_pull.assert_not_called()
+
+    @patch("apiruns.clients.AsyncDockerClient._pull_image")
+    @patch("apiruns.clients.AsyncDockerClient._get_image")
+    def test_ensure_image_present(self, mock_get, mock_pull, cache):
+        mock_get.return_value = {"Id": "sha256:1", "RepoDigests": ["mongo@sha256:9"]}
+        resp = run(AsyncDockerClient._ensure_image("mongo:latest"))
+
+        # Asserts
+        assert resp["id"] == "sha256:1"
+        assert resp["digest"] == "mongo@sha256:9"
+        mock_pull.assert_not_called()
+        assert ImageCache.get("mongo:latest")["id"] == "sha256:1"
+
+    @patch("apiruns.clients.AsyncDockerClient._pull_image")
+    @patch("apiruns.clients.AsyncDockerClient._get_image")
+    def test_ensure_image_missing(self, mock_get, mock_pull, cache):
+        mock_get.side_effect = [None, {"Id": "sha256:1"}]
+        resp = run(AsyncDockerClient._ensure_image("mongo:6.0"))
+
+        # Asserts
+        assert resp["id"] == "sha256:1"
+        assert resp["digest"] is None
+        mock_pull.assert_awaited_once_with("mongo:6.0")
+
+    @patch("apiruns.clients.AsyncDockerClient._pull_image")
+    @patch("apiruns.clients.AsyncDockerClient._get_image")
+    def test_ensure_image_not_found(self, mock_get, mock_pull, cache):
+        mock_get.return_value = None
+        with pytest.raises(ErrorPullingImage):
+            run(AsyncDockerClient._ensure_image("mongo:6.0"))
+
+    @patch("apiruns.clients.AsyncDockerClient.client", new_callable=AsyncMock)
     def test_pull_image_with_image_not_found_and_error_docker(self, mock_client):
-        mock_client.get.return_value = MockResponse(status_code=404)
-        mock_client.post.side_effect = httpx.RequestError("error")
+        mock_client.stream = MagicMock(side_effect=httpx.RequestError("error"))
         with pytest.raises(ErrorDockerEngineAPI):
-            DockerClient._pull_image("mongo")
+            run(AsyncDockerClient._pull_image("mongo"))
 
-    @patch("apiruns.clients.client")
+    @patch("apiruns.clients.AsyncDockerClient.client", new_callable=AsyncMock)
     def test_pull_image_with_image_not_found_and_bad_request(self, mock_client):
-        mock_client.get.return_value = MockResponse(status_code=404)
-        mock_client.post.return_value = MockResponse(status_code=400)
+        mock_client.stream = MagicMock(return_value=MockStream(status_code=400))
         with pytest.raises(ErrorPullingImage):
-            DockerClient._pull_image("mongo")
+            run(AsyncDockerClient._pull_image("mongo"))
 
     @patch("apiruns.clients.typer.echo")
-    @patch("apiruns.clients.client")
-    def test_pull_image_with_image_not_found_and_bad_request(
-        self, mock_client, mock_echo
-    ):
-        mock_client.get.return_value = MockResponse(status_code=404)
-        mock_client.post.return_value = MockResponse(status_code=200)
-        DockerClient._pull_image("mongo")
+    @patch("apiruns.clients.AsyncDockerClient.client", new_callable=AsyncMock)
+    def test_pull_image_with_error_in_stream(self, mock_client, mock_echo):
+        lines = [
+            json.dumps({"status": "Pulling fs layer", "id": "L1"}),
+            json.dumps({"error": "unauthorized"}),
+            json.dumps({"status": "Pull complete", "id": "L1"}),
+        ]
+        mock_client.stream = MagicMock(return_value=MockStream(lines=lines))
+        with pytest.raises(ErrorPullingImage) as e:
+            run(AsyncDockerClient._pull_image("mongo"))
+        assert e.value.errors == "unauthorized"
+
+    @patch("apiruns.clients.typer.echo")
+    @patch("apiruns.clients.AsyncDockerClient.client", new_callable=AsyncMock)
+    def test_pull_image_with_image_not_found_and_success(self, mock_client, mock_echo):
+        lines = [
+            json.dumps({"status": "Pulling from library/mongo", "id": "latest"}),
+            "",
+            json.dumps({"status": "Pull complete", "id": "L1"}),
+        ]
+        mock_client.stream = MagicMock(return_value=MockStream(lines=lines))
+        run(AsyncDockerClient._pull_image("mongo:latest"))
 
         # Assserts
-        mock_echo.assert_called_once_with("Pulling `mongo` image.")
-        mock_client.get.assert_called_once_with(
-            "http://localhost/images/mongo:latest/json", headers=self.headers
-        )
-        mock_client.post.assert_called_once_with(
+        assert mock_echo.call_args_list[0] == call("Pulling `mongo:latest` image.")
+        assert mock_echo.call_args_list[-1].args[0].startswith("Pulled `mongo:latest`")
+        mock_client.stream.assert_called_once_with(
+            "POST",
             "http://localhost/images/create?fromImage=mongo&tag=latest",
             headers=self.headers,
             json={},
+            timeout=None,
         )
 
-    @patch("apiruns.clients.client.get")
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
     def test_ping_with_docker_error(self, mock_client):
         # Mocks
         mock_client.side_effect = httpx.RequestError("error")
         # Asserts
         with pytest.raises(ErrorDockerEngineAPI):
-            DockerClient._ping()
+            run(AsyncDockerClient._ping())
 
-    @patch("apiruns.clients.client.get")
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
     def test_ping_with_unsuccesful_request(self, mock_client):
         # Mocks
         mock_client.return_value = MockResponse(status_code=500)
         # Asserts
         with pytest.raises(ErrorDockerEngineAPI):
-            DockerClient._ping()
+            run(AsyncDockerClient._ping())
         mock_client.assert_called_once_with(
             "http://localhost/_ping", headers=self.headers
         )
 
-    @patch("apiruns.clients.client.get")
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
     def test_ping_with_success(self, mock_client):
         # Mocks
         mock_client.return_value = MockResponse(status_code=200)
-        DockerClient._ping()
+        run(AsyncDockerClient._ping())
         # Asserts
         mock_client.assert_called_once_with(
             "http://localhost/_ping", headers=self.headers
         )
 
-    @patch("apiruns.clients.client.get")
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
     def test_container_status_with_docker_error(self, mock_client):
         # Mocks
         mock_client.side_effect = httpx.RequestError("error")
         # Asserts
         with pytest.raises(ErrorDockerEngineAPI):
-            DockerClient._get_container_status("ID123")
+            run(AsyncDockerClient._get_container_status("ID123"))
 
-    @patch("apiruns.clients.client.get")
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
     def test_container_status_with_unsuccesful_request(self, mock_client):
         # Mocks
         mock_client.return_value = MockResponse(status_code=500)
         # Asserts
         with pytest.raises(ErrorGettingContainerStatus):
-            DockerClient._get_container_status("ID123")
+            run(AsyncDockerClient._get_container_status("ID123"))
         mock_client.assert_called_once_with(
             "http://localhost/containers/ID123/json", headers=self.headers
         )
 
-    @patch("apiruns.clients.client.get")
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
     def test_container_status_with_success(self, mock_client):
         # Mocks
         mock_client.return_value = MockResponse(
             status_code=200, data={"State": {"Status": "exited"}}
         )
-        DockerClient._get_container_status("ID123")
+        run(AsyncDockerClient._get_container_status("ID123"))
         # Asserts
         mock_client.assert_called_once_with(
             "http://localhost/containers/ID123/json", headers=self.headers
         )
 
-    @patch("apiruns.clients.client.get")
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
     def test_list_containers_by_name_with_docker_error(self, mock_client):
         # Mocks
         mock_client.side_effect = httpx.RequestError("error")
         # Asserts
         with pytest.raises(ErrorDockerEngineAPI):
-            DockerClient._list_containers_by_name("MyAPI")
+            run(AsyncDockerClient._list_containers_by_name("MyAPI"))
 
-    @patch("apiruns.clients.client.get")
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
     def test_list_containers_by_name_with_unsuccesful_request(self, mock_client):
         # Mocks
         mock_client.return_value = MockResponse(status_code=500)
         # Asserts
         with pytest.raises(ErrorListingContainers):
-            DockerClient._list_containers_by_name("MyAPI")
+            run(AsyncDockerClient._list_containers_by_name("MyAPI"))
 
-        filters = DockerClient._build_labels_filters("MyAPI")
-        url = f"http://localhost/containers/json?filters={filters}"
+        filters = AsyncDockerClient._build_labels_filters("MyAPI")
+        url = f"http://localhost/containers/json?all=true&filters={filters}"
         mock_client.assert_called_once_with(url, headers=self.headers)
 
-    @patch("apiruns.clients.client.get")
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
     def test_list_containers_by_name_with_success(self, mock_client):
         # Mocks
         mock_client.return_value = MockResponse(status_code=200, data=[])
-        response = DockerClient._list_containers_by_name("MyAPI")
+        response = run(AsyncDockerClient._list_containers_by_name("MyAPI"))
         # Asserts
-        filters = DockerClient._build_labels_filters("MyAPI")
-        url = f"http://localhost/containers/json?filters={filters}"
+        filters = AsyncDockerClient._build_labels_filters("MyAPI")
+        url = f"http://localhost/containers/json?all=true&filters={filters}"
         mock_client.assert_called_once_with(url, headers=self.headers)
         assert response == []
 
-    @patch("apiruns.clients.client.delete")
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
+    def test_list_apiruns_containers(self, mock_client):
+        # Mocks
+        mock_client.return_value = MockResponse(
+            data=[
+                {"Id": "1", "Labels": {"service": "apiruns_offline-users"}},
+                {"Id": "2", "Labels": {"service": "web"}},
+            ]
+        )
+        response = run(AsyncDockerClient._list_apiruns_containers())
+        # Asserts
+        assert [c["Id"] for c in response] == ["1"]
+        url = mock_client.call_args[0][0]
+        assert url.startswith("http://localhost/containers/json?all=true&filters=")
+        assert json.loads(unquote(url.split("filters=")[1])) == {"label": ["service"]}
+
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
+    def test_list_apiruns_containers_with_unsuccesful_request(self, mock_client):
+        mock_client.return_value = MockResponse(status_code=500)
+        # Asserts
+        with pytest.raises(ErrorListingContainers):
+            run(AsyncDockerClient._list_apiruns_containers())
+
+    def test_build_prune_filters(self):
+        volumes = AsyncDockerClient._build_prune_filters(
+            "apiruns.volume=users", all_volumes=True
+        )
+        network = AsyncDockerClient._build_prune_filters("service=apiruns_offline")
+        # Asserts
+        assert json.loads(unquote(volumes)) == {
+            "label": ["apiruns.volume=users"],
+            "all": ["true"],
+        }
+        assert json.loads(unquote(network)) == {"label": ["service=apiruns_offline"]}
+
+    @patch("apiruns.clients.AsyncDockerClient.client.post", new_callable=AsyncMock)
+    def test_prune(self, mock_client):
+        mock_client.return_value = MockResponse(data={"NetworksDeleted": ["apiruns"]})
+        response = run(AsyncDockerClient._prune("networks", "F"))
+        # Asserts
+        assert response == {"NetworksDeleted": ["apiruns"]}
+        mock_client.assert_called_once_with(
+            "http://localhost/networks/prune?filters=F", headers=self.headers
+        )
+
+    @patch("apiruns.clients.AsyncDockerClient.client.post", new_callable=AsyncMock)
+    def test_prune_with_unsuccesful_request(self, mock_client):
+        mock_client.return_value = MockResponse(status_code=409)
+        # Asserts
+        with pytest.raises(ErrorPruningResources):
+            run(AsyncDockerClient._prune("volumes", "F"))
+
+    @patch("apiruns.clients.AsyncDockerClient.client.post", new_callable=AsyncMock)
+    def test_prune_with_docker_error(self, mock_client):
+        mock_client.side_effect = httpx.RequestError("error")
+        # Asserts
+        with pytest.raises(ErrorDockerEngineAPI):
+            run(AsyncDockerClient._prune("volumes", "F"))
+
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
+    def test_api_version(self, mock_client):
+        mock_client.return_value = MockResponse(data={"ApiVersion": "1.43"})
+        # Asserts
+        assert run(AsyncDockerClient._api_version()) == (1, 43)
+        mock_client.assert_called_once_with(
+            "http://localhost/version", headers=self.headers
+        )
+
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
+    def test_api_version_with_unsuccesful_request(self, mock_client):
+        mock_client.return_value = MockResponse(status_code=500)
+        # Asserts
+        with pytest.raises(ErrorDockerEngineAPI):
+            run(AsyncDockerClient._api_version())
+
+    @patch("apiruns.clients.AsyncDockerClient._api_version", return_value=(1, 43))
+    @patch("apiruns.clients.AsyncDockerClient._prune")
+    @patch("apiruns.clients.typer.echo")
+    def test_prune_resources(self, mock_echo, mock_prune, mock_version):
+        mock_prune.side_effect = [
+            {"VolumesDeleted": ["a"], "SpaceReclaimed": 1024 * 1024},
+            {"VolumesDeleted": None, "SpaceReclaimed": 0},
+            {"NetworksDeleted": ["apiruns"]},
+        ]
+        run(AsyncDockerClient._prune_resources(["users", "books"]))
+        # Asserts
+        kinds = [c[0][0] for c in mock_prune.call_args_list]
+        assert kinds == ["volumes", "volumes", "networks"]
+        filters = [json.loads(unquote(c[0][1])) for c in mock_prune.call_args_list]
+        assert filters[0]["label"] == ["apiruns.volume=users"]
+        assert filters[1]["label"] == ["apiruns.volume=books"]
+        assert filters[0]["all"] == ["true"]
+        mock_echo.assert_called_once_with("Pruned 1 volumes (1.0 MB) & 1 networks")
+
+    @patch("apiruns.clients.AsyncDockerClient._api_version", return_value=(1, 41))
+    @patch("apiruns.clients.AsyncDockerClient._prune")
+    @patch("apiruns.clients.typer.echo")
+    def test_prune_resources_before_api_1_42(self, mock_echo, mock_prune, _):
+        mock_prune.side_effect = [{"VolumesDeleted": ["a"]}, {"NetworksDeleted": []}]
+        run(AsyncDockerClient._prune_resources(["users"]))
+        # Asserts
+        volumes = json.loads(unquote(mock_prune.call_args_list[0][0][1]))
+        assert volumes == {"label": ["apiruns.volume=users"]}
+
+    @patch("apiruns.clients.AsyncDockerClient._api_version", return_value=(1, 43))
+    @patch("apiruns.clients.AsyncDockerClient._prune")
+    @patch("apiruns.clients.typer.echo")
+    def test_prune_resources_of_every_service(self, mock_echo, mock_prune, _):
+        mock_prune.side_effect = [
+            {"VolumesDeleted": ["apiruns-users-data"], "SpaceReclaimed": 0},
+            {"NetworksDeleted": []},
+        ]
+        run(AsyncDockerClient._prune_resources())
+        # Asserts
+        volumes = json.loads(unquote(mock_prune.call_args_list[0][0][1]))
+        assert volumes == {"label": ["apiruns.volume"], "all": ["true"]}
+        mock_echo.assert_called_once_with("Pruned 1 volumes (0.0 MB) & 0 networks")
+
+    @patch("apiruns.clients.AsyncDockerClient.client.delete", new_callable=AsyncMock)
     def test_delete_container_with_docker_error(self, mock_client):
         # Mocks
         mock_client.side_effect = httpx.RequestError("error")
         # Asserts
         with pytest.raises(ErrorDockerEngineAPI):
-            DockerClient._delete_container("ID123")
+            run(AsyncDockerClient._delete_container("ID123"))
 
-    @patch("apiruns.clients.client.delete")
+    @patch("apiruns.clients.AsyncDockerClient.client.delete", new_callable=AsyncMock)
     def test_delete_container_with_unsuccesful_request(self, mock_client):
         # Mocks
         mock_client.return_value = MockResponse(status_code=500)
         # Asserts
         with pytest.raises(ErrorDeletingContainers):
-            DockerClient._delete_container("ID123")
+            run(AsyncDockerClient._delete_container("ID123"))
         mock_client.assert_called_once_with(
-            "http://localhost/containers/ID123?force=true", headers=self.headers
+            "http://localhost/containers/ID123?force=true&v=true", headers=self.headers
         )
 
-    @patch("apiruns.clients.client.delete")
+    @patch("apiruns.clients.AsyncDockerClient.client.delete", new_callable=AsyncMock)
     def test_delete_container_with_success(self, mock_client):
         # Mocks
         mock_client.return_value = MockResponse(
             status_code=204,
         )
-        DockerClient._delete_container("ID123")
+        run(AsyncDockerClient._delete_container("ID123"))
         # Asserts
 
         mock_client.assert_called_once_with(
-            "http://localhost/containers/ID123?force=true", headers=self.headers
+            "http://localhost/containers/ID123?force=true&v=true", headers=self.headers
         )
 
-    @patch("apiruns.clients.DockerClient._pull_image")
-    @patch("apiruns.clients.client.post")
-    def test_run_container_with_docker_error(self, mock_client, mock_pull):
+    @patch("apiruns.clients.AsyncDockerClient.client.post", new_callable=AsyncMock)
+    def test_run_container_with_docker_error(self, mock_client):
         # Mocks
         mock_client.side_effect = httpx.RequestError("error")
         # Asserts
         with pytest.raises(ErrorDockerEngineAPI):
-            DockerClient._run_container(
-                image="mongo",
-                name="mongodb",
-                environment=["PORT=27017"],
-                port="27017",
-                network_id="n123",
-                labels={"service": "apiruns"},
+            run(
+                AsyncDockerClient._run_container(
+                    image="mongo",
+                    name="mongodb",
+                    environment=["PORT=27017"],
+                    port="27017",
+                    network_id="n123",
+                    labels={"service": "apiruns"},
+                )
             )
-        mock_pull.assert_called_once_with("mongo")
 
-    @patch("apiruns.clients.DockerClient._pull_image")
-    @patch("apiruns.clients.client.post")
-    def test_run_container_with_unsuccesful_request(self, mock_client, mock_pull):
+    @patch("apiruns.clients.AsyncDockerClient.client.post", new_callable=AsyncMock)
+    def test_run_container_with_unsuccesful_request(self, mock_client):
         # Mocks
         mock_client.return_value = MockResponse(status_code=500)
         # Asserts
         with pytest.raises(ErrorCreatingContainer):
-            DockerClient._run_container(
-                image="mongo",
-                name="mongodb",
-                environment=["PORT=27017"],
-                port="27017",
-                network_id="n123",
-                labels={"service": "apiruns"},
+            run(
+                AsyncDockerClient._run_container(
+                    image="mongo",
+                    name="mongodb",
+                    environment=["PORT=27017"],
+                    port="27017",
+                    network_id="n123",
+                    labels={"service": "apiruns"},
+                )
             )
         response = ContainerConfig(
             image="mongo",
@@ -336,20 +648,20 @@ class TestDockerClient:
             headers=self.headers,
             json=response.to_json(),
         )
-        mock_pull.assert_called_once_with("mongo")
 
-    @patch("apiruns.clients.DockerClient._pull_image")
-    @patch("apiruns.clients.client.post")
-    def test_run_container_with_success(self, mock_client, mock_pull):
+    @patch("apiruns.clients.AsyncDockerClient.client.post", new_callable=AsyncMock)
+    def test_run_container_with_success(self, mock_client):
         # Mocks
         mock_client.return_value = MockResponse(status_code=201, data={"Id": "C123"})
-        _id = DockerClient._run_container(
-            image="mongo",
-            name="mongodb",
-            environment=["PORT=27017"],
-            port="27017",
-            network_id="n123",
-            labels={"service": "apiruns"},
+        _id = run(
+            AsyncDockerClient._run_container(
+                image="mongo",
+                name="mongodb",
+                environment=["PORT=27017"],
+                port="27017",
+                network_id="n123",
+                labels={"service": "apiruns"},
+            )
         )
         # Asserts
         response = ContainerConfig(
@@ -364,79 +676,149 @@ class TestDockerClient:
             headers=self.headers,
             json=response.to_json(),
         )
-        mock_pull.assert_called_once_with("mongo")
         assert _id == "C123"
 
-    @patch("apiruns.clients.client.post")
+    @patch("apiruns.clients.AsyncDockerClient.client.post", new_callable=AsyncMock)
     def test_start_container_with_docker_error(self, mock_client):
         # Mocks
         mock_client.side_effect = httpx.RequestError("error")
         # Asserts
         with pytest.raises(ErrorDockerEngineAPI):
-            DockerClient._start_container("C123")
+            run(AsyncDockerClient._start_container("C123"))
         mock_client.assert_called_once_with(
             "http://localhost/containers/C123/start", headers=self.headers, json={}
         )
 
-    @patch("apiruns.clients.client.post")
+    @patch("apiruns.clients.AsyncDockerClient.client.post", new_callable=AsyncMock)
     def test_start_container_with_unsuccesful_request(self, mock_client):
         # Mocks
         mock_client.return_value = MockResponse(status_code=500)
         # Asserts
         with pytest.raises(ErrorStartingAContainer):
-            DockerClient._start_container("C123")
+            run(AsyncDockerClient._start_container("C123"))
 
         mock_client.assert_called_once_with(
             "http://localhost/containers/C123/start", headers=self.headers, json={}
         )
 
-    @patch("apiruns.clients.client.post")
+    @patch("apiruns.clients.AsyncDockerClient.client.post", new_callable=AsyncMock)
+    def test_start_container_already_started(self, mock_client):
+        mock_client.return_value = MockResponse(status_code=304)
+        # Asserts, no error.
+        run(AsyncDockerClient._start_container("C123"))
+
+    @patch("apiruns.clients.AsyncDockerClient.client.post", new_callable=AsyncMock)
     def test_start_container_with_success(self, mock_client):
         # Mocks
         mock_client.return_value = MockResponse(
             status_code=204,
         )
-        DockerClient._start_container("C123")
+        run(AsyncDockerClient._start_container("C123"))
         # Asserts
         mock_client.assert_called_once_with(
             "http://localhost/containers/C123/start", headers=self.headers, json={}
         )
 
-    @patch("apiruns.clients.DockerClient._get_container_status")
-    @patch("apiruns.clients.time.sleep")
-    def test_wait_container_with_exited_status(self, mock_sleep, mock_container):
+    @patch("apiruns.clients.AsyncDockerClient._get_container_status")
+    @patch("apiruns.clients.AsyncDockerClient.client.stream")
+    def test_wait_container_already_running(self, mock_stream, mock_container):
         # Mocks
-        mock_sleep.return_value = None
+        mock_stream.return_value = MockStream(lines=[])
+        mock_container.return_value = "running"
+        run(AsyncDockerClient._wait("C123", self.labels))
+        # Asserts
+        filters = AsyncDockerClient._build_events_filters("C123", self.labels)
+        mock_stream.assert_called_once_with(
+            "GET",
+            f"http://localhost/events?filters={filters}",
+            headers=self.headers,
+            timeout=None,
+        )
+        mock_container.assert_called_once_with("C123")
+
+    @patch("apiruns.clients.AsyncDockerClient._get_container_status")
+    @patch("apiruns.clients.AsyncDockerClient.client.stream")
+    def test_wait_container_with_exited_status(self, mock_stream, mock_container):
+        # Mocks
+        mock_stream.return_value = MockStream(lines=[])
         mock_container.return_value = "exited"
         # Asserts
         with pytest.raises(ErrorContainerExited):
-            DockerClient._wait("C123")
+            run(AsyncDockerClient._wait("C123", self.labels))
 
-        mock_sleep.assert_called_once_with(1)
-        mock_container.assert_called_once_with("C123")
+    @patch("apiruns.clients.AsyncDockerClient._get_container_status")
+    @patch("apiruns.clients.AsyncDockerClient.client.stream")
+    def test_wait_container_with_start_event(self, mock_stream, mock_container):
+        # Mocks
+        lines = ["", json.dumps({"Type": "container", "Action": "start"})]
+        mock_stream.return_value = MockStream(lines=lines)
+        mock_container.return_value = "created"
+        run(AsyncDockerClient._wait("C123", self.labels))
+
+    @patch("apiruns.clients.AsyncDockerClient._get_container_status")
+    @patch("apiruns.clients.AsyncDockerClient.client.stream")
+    def test_wait_container_with_die_event(self, mock_stream, mock_container):
+        # Mocks
+        lines = [json.dumps({"Type": "container", "Action": "die"})]
+        mock_stream.return_value = MockStream(lines=lines)
+        mock_container.return_value = "created"
+        # Asserts
+        with pytest.raises(ErrorContainerExited):
+            run(AsyncDockerClient._wait("C123", self.labels))
 
-    @patch("apiruns.clients.DockerClient._get_container_status")
-    @patch("apiruns.clients.time.sleep")
-    def test_wait_container_with_exited_status(self, mock_sleep, mock_container):
+    @patch("apiruns.clients.AsyncDockerClient.client.stream")
+    def test_wait_container_with_unsuccesful_request(self, mock_stream):
         # Mocks
-        mock_sleep.return_value = None
-        mock_container.return_value = "running"
-        DockerClient._wait("C123")
+        mock_stream.return_value = MockStream(status_code=500)
         # Asserts
-        mock_sleep.assert_called_once_with(1)
-        mock_container.assert_called_once_with("C123")
+        with pytest.raises(ErrorGettingContainerStatus):
+            run(AsyncDockerClient._wait("C123", self.labels))
+
+    @patch("apiruns.clients.AsyncDockerClient.client.stream")
+    def test_wait_container_with_docker_error(self, mock_stream):
+        # Mocks
+        mock_stream.side_effect = httpx.RequestError("error")
+        # Asserts
+        with pytest.raises(ErrorDockerEngineAPI):
+            run(AsyncDockerClient._wait("C123", self.labels))
+
+    @patch("apiruns.clients.AsyncDockerClient._watch_container")
+    def test_wait_container_with_timeout(self, mock_watch):
+        # Mocks
+        async def never_running(*args):
+            await asyncio.sleep(10)
+
+        mock_watch.side_effect = never_running
+        # Asserts
+        with pytest.raises(ErrorContainerTimeout):
+            run(AsyncDockerClient._wait("C123", self.labels, timeout=0.01))
+
+    def test_build_events_filters(self):
+        resp = AsyncDockerClient._build_events_filters("C123", self.labels)
+        # Asserts
+        assert json.loads(unquote(resp)) == {
+            "type": ["container"],
+            "container": ["C123"],
+            "label": ["service=apiruns_offline-MyAPI"],
+            "event": ["start", "die"],
+        }
 
     def test_build_labels(self):
         # Asserts
-        resp = DockerClient._build_labels("apiruns")
+        resp = AsyncDockerClient._build_labels("apiruns")
 
         assert resp == {"service": "apiruns_offline-apiruns"}
 
-    @patch("apiruns.clients.DockerClient._ping")
-    @patch("apiruns.clients.DockerClient._create_network")
-    @patch("apiruns.clients.DockerClient._start_container")
-    @patch("apiruns.clients.DockerClient._wait")
-    @patch("apiruns.clients.DockerClient._run_container")
+    @patch("apiruns.clients.AsyncDockerClient._create_volume")
+    @patch(
+        "apiruns.clients.AsyncDockerClient._list_containers_by_name", return_value=[]
+    )
+    @patch("apiruns.clients.AsyncDockerClient._ping")
+    @patch("apiruns.clients.AsyncDockerClient._create_network")
+    @patch("apiruns.clients.AsyncDockerClient._ensure_image")
+    @patch("apiruns.clients.AsyncDockerClient._start_container")
+    @patch("apiruns.clients.AsyncDockerClient._wait")
+    @patch("apiruns.clients.AsyncDockerClient._run_container")
     @patch("apiruns.clients.typer.echo")
     def test_compose_service_success(
         self,
@@ -444,47 +826,540 @@ class TestDockerClient:
         mock_run_container,
         mock_wait,
         mock_start_container,
+        mock_pull_image,
         mock_create_network,
         mock_ping,
+        mock_list,
+        mock_volume,
     ):
         # Mocks
         mock_create_network.return_value = "N123"
         mock_run_container.side_effect = ["C123", "C1234"]
 
         # Proccess
-        DockerClient.compose_service("MyAPI", start=True)
+        resp = run(AsyncDockerClient.compose_service("MyAPI", start=True))
+        assert resp == ["C123", "C1234"]
         # Asserts
         mock_ping.assert_called_once_with()
         mock_create_network.assert_called_once_with()
-        calls_echo = [call("Creating DB container."), call("Creating API container.")]
-        mock_echo.assert_has_calls(calls_echo, any_order=False)
+        mock_echo.assert_called_once_with("Creating `MyAPI` DB & API containers.")
         calls_containers = [
             call(
                 environment=[],
-                image="mongo",
+                image="mongo:latest",
                 labels={"service": "apiruns_offline-MyAPI"},
-                name="dbmongo",
+                name="dbmongo-MyAPI",
                 network_id="N123",
                 port="27017",
+                host_port="27017",
+                volumes={"apiruns-MyAPI-data": "/data/db"},
             ),
             call(
                 environment=[
                     "PORT=8000",
                     "MODULE_NAME=api.main",
                     "ENGINE_DB_NAME=apiruns",
-                    "ENGINE_URI=mongodb://dbmongo:27017/",
+                    "ENGINE_URI=mongodb://dbmongo-MyAPI:27017/",
                 ],
-                image="josesalasdev/apiruns",
+                image="josesalasdev/apiruns:latest",
                 labels={"service": "apiruns_offline-MyAPI"},
                 name="MyAPI",
                 network_id="N123",
                 port="8000",
+                host_port="8000",
             ),
         ]
         mock_run_container.assert_has_calls(calls_containers, any_order=False)
+        mock_volume.assert_awaited_once_with(
+            "apiruns-MyAPI-data",
+            {"service": "apiruns_offline-MyAPI", "apiruns.volume": "MyAPI"},
+        )
+        calls_pull = [call("mongo:latest"), call("josesalasdev/apiruns:latest")]
+        mock_pull_image.assert_has_calls(calls_pull, any_order=True)
+        calls_start = [call("C123"), call("C1234")]
+        mock_start_container.assert_has_calls(calls_start, any_order=False)
+        calls_wait = [call("C123", self.labels, None), call("C1234", self.labels, None)]
+        mock_wait.assert_has_calls(calls_wait, any_order=False)
+
+    @patch("apiruns.clients.AsyncDockerClient._create_volume")
+    @patch(
+        "apiruns.clients.AsyncDockerClient._list_containers_by_name", return_value=[]
+    )
+    @patch("apiruns.clients.AsyncDockerClient._ping")
+    @patch("apiruns.clients.AsyncDockerClient._create_network")
+    @patch("apiruns.clients.AsyncDockerClient._ensure_image")
+    @patch("apiruns.clients.AsyncDockerClient._start_container")
+    @patch("apiruns.clients.AsyncDockerClient._run_container")
+    @patch("apiruns.clients.typer.echo")
+    def test_compose_service_without_start(
+        self,
+        mock_echo,
+        mock_run_container,
+        mock_start_container,
+        mock_pull_image,
+        mock_create_network,
+        mock_ping,
+        mock_list,
+        mock_volume,
+    ):
+        # Mocks
+        mock_create_network.return_value = "N123"
+        mock_run_container.side_effect = ["C123", "C1234"]
+
+        # Proccess
+        run(AsyncDockerClient.compose_service("MyAPI", start=False))
+        # Asserts
+        assert mock_run_container.call_count == 2
+        mock_start_container.assert_not_called()
+
+    @patch("apiruns.clients.AsyncDockerClient._ping")
+    @patch("apiruns.clients.AsyncDockerClient._create_network")
+    @patch("apiruns.clients.AsyncDockerClient._ensure_image")
+    @patch("apiruns.clients.AsyncDockerClient._compose")
+    def test_compose_services(
+        self, mock_compose, mock_ensure, mock_create_network, mock_ping
+    ):
+        # Mocks
+        mock_create_network.return_value = "N123"
+        running = []
+        concurrency = []
+
+        async def compose(name, offset, network, images, start, timeout, *args):
+            running.append(name)
+            concurrency.append(len(running))
+            await asyncio.sleep(0)
+            running.remove(name)
+            return [f"DB{offset}", f"API{offset}"]
+
+        mock_compose.side_effect = compose
+        services = {"users": 0, "books": 1, "orders": 2}
 
-    @patch("apiruns.clients.DockerClient._delete_container")
-    @patch("apiruns.clients.DockerClient._list_containers_by_name")
+        # Proccess
+        resp = run(AsyncDockerClient.compose_services(services, start=True, parallel=2))
+        # Asserts
+        assert resp == {
+            "users": ["DB0", "API0"],
+            "books": ["DB1", "API1"],
+            "orders": ["DB2", "API2"],
+        }
+        assert max(concurrency) == 2
+        mock_ping.assert_called_once_with()
+        mock_create_network.assert_called_once_with()
+        assert mock_ensure.call_count == 2
+        images = ServiceImages()
+        mock_compose.assert_any_call(
+            "books", 1, "N123", images, True, None, 1, "round-robin"
+        )
+
+    @patch("apiruns.clients.AsyncDockerClient.client.post", new_callable=AsyncMock)
+    def test_create_volume(self, mock_client):
+        mock_client.return_value = MockResponse(status_code=201)
+        run(AsyncDockerClient._create_volume("apiruns-users-data", self.labels))
+        # Asserts
+        mock_client.assert_called_once_with(
+            "http://localhost/volumes/create",
+            json={"Name": "apiruns-users-data", "Labels": self.labels},
+            headers=self.headers,
+        )
+        mock_client.return_value = MockResponse(status_code=500)
+        with pytest.raises(ErrorCreatingVolume):
+            run(AsyncDockerClient._create_volume("apiruns-users-data", self.labels))
+
+    @patch("apiruns.clients.AsyncDockerClient.client.delete", new_callable=AsyncMock)
+    def test_delete_volume(self, mock_client):
+        for status in (204, 404):
+            mock_client.return_value = MockResponse(status_code=status)
+            run(AsyncDockerClient._delete_volume("apiruns-users-data"))
+        # Asserts
+        mock_client.assert_called_with(
+            "http://localhost/volumes/apiruns-users-data", headers=self.headers
+        )
+        mock_client.return_value = MockResponse(status_code=409)
+        with pytest.raises(ErrorDeletingVolume):
+            run(AsyncDockerClient._delete_volume("apiruns-users-data"))
+
+    @patch("apiruns.clients.AsyncDockerClient.client.post", new_callable=AsyncMock)
+    def test_stop_container(self, mock_client):
+        for status in (204, 304):
+            mock_client.return_value = MockResponse(status_code=status)
+            run(AsyncDockerClient._stop_container("C1"))
+        # Asserts
+        mock_client.return_value = MockResponse(status_code=500)
+        with pytest.raises(ErrorStoppingContainer):
+            run(AsyncDockerClient._stop_container("C1"))
+
+    @patch("apiruns.clients.AsyncDockerClient.client.get", new_callable=AsyncMock)
+    def test_inspect_container(self, mock_client):
+        mock_client.return_value = MockResponse(data={"Id": "C1"})
+        assert run(AsyncDockerClient._inspect_container("db")) == {"Id": "C1"}
+        mock_client.return_value = MockResponse(status_code=404)
+        assert run(AsyncDockerClient._inspect_container("db")) is None
+        mock_client.return_value = MockResponse(status_code=500)
+        with pytest.raises(ErrorGettingContainerStatus):
+            run(AsyncDockerClient._inspect_container("db"))
+
+    @patch("apiruns.clients.AsyncDockerClient.client", new_callable=AsyncMock)
+    def test_get_archive(self, mock_client, tmp_path):
+        mock_client.stream = MagicMock(
+            return_value=MockStream(chunks=[b"tar ", b"content"])
+        )
+        destination = tmp_path / "snapshots" / "users.tar.gz"
+        size = run(AsyncDockerClient._get_archive("C1", "/data/db", destination))
+        # Asserts
+        assert size == 11
+        assert gzip.decompress(destination.read_bytes()) == b"tar content"
+        assert list(destination.parent.iterdir()) == [destination]
+        mock_client.stream.assert_called_once_with(
+            "GET", "http://localhost/containers/C1/archive?path=/data/db", timeout=None
+        )
+
+    @patch("apiruns.clients.AsyncDockerClient.client", new_callable=AsyncMock)
+    def test_get_archive_with_unsuccesful_request(self, mock_client, tmp_path):
+        mock_client.stream = MagicMock(return_value=MockStream(status_code=404))
+        destination = tmp_path / "users.tar.gz"
+        with pytest.raises(ErrorCopyingData):
+            run(AsyncDockerClient._get_archive("C1", "/data/db", destination))
+        # Asserts, no partial file is left.
+        assert list(tmp_path.iterdir()) == []
+
+    @patch("apiruns.clients.AsyncDockerClient.client.put", new_callable=AsyncMock)
+    def test_put_archive(self, mock_client, tmp_path):
+        source = tmp_path / "users.tar.gz"
+        source.write_bytes(b"x" * 100)
+        sent = []
+
+        async def put(url, content, headers, timeout):
+            async for chunk in content:
+                sent.append(chunk)
+            return MockResponse(status_code=200)
+
+        mock_client.side_effect = put
+        with patch.object(AsyncDockerClient, "ARCHIVE_CHUNK_SIZE", 30):
+            run(AsyncDockerClient._put_archive("C1", "/data", source))
+        # Asserts
+        assert [len(c) for c in sent] == [30, 30, 30, 10]
+        url = mock_client.call_args[0][0]
+        assert (
+            url == "http://localhost/containers/C1/archive?path=/data&copyUIDGID=true"
+        )
+        mock_client.side_effect = None
+        mock_client.return_value = MockResponse(status_code=400)
+        with pytest.raises(ErrorCopyingData):
+            run(AsyncDockerClient._put_archive("C1", "/data", source))
+
+    @patch("apiruns.clients.AsyncDockerClient._start")
+    @patch("apiruns.clients.AsyncDockerClient._get_archive")
+    @patch("apiruns.clients.AsyncDockerClient._stop_container")
+    @patch("apiruns.clients.AsyncDockerClient._inspect_container")
+    @patch("apiruns.clients.typer.echo")
+    def test_snapshot_stops_running_db(
+        self, mock_echo, mock_inspect, mock_stop, mock_archive, mock_start, tmp_path
+    ):
+        mock_inspect.return_value = {"Id": "D1", "State": {"Status": "running"}}
+        mock_archive.return_value = 42
+        path = tmp_path / "users.tar.gz"
+        size = run(AsyncDockerClient.snapshot("users", path))
+        # Asserts
+        assert size == 42
+        mock_inspect.assert_awaited_once_with("dbmongo-users")
+        mock_stop.assert_awaited_once_with("D1")
+        mock_archive.assert_awaited_once_with("D1", "/data/db", path)
+        labels = {"service": "apiruns_offline-users"}
+        mock_start.assert_awaited_once_with("D1", labels, None)
+
+    @patch("apiruns.clients.AsyncDockerClient._start")
+    @patch("apiruns.clients.AsyncDockerClient._get_archive")
+    @patch("apiruns.clients.AsyncDockerClient._stop_container")
+    @patch("apiruns.clients.AsyncDockerClient._inspect_container")
+    def test_snapshot_stopped_db(
+        self, mock_inspect, mock_stop, mock_archive, mock_start, tmp_path
+    ):
+        mock_inspect.return_value = {"Id": "D1", "State": {"Status": "created"}}
+        run(AsyncDockerClient.snapshot("users", tmp_path / "users.tar.gz"))
+        # Asserts
+        mock_stop.assert_not_called()
+        mock_start.assert_not_called()
+
+    @patch("apiruns.clients.AsyncDockerClient._inspect_container", return_value=None)
+    def test_snapshot_without_db(self, mock_inspect, tmp_path):
+        with pytest.raises(ErrorGettingContainerStatus):
+            run(AsyncDockerClient.snapshot("users", tmp_path / "users.tar.gz"))
+
+    @patch("apiruns.clients.AsyncDockerClient._start")
+    @patch("apiruns.clients.AsyncDockerClient._put_archive")
+    @patch("apiruns.clients.AsyncDockerClient._create_container")
+    @patch("apiruns.clients.AsyncDockerClient._create_volume")
+    @patch("apiruns.clients.AsyncDockerClient._delete_volume")
+    @patch("apiruns.clients.AsyncDockerClient._delete_container")
+    @patch("apiruns.clients.AsyncDockerClient._inspect_container")
+    def test_restore(
+        self,
+        mock_inspect,
+        mock_delete,
+        mock_delete_volume,
+        mock_create_volume,
+        mock_create,
+        mock_put,
+        mock_start,
+        tmp_path,
+    ):
+        mock_inspect.return_value = {"Id": "OLD"}
+        mock_create.return_value = "NEW"
+        source = tmp_path / "users.tar.gz"
+        images = ServiceImages()
+        db_id = run(AsyncDockerClient._restore("users", 1, "N123", images, source))
+        # Asserts
+        assert db_id == "NEW"
+        labels = {"service": "apiruns_offline-users"}
+        mock_delete.assert_awaited_once_with("OLD")
+        mock_delete_volume.assert_awaited_once_with("apiruns-users-data")
+        mock_create_volume.assert_awaited_once_with(
+            "apiruns-users-data", dict(labels, **{"apiruns.volume": "users"})
+        )
+        config = AsyncDockerClient._build_db_config("users", 1, "N123", images)
+        mock_create.assert_awaited_once_with(**config)
+        assert config["host_port"] == "27018"
+        assert config["volumes"] == {"apiruns-users-data": "/data/db"}
+        mock_put.assert_awaited_once_with("NEW", "/data", source)
+        mock_start.assert_awaited_once_with("NEW", labels, None)
+
+    @patch("apiruns.clients.AsyncDockerClient._restore")
+    @patch("apiruns.clients.AsyncDockerClient._prepare")
+    def test_restore_services(self, mock_prepare, mock_restore, tmp_path):
+        mock_prepare.return_value = "N123"
+        mock_restore.return_value = "NEW"
+        sources = {"books": tmp_path / "books.tar.gz"}
+        resp = run(
+            AsyncDockerClient.restore_services({"users": 0, "books": 1}, sources)
+        )
+        # Asserts
+        assert resp == {"books": "NEW"}
+        mock_restore.assert_awaited_once_with(
+            "books", 1, "N123", ServiceImages(), sources["books"], None
+        )
+
+    def reconcile_config(self, **overrides) -> dict:
+        config = dict(
+            image="mongo:latest",
+            environment=[],
+            port="27017",
+            network_id="N123",
+            labels=self.labels,
+            host_port="27017",
+        )
+        config.update(overrides)
+        return config
+
+    def existing(self, config: dict, state: str = "running") -> dict:
+        container = AsyncDockerClient._build_container_config(**config)
+        return {"Id": "OLD", "State": state, "Labels": container.to_json()["Labels"]}
+
+    @patch("apiruns.clients.AsyncDockerClient._delete_container")
+    @patch("apiruns.clients.AsyncDockerClient._create_container")
+    def test_reconcile_container_unchanged(self, mock_create, mock_delete):
+        config = self.reconcile_config()
+        existing = self.existing(config, state="exited")
+        resp = run(AsyncDockerClient._reconcile_container(existing, "db", **config))
+        # Asserts
+        assert resp == ("OLD", False)
+        mock_create.assert_not_called()
+        mock_delete.assert_not_called()
+
+    @patch("apiruns.clients.AsyncDockerClient._delete_container")
+    @patch("apiruns.clients.AsyncDockerClient._create_container")
+    def test_reconcile_container_changed(self, mock_create, mock_delete):
+        mock_create.return_value = "NEW"
+        existing = self.existing(self.reconcile_config())
+        config = self.reconcile_config(image="mongo:6.0")
+        resp = run(AsyncDockerClient._reconcile_container(existing, "db", **config))
+        # Asserts
+        assert resp == ("NEW", False)
+        mock_delete.assert_awaited_once_with("OLD")
+        mock_create.assert_awaited_once_with(name="db", **config)
+
+    @patch("apiruns.clients.AsyncDockerClient._create_container")
+    def test_reconcile_container_missing(self, mock_create):
+        mock_create.return_value = "NEW"
+        config = self.reconcile_config()
+        resp = run(AsyncDockerClient._reconcile_container(None, "db", **config))
+        # Asserts
+        assert resp == ("NEW", False)
+
+    @patch("apiruns.clients.AsyncDockerClient._start")
+    def test_ensure_running(self, mock_start):
+        run(AsyncDockerClient._ensure_running(("C1", True), self.labels))
+        run(AsyncDockerClient._ensure_running(("C2", False), self.labels, 5.0))
+        # Asserts
+        mock_start.assert_awaited_once_with("C2", self.labels, 5.0)
+
+    @patch("apiruns.clients.AsyncDockerClient._create_volume")
+    @patch("apiruns.clients.AsyncDockerClient._delete_container")
+    @patch("apiruns.clients.AsyncDockerClient._reconcile_container")
+    @patch("apiruns.clients.AsyncDockerClient._list_containers_by_name")
+    @patch("apiruns.clients.AsyncDockerClient._start")
+    @patch("apiruns.clients.typer.echo")
+    def test_compose_reuses_containers(
+        self, mock_echo, mock_start, mock_list, mock_reconcile, mock_delete, mock_volume
+    ):
+        # Mocks, a running stack scaled down from 2 replicas.
+        mock_list.return_value = [
+            {"Id": "D", "Names": ["/dbmongo-MyAPI"]},
+            {"Id": "A0", "Names": ["/MyAPI-0"]},
+            {"Id": "A1", "Names": ["/MyAPI-1"]},
+            {"Id": "P", "Names": ["/MyAPI-proxy"]},
+        ]
+
+        async def reconcile(existing, name, **config):
+            return (existing["Id"], True) if existing else ("NEW", False)
+
+        mock_reconcile.side_effect = reconcile
+
+        # Proccess
+        resp = run(
+            AsyncDockerClient._compose("MyAPI", 0, "N123", ServiceImages(), True)
+        )
+        # Asserts
+        assert resp == ["D", "NEW"]
+        mock_delete.assert_has_awaits(
+            [call("A0"), call("A1"), call("P")], any_order=True
+        )
+        mock_start.assert_awaited_once_with("NEW", self.labels, None)
+        mock_echo.assert_any_call("Reusing 1/2 unchanged `MyAPI` containers.")
+
+    @pytest.mark.parametrize("replica, recreated", [("NEW", True), ("A1", False)])
+    @patch("apiruns.clients.AsyncDockerClient._create_volume")
+    @patch("apiruns.clients.AsyncDockerClient._delete_container")
+    @patch("apiruns.clients.AsyncDockerClient._reconcile_container")
+    @patch("apiruns.clients.AsyncDockerClient._list_containers_by_name")
+    @patch("apiruns.clients.AsyncDockerClient._start")
+    @patch("apiruns.clients.typer.echo")
+    def test_compose_recreates_proxy_of_new_replicas(
+        self,
+        mock_echo,
+        mock_start,
+        mock_list,
+        mock_reconcile,
+        mock_delete,
+        mock_volume,
+        replica,
+        recreated,
+    ):
+        # Mocks, a running stack where a replica may be recreated.
+        mock_list.return_value = [
+            {"Id": "D", "Names": ["/dbmongo-MyAPI"], "State": "running"},
+            {"Id": "A0", "Names": ["/MyAPI-0"], "State": "running"},
+            {"Id": "A1", "Names": ["/MyAPI-1"], "State": "running"},
+            {"Id": "P", "Names": ["/MyAPI-proxy"], "State": "running"},
+        ]
+
+        async def reconcile(existing, name, **config):
+            if name == "MyAPI-1":
+                return replica, replica == "A1"
+            return (existing["Id"], True) if existing else ("NEWP", False)
+
+        mock_reconcile.side_effect = reconcile
+
+        # Proccess
+        resp = run(
+            AsyncDockerClient._compose(
+                "MyAPI", 0, "N123", ServiceImages(), True, replicas=2
+            )
+        )
+        # Asserts
+        proxy = "NEWP" if recreated else "P"
+        assert resp == ["D", "A0", replica, proxy]
+        if recreated:
+            mock_delete.assert_awaited_once_with("P")
+            assert [c.args[0] for c in mock_start.call_args_list] == ["NEW", "NEWP"]
+        else:
+            mock_delete.assert_not_called()
+            mock_start.assert_not_called()
+
+    @patch("apiruns.clients.AsyncDockerClient._create_volume")
+    @patch(
+        "apiruns.clients.AsyncDockerClient._list_containers_by_name", return_value=[]
+    )
+    @patch("apiruns.clients.AsyncDockerClient._create_container")
+    @patch("apiruns.clients.AsyncDockerClient._start")
+    @patch("apiruns.clients.typer.echo")
+    def test_compose_with_replicas(
+        self, mock_echo, mock_start, mock_create, mock_list, mock_volume
+    ):
+        # Mocks
+        async def create(**config):
+            return config["name"]
+
+        mock_create.side_effect = create
+        images = ServiceImages()
+
+        # Proccess
+        resp = run(
+            AsyncDockerClient._compose(
+                "MyAPI", 1, "N123", images, True, replicas=2, balance="least-conn"
+            )
+        )
+        # Asserts
+        assert resp == ["dbmongo-MyAPI", "MyAPI-0", "MyAPI-1", "MyAPI-proxy"]
+        configs = {c.kwargs["name"]: c.kwargs for c in mock_create.call_args_list}
+        assert configs["MyAPI-0"]["host_port"] == ""
+        assert configs["MyAPI-1"]["environment"][-1] == (
+            "ENGINE_URI=mongodb://dbmongo-MyAPI:27017/"
+        )
+        proxy = configs["MyAPI-proxy"]
+        assert proxy["image"] == "nginx:alpine"
+        assert proxy["host_port"] == "8001"
+        assert proxy["command"] == AsyncDockerClient.APIRUNS_PROXY_CMD
+        assert "least_conn; server MyAPI-0:8000; server MyAPI-1:8000;" in (
+            proxy["environment"][0]
+        )
+        started = [c.args[0] for c in mock_start.call_args_list]
+        assert started[0] == "dbmongo-MyAPI"
+        assert sorted(started[1:3]) == ["MyAPI-0", "MyAPI-1"]
+        assert started[3] == "MyAPI-proxy"
+
+    def test_build_proxy_config(self):
+        resp = AsyncDockerClient._build_proxy_config(["a-0", "a-1"], "round-robin")
+        assert resp == (
+            "upstream api {  server a-0:8000; server a-1:8000; } "
+            "server { listen 8000; location / { proxy_pass http://api; } }"
+        )
+
+    def test_build_host_ports(self):
+        assert AsyncDockerClient._build_host_ports(0) == ("8000", "27017")
+        assert AsyncDockerClient._build_host_ports(2) == ("8002", "27019")
+
+    @patch("apiruns.clients.AsyncDockerClient._ensure_image")
+    @patch("apiruns.clients.AsyncDockerClient._run_container")
+    def test_create_container_with_stale_image(self, mock_run, mock_ensure, cache):
+        # Mocks
+        ImageCache.set("mongo:latest", "sha256:1", None)
+        mock_run.side_effect = [ErrorImageNotFound, "C123"]
+        _id = run(AsyncDockerClient._create_container(image="mongo:latest"))
+
+        # Asserts
+        assert _id == "C123"
+        assert ImageCache.get("mongo:latest") is None
+        mock_ensure.assert_awaited_once_with("mongo:latest")
+
+    @patch("apiruns.clients.AsyncDockerClient.client.post", new_callable=AsyncMock)
+    def test_run_container_with_image_not_found(self, mock_client):
+        # Mocks
+        mock_client.return_value = MockResponse(status_code=404)
+        # Asserts
+        with pytest.raises(ErrorImageNotFound):
+            run(
+                AsyncDockerClient._run_container(
+                    image="mongo:latest",
+                    name="mongodb",
+                    environment=[],
+                    port="27017",
+                    network_id="n123",
+                    labels={},
+                )
+            )
+
+    @patch("apiruns.clients.AsyncDockerClient._delete_container")
+    @patch("apiruns.clients.AsyncDockerClient._list_containers_by_name")
     @patch("apiruns.clients.typer.echo")
     def test_service_down_success(
         self,
@@ -499,95 +1374,309 @@ class TestDockerClient:
         ]
 
         # Proccess
-        DockerClient.service_down("MyAPI")
+        run(AsyncDockerClient.service_down("MyAPI"))
         # Asserts
         calls_echo = [call("Removing ['container']"), call("Removing ['container 2']")]
         mock_echo.assert_has_calls(calls_echo, any_order=False)
         calls_delete = [call("123"), call("1234")]
         mock_delete_container.assert_has_calls(calls_delete, any_order=False)
 
+    @patch("apiruns.clients.AsyncDockerClient._prune_resources")
+    @patch("apiruns.clients.AsyncDockerClient.service_down")
+    def test_services_down(self, mock_down, mock_prune):
+        names = run(AsyncDockerClient.services_down(["users", "books"]))
+        # Asserts
+        assert names == ["users", "books"]
+        mock_down.assert_has_awaits([call("users"), call("books")], any_order=True)
+        mock_prune.assert_not_called()
+
+    @patch("apiruns.clients.AsyncDockerClient._prune_resources")
+    @patch("apiruns.clients.AsyncDockerClient._delete_container")
+    @patch("apiruns.clients.AsyncDockerClient._list_apiruns_containers")
+    @patch("apiruns.clients.typer.echo")
+    def test_services_down_all_with_prune(
+        self, mock_echo, mock_list, mock_delete, mock_prune
+    ):
+        mock_list.return_value = [
+            {
+                "Id": _id,
+                "Names": [f"/{name}"],
+                "Labels": {"service": f"apiruns_offline-{s}"},
+            }
+            for _id, name, s in [("1", "users", "users"), ("2", "books", "books")]
+        ] + [
+            {
+                "Id": "3",
+                "Names": ["/users-1"],
+                "Labels": {"service": "apiruns_offline-users"},
+            }
+        ]
+        names = run(AsyncDockerClient.services_down(None, prune=True))
+        # Asserts
+        assert names == ["books", "users"]
+        mock_delete.assert_has_awaits([call("1"), call("2"), call("3")], any_order=True)
+        mock_prune.assert_awaited_once_with(None)
+
+    @patch("apiruns.clients.AsyncDockerClient._prune_resources")
+    @patch("apiruns.clients.AsyncDockerClient._list_apiruns_containers")
+    def test_services_down_all_without_containers(self, mock_list, mock_prune):
+        mock_list.return_value = []
+        names = run(AsyncDockerClient.services_down(None, prune=True))
+        # Asserts
+        assert names == []
+        mock_prune.assert_awaited_once_with(None)
+
+
+class TestDockerClient:
+    @patch("apiruns.clients.AsyncDockerClient.compose_service")
+    def test_compose_service(self, mock_compose):
+        DockerClient.compose_service("MyAPI", start=True)
+        # Asserts
+        mock_compose.assert_awaited_once_with("MyAPI", True, None, None)
+        assert AsyncDockerClient.client is None
+
+    @patch("apiruns.clients.AsyncDockerClient.compose_services")
+    def test_compose_services(self, mock_compose):
+        DockerClient.compose_services({"MyAPI": 0}, start=True, parallel=2)
+        # Asserts
+        mock_compose.assert_awaited_once_with(
+            {"MyAPI": 0}, True, None, None, 2, 1, "round-robin"
+        )
+
+    @patch("apiruns.clients.AsyncDockerClient._list_containers_by_name")
+    def test_running_services(self, mock_list):
+        mock_list.side_effect = [
+            [
+                {"Id": "C2", "State": "running"},
+                {"Id": "C3", "State": "exited"},
+                {"Id": "C1", "State": "running"},
+            ],
+            [],
+        ]
+        resp = DockerClient.running_services(["MyAPI", "books"])
+        assert resp == {"MyAPI": ["C1", "C2"], "books": []}
+        mock_list.assert_has_awaits([call("MyAPI"), call("books")])
+
+    def test_api_port(self):
+        assert DockerClient.api_port(1) == "8001"
+
+    def test_db_port(self):
+        assert DockerClient.db_port(1) == "27018"
+
+    @patch("apiruns.clients.AsyncDockerClient.services_down")
+    def test_services_down(self, mock_down):
+        DockerClient.services_down(["MyAPI"], prune=True)
+        # Asserts
+        mock_down.assert_awaited_once_with(["MyAPI"], True)
+
+    @patch("apiruns.clients.AsyncDockerClient.service_down")
+    def test_service_down(self, mock_down):
+        DockerClient.service_down("MyAPI")
+        # Asserts
+        mock_down.assert_awaited_once_with("MyAPI")
+
 
 class TestAPIClient:
-    @patch("apiruns.clients.requests.get")
+
+    timeout = httpx.USE_CLIENT_DEFAULT
+
+    @pytest.fixture(autouse=True)
+    def session(self):
+        with patch.object(APIClient, "session", MagicMock()):
+            yield
+
+    @patch("apiruns.clients.APIClient.session.get")
     def test_get_request_with_docker_error(self, mock_client):
         # Mocks
-        mock_client.side_effect = requests.exceptions.RequestException
+        mock_client.side_effect = httpx.ConnectError("refused")
         # Asserts
         with pytest.raises(ErrorAPIClient):
             APIClient._get("/ping", headers={})
 
-        mock_client.assert_called_once_with("http://localhost:8000/ping", headers={})
+        mock_client.assert_called_once_with(
+            "http://localhost:8000/ping", headers={}, timeout=self.timeout
+        )
 
-    @patch("apiruns.clients.requests.get")
+    @patch("apiruns.clients.APIClient.session.get")
     def test_get_request_with_unsuccesful_request(self, mock_client):
         # Mocks
         mock_client.return_value = MockResponse(status_code=404)
         APIClient._get("/ping", headers={})
         # Asserts
-        mock_client.assert_called_once_with("http://localhost:8000/ping", headers={})
+        mock_client.assert_called_once_with(
+            "http://localhost:8000/ping", headers={}, timeout=self.timeout
+        )
 
-    @patch("apiruns.clients.requests.get")
+    @patch("apiruns.clients.APIClient.session.get")
     def test_get_request_with_succesful_request(self, mock_client):
         # Mocks
         mock_client.return_value = MockResponse(status_code=200)
         response = APIClient._get("/ping", headers={})
         # Asserts
-        mock_client.assert_called_once_with("http://localhost:8000/ping", headers={})
+        mock_client.assert_called_once_with(
+            "http://localhost:8000/ping", headers={}, timeout=self.timeout
+        )
         assert response == {}
 
-    @patch("apiruns.clients.requests.post")
-    def test_post_request_with_docker_error(self, mock_client):
+    @patch("apiruns.clients.time.sleep")
+    @patch("apiruns.clients.APIClient._get")
+    def test_ping_request(self, mock_get, mock_sleep):
+        # Mocks
+        mock_get.side_effect = [ErrorAPIClient, None, {"status": "ok"}]
+        # Asserts
+        elapsed = APIClient.ping()
+
+        calls_get = [
+            call(
+                "/ping",
+                headers={},
+                timeout=APIClient.PING_TIMEOUT,
+                host="http://localhost:8000",
+            )
+        ] * 3
+        mock_get.assert_has_calls(calls_get, any_order=False)
+        assert mock_sleep.call_count == 2
+        first, second = [c.args[0] for c in mock_sleep.call_args_list]
+        assert first <= APIClient.RETRY_FIRST_DELAY
+        assert second <= APIClient.RETRY_FIRST_DELAY * 2
+        assert elapsed >= 0
+
+    @patch("apiruns.clients.time.sleep")
+    @patch("apiruns.clients.time.monotonic")
+    @patch("apiruns.clients.APIClient._get")
+    def test_ping_request_with_deadline(self, mock_get, mock_monotonic, mock_sleep):
+        # Mocks
+        mock_get.return_value = None
+        mock_monotonic.side_effect = [0.0, 1.0, 3.0]
+        # Asserts
+        with pytest.raises(ErrorAPINotReady):
+            APIClient.ping(deadline=2.0)
+
+        assert mock_get.call_count == 2
+        mock_sleep.assert_called_once()
+
+    def test_backoff(self):
+        for attempt in range(10):
+            delay = APIClient._backoff(attempt)
+            limit = min(
+                APIClient.RETRY_FIRST_DELAY * 2**attempt, APIClient.RETRY_MAX_DELAY
+            )
+            assert limit / 2 <= delay <= limit
+
+    def test_build_host(self):
+        assert APIClient.build_host("8001") == "http://localhost:8001"
+
+    @patch("apiruns.clients.APIClient.session.post")
+    def test_create_model_with_host(self, mock_client):
         # Mocks
-        mock_client.side_effect = requests.exceptions.RequestException
+        mock_client.return_value = MockResponse(status_code=201)
+        # Asserts
+        assert APIClient._create_model({"path": "/a"}, "http://localhost:8001") is None
+        assert mock_client.call_args[0][0] == "http://localhost:8001/admin/models"
+
+    def test_get_session(self, monkeypatch):
+        monkeypatch.setenv("APIRUNS_API_READ_TIMEOUT", "12")
+        with patch.object(APIClient, "session", None):
+            session = APIClient._get_session()
+            assert APIClient._get_session() is session
+            assert session.timeout.read == 12.0
+
+    @patch("apiruns.clients.APIClient.session.get")
+    def test_get_request_with_invalid_json(self, mock_client):
+        mock_client.return_value.status_code = 200
+        mock_client.return_value.json.side_effect = ValueError("Expecting value")
         # Asserts
         with pytest.raises(ErrorAPIClient):
-            APIClient._post("/users", data={}, headers={})
+            APIClient._get("/ping", headers={})
 
-        mock_client.assert_called_once_with(
-            "http://localhost:8000/users", headers={}, json={}
-        )
+    @patch("apiruns.clients.typer.echo")
+    @patch("apiruns.clients.APIClient._create_model")
+    def test_create_models(self, mock_create, mock_echo):
+        # Mocks
+        mock_create.return_value = None
+        # Asserts
+        APIClient.create_models([{"name": "anybody"}, {"name": "some"}])
+
+        calls = [call({"name": "anybody"}, None), call({"name": "some"}, None)]
+        mock_create.assert_has_calls(calls, any_order=True)
+        mock_echo.assert_called_once_with("Models created: 2/2")
+
+    @patch("apiruns.clients.typer.echo")
+    @patch("apiruns.clients.APIClient._create_model")
+    def test_create_models_reads_an_iterator_lazily(self, mock_create, mock_echo):
+        read = []
+
+        def models():
+            for i in range(10):
+                read.append(i)
+                yield {"path": f"/{i}"}
 
-    @patch("apiruns.clients.requests.post")
-    def test_post_request_with_unsuccesful_request(self, mock_client):
         # Mocks
-        mock_client.return_value = MockResponse(status_code=404)
-        APIClient._post("/users", data={}, headers={})
+        mock_create.side_effect = lambda m, host: (
+            "read ahead" if len(read) > int(m["path"][1:]) + 2 else None
+        )
         # Asserts
-        mock_client.assert_called_once_with(
-            "http://localhost:8000/users", headers={}, json={}
+        APIClient.create_models(models(), workers=1)
+
+        # At most a window of 2 models is read ahead.
+        mock_echo.assert_called_once_with("Models created: 10/10")
+
+    @patch("apiruns.clients.typer.echo")
+    @patch("apiruns.clients.APIClient._create_model")
+    def test_create_models_with_errors(self, mock_create, mock_echo):
+        # Mocks
+        mock_create.side_effect = (
+            lambda m, host: "422 bad" if m["path"] == "/b" else None
         )
+        # Asserts
+        with pytest.raises(ErrorCreatingModels) as e:
+            APIClient.create_models([{"path": "/a"}, {"path": "/b"}], workers=2)
+
+        assert e.value.errors == {"/b": "422 bad"}
+        calls = [call("Models created: 1/2"), call("Failed `/b`: 422 bad")]
+        mock_echo.assert_has_calls(calls, any_order=False)
 
-    @patch("apiruns.clients.requests.post")
-    def test_post_request_with_succesful_request(self, mock_client):
+    @patch("apiruns.clients.APIClient.session.post")
+    def test_create_model_success(self, mock_client):
         # Mocks
-        mock_client.return_value = MockResponse(status_code=200)
-        response = APIClient._post("/users", data={}, headers={})
+        mock_client.return_value = MockResponse(status_code=201)
         # Asserts
+        assert APIClient._create_model({"path": "/a"}) is None
         mock_client.assert_called_once_with(
-            "http://localhost:8000/users", headers={}, json={}
+            "http://localhost:8000/admin/models",
+            json={"path": "/a"},
+            headers={},
         )
-        assert response == {}
 
     @patch("apiruns.clients.time.sleep")
-    @patch("apiruns.clients.APIClient._get")
-    def test_ping_request(self, mock_get, mock_sleep):
+    @patch("apiruns.clients.APIClient.session.post")
+    def test_create_model_retry_server_errors(self, mock_client, mock_sleep):
         # Mocks
-        mock_get.side_effect = [None, {"status": "ok"}]
+        mock_client.side_effect = [
+            httpx.ConnectError("refused"),
+            MockResponse(status_code=503, text="busy"),
+            MockResponse(status_code=201),
+        ]
         # Asserts
-        APIClient.ping()
-
-        calls_get = [call("/ping", headers={}), call("/ping", headers={})]
-        mock_get.assert_has_calls(calls_get, any_order=False)
-        calls_sleep = [call(1)]
-        mock_sleep.assert_has_calls(calls_sleep, any_order=False)
+        assert APIClient._create_model({"path": "/a"}) is None
+        assert mock_client.call_count == 3
+        assert mock_sleep.call_count == 2
 
-    @patch("apiruns.clients.APIClient._post")
-    def test_create_models(self, mock_post):
+    @patch("apiruns.clients.time.sleep")
+    @patch("apiruns.clients.APIClient.session.post")
+    def test_create_model_without_retry_client_errors(self, mock_client, mock_sleep):
+        # Mocks
+        mock_client.return_value = MockResponse(status_code=422, text="invalid")
         # Asserts
-        APIClient.create_models([{"name": "anybody"}, {"name": "some"}])
+        assert APIClient._create_model({"path": "/a"}) == "422 invalid"
+        mock_client.assert_called_once()
+        mock_sleep.assert_not_called()
 
-        calls = [
-            call("/admin/models", data={"name": "anybody"}, headers={}),
-            call("/admin/models", data={"name": "some"}, headers={}),
-        ]
-        mock_post.assert_has_calls(calls, any_order=False)
+    @patch("apiruns.clients.time.sleep")
+    @patch("apiruns.clients.APIClient.session.post")
+    def test_create_model_retries_exhausted(self, mock_client, mock_sleep):
+        # Mocks
+        mock_client.return_value = MockResponse(status_code=500, text="error")
+        # Asserts
+        assert APIClient._create_model({"path": "/a"}) == "500 error"
+        assert mock_client.call_count == APIClient.MODELS_RETRIES + 1
@@ -0,0 +1,67 @@
+import re
+import random
+import pytest
+from cerberus import Validator
+from apiruns.generators import PayloadGenerator
+from apiruns.generators import RegexGenerator
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "^[a-z0-9]+(?:-[a-z0-9]+)*$",
+        r"^[A-Z]{2}-\d{4}$",
+        "(foo|bar)+x?",
+        r"[^abc]\w.\s\S\D",
+    ],
+)
+def test_regex_generator(pattern):
+    generator = RegexGenerator(pattern)
+    rng = random.Random(1)
+    for _ in range(100):
+        assert re.fullmatch(pattern.strip("^$"), generator(rng))
+
+
+def test_regex_generator_unsupported():
+    with pytest.raises(ValueError):
+        RegexGenerator(r"(a)\1")(random.Random(1))
+
+
+def test_payload_generator_valid_documents():
+    schema = {
+        "username": {
+            "type": "string",
+            "required": True,
+            "minlength": 3,
+            "maxlength": 8,
+        },
+        "code": {"type": "string", "regex": r"^[A-Z]{3}\d{2}$"},
+        "age": {"type": "integer", "min": 18, "max": 99},
+        "score": {"type": "float", "min": 0.5, "max": 1.5},
+        "is_admin": {"type": "boolean"},
+        "level": {"type": "string", "allowed": ["low", "high"]},
+        "tags": {"type": "list", "schema": {"type": "string"}, "maxlength": 4},
+        "address": {
+            "type": "dict",
+            "schema": {"city": {"type": "string", "required": True}},
+        },
+    }
+    generator = PayloadGenerator(schema)
+    validator = Validator(schema)
+    rng = random.Random(1)
+    for _ in range(200):
+        document = generator(rng)
+        assert validator.validate(document), validator.errors
+        assert set(document) == set(schema)
+
+
+def test_payload_generator_optional_fields():
+    schema = {"a": {"type": "string", "required": True}, "b": {"type": "string"}}
+    generator = PayloadGenerator(schema, optional=0.0)
+    assert list(generator(random.Random(1))) == ["a"]
+
+
+def test_payload_generator_is_deterministic():
+    schema = {"age": {"type": "integer"}, "name": {"type": "string"}}
+    first = PayloadGenerator(schema)(random.Random(7))
+    assert PayloadGenerator(schema)(random.Random(7)) == first
@@ -1,8 +1,17 @@
+import json
+import sys
+import subprocess
 from unittest.mock import patch
 from apiruns.main import version
 from apiruns.main import build
 from apiruns.main import up
 from apiruns.main import down
+from apiruns.main import dev
+from apiruns.main import bench
+from apiruns.main import seed
+from apiruns.main import snapshot
+from apiruns.main import restore
+from apiruns.main import Balance
 from apiruns import __version__
 
 
@@ -14,25 +23,228 @@ def test_version(echo_mock):
     echo_mock.assert_called_once_with(__version__)
 
 
-@patch("apiruns.main.Apiruns.build")
+@patch("apiruns.services.Apiruns.build")
 def test_build(service_mock):
-    build(file="myapi.yml", version="1.0.1")
+    build(
+        file="myapi.yml",
+        version="1.0.1",
+        api_image=None,
+        db_image="mongo:6.0",
+        cache=False,
+        parallel=2,
+        replicas=1,
+        balance=Balance.round_robin,
+        output="build.json",
+        timings=False,
+        trace=None,
+        stats=False,
+        stats_file=None,
+    )
 
     # Asserts
-    service_mock.assert_called_once_with("myapi.yml", "1.0.1")
+    service_mock.assert_called_once_with(
+        "myapi.yml",
+        "1.0.1",
+        api_image=None,
+        db_image="mongo:6.0",
+        cache=False,
+        parallel=2,
+        replicas=1,
+        balance="round-robin",
+        output="build.json",
+    )
 
 
-@patch("apiruns.main.Apiruns.up")
+@patch("apiruns.services.Apiruns.up")
 def test_up(service_mock):
-    up(file="myapi.yml")
+    up(
+        file="myapi.yml",
+        timeout=30.0,
+        version=None,
+        api_image=None,
+        db_image=None,
+        cache=True,
+        reconcile=False,
+        parallel=4,
+        replicas=3,
+        balance=Balance.least_conn,
+        artifact="build.json",
+        stream=True,
+        timings=False,
+        trace=None,
+        stats=False,
+        stats_file=None,
+    )
 
     # Asserts
-    service_mock.assert_called_once_with("myapi.yml")
+    service_mock.assert_called_once_with(
+        "myapi.yml",
+        version=None,
+        timeout=30.0,
+        api_image=None,
+        db_image=None,
+        cache=True,
+        reconcile=False,
+        parallel=4,
+        replicas=3,
+        balance="least-conn",
+        artifact="build.json",
+        stream=True,
+    )
 
 
-@patch("apiruns.main.Apiruns.down")
+@patch("apiruns.services.Apiruns.down")
+def test_down_with_trace(service_mock, tmp_path):
+    trace = tmp_path / "trace.json"
+    down(
+        file="myapi.yml",
+        service=None,
+        all_stacks=False,
+        prune=False,
+        timings=True,
+        trace=str(trace),
+        stats=False,
+        stats_file=None,
+    )
+
+    # Asserts
+    service_mock.assert_called_once_with(
+        "myapi.yml", service=None, prune=False, all_stacks=False
+    )
+    assert json.loads(trace.read_text()) == {
+        "traceEvents": [],
+        "displayTimeUnit": "ms",
+    }
+
+
+@patch("apiruns.services.Apiruns.down")
+def test_down_with_stats_file(service_mock, tmp_path):
+    stats_file = tmp_path / "apiruns.prom"
+    down(
+        file="myapi.yml",
+        service=None,
+        all_stacks=False,
+        prune=False,
+        timings=False,
+        trace=None,
+        stats=True,
+        stats_file=str(stats_file),
+    )
+
+    # Asserts
+    service_mock.assert_called_once_with(
+        "myapi.yml", service=None, prune=False, all_stacks=False
+    )
+    assert "apiruns_http_request_duration_seconds histogram" in stats_file.read_text()
+
+
+@patch("apiruns.services.Apiruns.dev")
+def test_dev(service_mock):
+    dev(
+        file="myapi.yml",
+        watch=True,
+        polling=False,
+        timeout=60.0,
+        version=None,
+        api_image=None,
+        db_image=None,
+    )
+
+    # Asserts
+    service_mock.assert_called_once_with(
+        "myapi.yml",
+        watch=True,
+        polling=False,
+        version=None,
+        timeout=60.0,
+        api_image=None,
+        db_image=None,
+    )
+
+
+@patch("apiruns.services.Apiruns.bench")
+def test_bench(service_mock):
+    bench(
+        file="myapi.yml",
+        service=None,
+        concurrency=8,
+        rate=100.0,
+        duration=5.0,
+        output="bench.json",
+        seed=1,
+    )
+
+    # Asserts
+    service_mock.assert_called_once_with(
+        "myapi.yml",
+        service=None,
+        concurrency=8,
+        rate=100.0,
+        duration=5.0,
+        output="bench.json",
+        seed=1,
+    )
+
+
+@patch("apiruns.services.Apiruns.seed")
+def test_seed(service_mock):
+    seed(count=100, file="myapi.yml", service=None, batch_size=50, seed=None)
+
+    # Asserts
+    service_mock.assert_called_once_with(
+        "myapi.yml", 100, service=None, batch_size=50, seed=None
+    )
+
+
+@patch("apiruns.services.Apiruns.down")
 def test_down(service_mock):
-    down(file="myapi.yml")
+    down(
+        file="myapi.yml",
+        service="users",
+        all_stacks=True,
+        prune=True,
+        timings=False,
+        trace=None,
+        stats=False,
+        stats_file=None,
+    )
+
+    # Asserts
+    service_mock.assert_called_once_with(
+        "myapi.yml", service="users", prune=True, all_stacks=True
+    )
+
+
+@patch("apiruns.services.Apiruns.snapshot")
+def test_snapshot(service_mock):
+    snapshot(name="baseline", file="myapi.yml", service=None, timeout=60.0)
+
+    # Asserts
+    service_mock.assert_called_once_with(
+        "baseline", "myapi.yml", service=None, timeout=60.0
+    )
+
+
+@patch("apiruns.services.Apiruns.restore")
+def test_restore(service_mock):
+    restore(
+        name="baseline", file="myapi.yml", service="users", db_image=None, timeout=60.0
+    )
+
+    # Asserts
+    service_mock.assert_called_once_with(
+        "baseline", "myapi.yml", service="users", db_image=None, timeout=60.0
+    )
+
+
+def test_startup_without_heavy_imports():
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import apiruns.main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    imported = {line.split("|")[-1].strip() for line in output.splitlines()}
 
     # Asserts
-    service_mock.assert_called_once_with("myapi.yml")
+    assert not imported & {"httpx", "requests", "cerberus", "yaml"}
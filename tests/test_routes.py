@@ -0,0 +1,63 @@
+import pytest
+from apiruns.routes import RouteTrie
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("/", ()),
+        ("/users", ("users",)),
+        ("/users/", ("users",)),
+        ("//a//b", ("a", "b")),
+    ],
+)
+def test_segments(path, expected):
+    assert RouteTrie.segments(path) == expected
+
+
+def test_add():
+    trie = RouteTrie()
+    assert trie.add("/users", 0) is None
+    assert trie.add("/books/authors", 1) is None
+    assert trie.add("/users/", 2) == "duplicates `/users` at 0"
+    assert trie.add("/users/books", 3) == "shadowed by `/users/{id}` of `/users` at 0"
+    assert trie.add("/books", 4) == "`/books/{id}` shadows `/books/authors` at 1"
+    # Deeper paths don't match the items route.
+    assert trie.add("/users/books/authors", 5) is None
+
+
+def test_root_items_shadow_every_first_segment():
+    trie = RouteTrie()
+    assert trie.add("/", 0) is None
+    assert trie.add("/users", 1) == "shadowed by `/{id}` of `/` at 0"
+
+
+def test_build():
+    data = [
+        {"path": "/users"},
+        {"schema": {}},
+        "users",
+        {"path": "/users/"},
+        {"path": "/books"},
+    ]
+    trie, errors = RouteTrie.build(data)
+    assert errors == {
+        3: {"path": "/users/", "errors": {"path": ["duplicates `/users` at 0"]}}
+    }
+    assert trie.to_table() == {"users": {"": 0}, "books": {"": 4}}
+
+
+def test_to_table_drops_paths_in_conflict():
+    trie, _ = RouteTrie.build(
+        [{"path": "/users"}, {"path": "/users/books/"}, {"path": "/users/a/b"}]
+    )
+    assert trie.to_table() == {"users": {"": 0, "a": {"b": {"": 2}}}}
+
+
+def test_build_many_siblings():
+    data = [{"path": f"/api/v1/{i}"} for i in range(20000)]
+    data.append({"path": "/api/v1"})
+    _, errors = RouteTrie.build(data)
+    assert errors[20000]["errors"] == {
+        "path": ["`/api/v1/{id}` shadows `/api/v1/0` at 0"]
+    }
@@ -0,0 +1,80 @@
+import sys
+import random
+import pytest
+from unittest.mock import patch, MagicMock
+from apiruns.seed import Seeder
+from apiruns.seed import SeedProgress
+from apiruns.exceptions import ErrorMissingDependency
+from apiruns.exceptions import ErrorSeedingData
+
+
+schema = {"name": {"type": "string", "required": True}, "age": {"type": "integer"}}
+
+
+class FakeCollection:
+    def __init__(self):
+        self.batches = []
+
+    def insert_many(self, documents, ordered=True):
+        self.batches.append(len(documents))
+
+
+def test_collection_name():
+    assert Seeder.collection_name({"path": "/users/"}) == "users"
+    assert Seeder.collection_name({"path": "/a/b"}) == "a_b"
+    assert Seeder.collection_name({"path": "/a", "name": "people"}) == "people"
+
+
+def test_documents_are_lazy():
+    documents = Seeder.documents(schema, 10**9, random.Random(1))
+    first = next(documents)
+    assert set(first) == {"name", "age"}
+
+
+def test_batches():
+    assert list(Seeder.batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(Seeder.batches([], 2)) == []
+
+
+@patch("apiruns.seed.typer.echo")
+def test_insert(mock_echo):
+    collection = FakeCollection()
+    progress = SeedProgress("myapi.users", 2500)
+    documents = Seeder.documents(schema, 2500, random.Random(1))
+    inserted = Seeder.insert(collection, documents, progress, batch_size=1000)
+
+    # Asserts
+    assert inserted == 2500
+    assert collection.batches == [1000, 1000, 500]
+    assert mock_echo.call_args[0][0].startswith("Seeded `myapi.users`: 2500 docs")
+
+
+@patch("apiruns.seed.typer.echo")
+def test_insert_with_errors(mock_echo):
+    collection = MagicMock()
+    collection.insert_many.side_effect = RuntimeError("duplicate key")
+    progress = SeedProgress("myapi.users", 10)
+    with pytest.raises(ErrorSeedingData) as e:
+        Seeder.insert(collection, Seeder.documents(schema, 10), progress)
+    assert e.value.errors == "duplicate key"
+
+
+def test_progress_render():
+    progress = SeedProgress("users", 100, inserted=25)
+    assert progress.render().startswith("`users`: 25/100 docs")
+
+
+def test_connect_without_pymongo():
+    with patch.dict(sys.modules, {"pymongo": None}):
+        with pytest.raises(ErrorMissingDependency):
+            Seeder.connect("27017")
+
+
+def test_connect():
+    pymongo = MagicMock()
+    with patch.dict(sys.modules, {"pymongo": pymongo}):
+        db = Seeder.connect("27018")
+    pymongo.MongoClient.assert_called_once_with(
+        "mongodb://localhost:27018/", serverSelectionTimeoutMS=5000
+    )
+    assert db is pymongo.MongoClient.return_value["apiruns"]
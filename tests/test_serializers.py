@@ -1,4 +1,6 @@
+import sys
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch
 from apiruns.serializers import SerializerBase
 from apiruns.serializers import FileSerializer
@@ -38,9 +40,18 @@ def test_read_file_with_no_data(load_yaml_mock):
 def test_read_file_with_data(load_yaml_mock):
     data = {"my_api": [{"path": "/users", "schema": {"name": {"type": "string"}}}]}
     load_yaml_mock.return_value = data
-    name, schemas = FileSerializer.read_file("file.yml")
-    assert name == "my_api"
-    assert schemas == data["my_api"]
+    services = FileSerializer.read_file("file.yml")
+    assert services == data
+
+
+@patch("apiruns.serializers.load_yaml")
+def test_read_file_with_many_services(load_yaml_mock):
+    users = [{"path": "/users", "schema": {"name": {"type": "string"}}}]
+    books = [{"path": "/books", "schema": {"title": {"type": "string"}}}]
+    load_yaml_mock.return_value = {"users": users, "books": books}
+    services = FileSerializer.read_file("file.yml")
+    assert list(services) == ["users", "books"]
+    assert services["books"] == books
 
 
 def test_validate_list_of_schema_with_error():
@@ -52,3 +63,245 @@ def test_validate_list_of_schema_with_error():
 def test_validate_list_of_schema():
     data = [{"path": "/users", "schema": {"name": {"type": "string"}}}]
     FileSerializer.validate(data)
+
+
+def test_validator_is_reused():
+    schema = {"name": {"type": "string"}}
+    validator = SerializerBase._get_validator(schema)
+    assert SerializerBase._get_validator(schema) is validator
+    assert SerializerBase._get_validator({"name": {"type": "string"}}) is not validator
+
+
+def test_validate_not_a_dict():
+    resp = SerializerBase._validate(FileSerializer.FILE_SCHEMA, "users")
+    assert resp == {"": ["must be of dict type"]}
+
+
+def test_validate_collect_every_error():
+    data = [
+        {"path": "/users", "schema": {"name": {"type": "string"}}},
+        {"path": "/books"},
+        {"path": "/authors", "schema": {"name": {"type": "string"}}},
+        {"schema": {"name": {"type": "string"}}},
+    ]
+    with pytest.raises(ErrorValidatingSchema) as e:
+        FileSerializer.validate(data)
+
+    assert e.value.errors == {
+        1: {"path": "/books", "errors": {"schema": ["required field"]}},
+        3: {"path": None, "errors": {"path": ["required field"]}},
+    }
+
+
+@patch("apiruns.serializers.FileSerializer.PARALLEL_THRESHOLD", 4)
+def test_validate_with_process_pool():
+    data = [
+        {"path": f"/users{i}", "schema": {"name": {"type": "string"}}} for i in range(9)
+    ]
+    data[7] = {"path": "/books"}
+    with pytest.raises(ErrorValidatingSchema) as e:
+        FileSerializer.validate(data, workers=2)
+
+    assert list(e.value.errors) == [7]
+
+
+@pytest.fixture
+def manifest(tmp_path, monkeypatch):
+    monkeypatch.setenv("APIRUNS_CACHE_DIR", str(tmp_path / "cache"))
+    path = tmp_path / "api.yml"
+    path.write_text(
+        "myapi:\n  - path: /users\n    schema:\n      name:\n        type: string\n"
+    )
+    return path
+
+
+def test_load_validates_and_caches(manifest):
+    services = FileSerializer.load(str(manifest))
+    assert services == {
+        "myapi": [{"path": "/users", "schema": {"name": {"type": "string"}}}]
+    }
+
+    with patch("apiruns.serializers.parse_yaml") as parse_mock:
+        with patch("apiruns.serializers.FileSerializer.validate") as validate_mock:
+            assert FileSerializer.load(str(manifest)) == services
+    parse_mock.assert_not_called()
+    validate_mock.assert_not_called()
+
+
+def test_load_cache_invalidated_by_changes(manifest):
+    FileSerializer.load(str(manifest))
+    manifest.write_text(
+        "otherapi:\n  - path: /books\n    schema:\n      a:\n        type: string\n"
+    )
+    assert list(FileSerializer.load(str(manifest))) == ["otherapi"]
+
+
+def test_load_without_cache(manifest):
+    FileSerializer.load(str(manifest), cache=False)
+    with patch("apiruns.serializers.parse_yaml") as parse_mock:
+        parse_mock.return_value = {"myapi": [{"path": "/a", "schema": {"a": {}}}]}
+        FileSerializer.load(str(manifest))
+    parse_mock.assert_called_once()
+
+
+def test_load_invalid_manifest_is_not_cached(manifest):
+    manifest.write_text("myapi:\n  - path: /users\n")
+    for _ in range(2):
+        with pytest.raises(ErrorValidatingSchema):
+            FileSerializer.load(str(manifest))
+
+
+def test_load_collects_errors_by_service(manifest):
+    manifest.write_text(
+        "users:\n  - path: /users\n    schema:\n      a:\n        type: string\n"
+        "books:\n  - path: /books\n"
+    )
+    with pytest.raises(ErrorValidatingSchema) as e:
+        FileSerializer.load(str(manifest))
+    assert list(e.value.errors) == ["books"]
+    assert list(e.value.errors["books"]) == [0]
+
+
+def test_validate_paths_in_conflict():
+    schema = {"name": {"type": "string"}}
+    data = [
+        {"path": "/users", "schema": schema},
+        {"path": "/users/", "schema": schema},
+        {"path": "/users/books"},
+        {"path": "/users/books", "schema": schema},
+    ]
+    with pytest.raises(ErrorValidatingSchema) as e:
+        FileSerializer.validate(data, workers=1)
+
+    assert e.value.errors[1]["errors"] == {"path": ["duplicates `/users` at 0"]}
+    assert e.value.errors[2]["errors"] == {"schema": ["required field"]}
+    assert e.value.errors[3]["errors"] == {
+        "path": ["shadowed by `/users/{id}` of `/users` at 0"]
+    }
+
+
+def test_validate_endpoints_by_manifest_position():
+    schema = {"name": {"type": "string"}}
+    FileSerializer.validate_endpoints({4: {"path": "/users", "schema": schema}})
+    with pytest.raises(ErrorValidatingSchema) as e:
+        FileSerializer.validate_endpoints({57: {"path": "/books"}})
+    assert list(e.value.errors) == [57]
+
+
+def test_check_routes():
+    data = [{"path": "/books/authors"}, {"path": "/books"}]
+    with pytest.raises(ErrorValidatingSchema) as e:
+        FileSerializer.check_routes(data)
+    assert list(e.value.errors) == [1]
+
+    routes = FileSerializer.check_routes(data[:1])
+    assert routes.to_table() == {"books": {"authors": {"": 0}}}
+
+
+def test_read_file_not_a_mapping():
+    with patch("apiruns.serializers.load_yaml") as load_yaml_mock:
+        load_yaml_mock.return_value = ["myapi"]
+        with pytest.raises(ErrorReadingFile):
+            FileSerializer.read_file("file.yml")
+
+
+def test_parse():
+    services = FileSerializer.parse(b"myapi:\n  - path: /users\n")
+    assert services == {"myapi": [{"path": "/users"}]}
+
+
+def test_parse_services_without_a_list():
+    with pytest.raises(ErrorValidatingSchema) as e:
+        FileSerializer.parse(b"myapi:\nbooks: 3\nusers: []\n")
+    assert e.value.errors == {
+        "myapi": ["must be of list type"],
+        "books": ["must be of list type"],
+    }
+
+
+def test_parse_invalid_yaml():
+    with pytest.raises(ErrorReadingFile) as e:
+        FileSerializer.parse(b"myapi: [\n")
+    assert "expected" in e.value.errors
+
+
+def test_service_names(manifest):
+    manifest.write_text("users:\n  - path: /users\nbooks: []\n")
+    assert FileSerializer.service_names(str(manifest)) == ["users", "books"]
+
+
+def test_service_names_without_services(manifest):
+    manifest.write_text("{}\n")
+    with pytest.raises(ErrorReadingFile):
+        FileSerializer.service_names(str(manifest))
+
+
+def test_stream_skips_invalid_endpoints(manifest):
+    manifest.write_text(
+        "users:\n  - path: /users\n    schema:\n      a:\n        type: string\n"
+        "  - path: /bad\n"
+        "  - path: /books\n    schema:\n      a:\n        type: string\n"
+    )
+    errors = {}
+    endpoints = FileSerializer.stream(str(manifest), "users", errors)
+    assert [e["path"] for e in endpoints] == ["/users", "/books"]
+    assert list(errors) == ["users"]
+    assert errors["users"][1]["path"] == "/bad"
+
+
+def test_stream_routes(manifest):
+    manifest.write_text(
+        "users:\n  - path: /users\n    schema:\n      a:\n        type: string\n"
+        "  - path: /users/books\n"
+        "books:\n  - path: /books\n  - {schema: {}}\n"
+    )
+    routes = FileSerializer.stream_routes(str(manifest), ["books"])
+    assert routes["books"].to_table() == {"books": {"": 0}}
+
+    with pytest.raises(ErrorValidatingSchema) as e:
+        FileSerializer.stream_routes(str(manifest), ["books", "users"])
+    assert list(e.value.errors) == ["users"]
+    assert e.value.errors["users"][1]["errors"] == {
+        "path": ["shadowed by `/users/{id}` of `/users` at 0"]
+    }
+
+
+def test_stream_routes_invalid_yaml(manifest):
+    manifest.write_text("users: 3\n")
+    with pytest.raises(ErrorReadingFile):
+        FileSerializer.stream_routes(str(manifest), ["users"])
+
+
+def test_stream_services_at_once(manifest):
+    valid = "  - path: /{0}{1}\n    schema:\n      a:\n        type: string\n"
+    invalid = "  - path: /{0}{1}\n    name: NOT VALID\n"
+    lines = []
+    for name in ("users", "books"):
+        lines.append(f"{name}:\n")
+        for i in range(300):
+            lines.append((valid if i % 2 else invalid).format(name, i))
+    manifest.write_text("".join(lines))
+    errors, paths = {}, {}
+
+    def read(name):
+        stream = FileSerializer.stream(str(manifest), name, errors)
+        paths[name] = [e["path"] for e in stream]
+
+    # Threads switch often so the validations interleave.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(read, ["users", "books"]))
+    finally:
+        sys.setswitchinterval(interval)
+
+    for name in ("users", "books"):
+        assert paths[name] == [f"/{name}{i}" for i in range(1, 300, 2)]
+        assert list(errors[name]) == list(range(0, 300, 2))
+
+
+def test_stream_invalid_yaml(manifest):
+    manifest.write_text("users:\n  - path: [\n")
+    with pytest.raises(ErrorReadingFile):
+        list(FileSerializer.stream(str(manifest), "users", {}))
@@ -1,58 +1,731 @@
-from unittest.mock import patch, call
+import json
+import pytest
+from unittest.mock import patch, call, MagicMock
 from apiruns.services import Apiruns
+from apiruns.bench import EndpointStats
+from apiruns.clients import ServiceImages
+from apiruns.cache import ModelsState
+from apiruns.cache import ImageCache
+from apiruns.artifact import Artifact
+from apiruns.utils import fingerprint
+from apiruns.exceptions import ErrorCreatingModels
+from apiruns.exceptions import ErrorSnapshotNotFound
+from apiruns.exceptions import ErrorValidatingSchema
+from apiruns.exceptions import ErrorReadingFile
+from apiruns.exceptions import ErrorServiceNotFound
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("APIRUNS_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def reading(create_mock: MagicMock) -> list:
+    """Calls of a `create_models` mock, reading the models as the client does."""
+    sent = []
+
+    def create_models(models, host=None):
+        sent.append(call(list(models), host=host))
+
+    create_mock.side_effect = create_models
+    return sent
 
 
 class TestApiruns:
 
     data = [{"path": "/users", "schema": {"name": {"type": "string"}}}]
+    books = [{"path": "/books", "schema": {"title": {"type": "string"}}}]
 
     @patch("apiruns.services.typer.echo")
-    @patch("apiruns.services.FileSerializer.validate")
-    @patch("apiruns.services.DockerClient.compose_service")
-    @patch("apiruns.services.FileSerializer.read_file")
-    def test_build_success(
-        self, read_file_mock, compose_mock, validator_mock, typer_mock
-    ):
-        read_file_mock.return_value = "my_api", self.data
+    @patch("apiruns.services.DockerClient.compose_services")
+    @patch("apiruns.services.FileSerializer.load")
+    def test_build_success(self, load_mock, compose_mock, typer_mock):
+        load_mock.return_value = {"my_api": self.data, "books": self.books}
         Apiruns.build("mifile.yml")
 
         # asserts
-        read_file_mock.assert_called_with("mifile.yml")
-        compose_mock.assert_called_with("my_api", start=False)
-        validator_mock.assert_called_with(self.data)
-        calls = [call("Building API"), call("Services made.")]
+        load_mock.assert_called_with("mifile.yml", cache=True)
+        compose_mock.assert_called_with(
+            {"my_api": 0, "books": 1},
+            start=False,
+            images=ServiceImages.build(),
+            parallel=None,
+            replicas=1,
+            balance="round-robin",
+        )
+        calls = [call("Building my_api, books"), call("Services made.")]
         typer_mock.assert_has_calls(calls, any_order=False)
 
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.DockerClient.compose_services")
+    @patch("apiruns.services.FileSerializer.load")
+    def test_build_with_output(self, load_mock, compose_mock, typer_mock, cache):
+        load_mock.return_value = {"my_api": self.data, "books": self.books}
+        ImageCache.set("mongo:latest", "sha256:1b2c", "mongo@sha256:9d0f")
+        output = cache / "apiruns-build.json"
+        Apiruns.build("mifile.yml", output=str(output))
+
+        # asserts
+        services, images = Artifact.load(str(output))
+        assert services == {"my_api": self.data, "books": self.books}
+        assert images == ServiceImages(db="mongo@sha256:9d0f")
+        assert typer_mock.call_args[0][0].startswith(
+            f"Artifact written to {output} (sha256:"
+        )
+
     @patch("apiruns.services.APIClient")
     @patch("apiruns.services.typer.echo")
-    @patch("apiruns.services.FileSerializer.validate")
-    @patch("apiruns.services.DockerClient.compose_service")
-    @patch("apiruns.services.FileSerializer.read_file")
+    @patch("apiruns.services.DockerClient")
+    @patch("apiruns.services.FileSerializer.load")
+    def test_up_from_artifact(
+        self, load_mock, docker_mock, typer_mock, client_mock, cache
+    ):
+        output = cache / "apiruns-build.json"
+        images = ServiceImages(db="mongo@sha256:9d0f")
+        Artifact.write(str(output), {"my_api": self.data}, images)
+        docker_mock.compose_services.return_value = {"my_api": ["C1", "C2"]}
+        docker_mock.api_port.return_value = "8000"
+        client_mock.ping.return_value = 0.5
+        sent = reading(client_mock.create_models)
+        Apiruns.up("missing.yml", artifact=str(output))
+
+        # asserts
+        load_mock.assert_not_called()
+        assert docker_mock.compose_services.call_args[1]["images"] == images
+        assert sent == [call(self.data, host=client_mock.build_host.return_value)]
+
+    def test_load_artifact_with_image_options(self, cache):
+        output = cache / "apiruns-build.json"
+        Artifact.write(str(output), {"my_api": self.data}, ServiceImages(db="mongo:5"))
+        services, images = Apiruns._load(
+            "missing.yml", True, str(output), db_image="mongo:6"
+        )
+
+        # asserts
+        assert services == {"my_api": self.data}
+        assert images == ServiceImages(db="mongo:6")
+
+    def test_load_artifact_overrides_one_image(self, cache):
+        output = cache / "apiruns-build.json"
+        pinned = ServiceImages(
+            api="josesalasdev/apiruns@sha256:1a2b", db="mongo@sha256:9d0f"
+        )
+        Artifact.write(str(output), {"my_api": self.data}, pinned)
+        _, images = Apiruns._load("missing.yml", True, str(output), db_image="mongo:6")
+        _, versioned = Apiruns._load("missing.yml", True, str(output), version="0.1.0")
+
+        # asserts
+        assert images == ServiceImages(api=pinned.api, db="mongo:6")
+        assert versioned == ServiceImages(
+            api="josesalasdev/apiruns:0.1.0", db=pinned.db
+        )
+
+    @patch("apiruns.services.ModelsState")
+    @patch("apiruns.services.APIClient")
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.DockerClient.compose_services")
+    @patch("apiruns.services.FileSerializer.load")
     def test_up_success(
-        self, read_file_mock, compose_mock, validator_mock, typer_mock, client_mock
+        self, load_mock, compose_mock, typer_mock, client_mock, state_mock
     ):
-        read_file_mock.return_value = "my_api", self.data
-        Apiruns.up("mifile.yml")
+        load_mock.return_value = {"my_api": self.data}
+        compose_mock.return_value = {"my_api": ["C1", "C2"]}
+        state_mock.get.return_value = None
+        client_mock.ping.return_value = 0.5
+        client_mock.build_host.return_value = "http://localhost:8000"
+        sent = reading(client_mock.create_models)
+        Apiruns.up("mifile.yml", cache=False)
 
         # asserts
-        read_file_mock.assert_called_with("mifile.yml")
-        compose_mock.assert_called_with("my_api", start=True)
-        validator_mock.assert_called_with(self.data)
+        load_mock.assert_called_with("mifile.yml", cache=False)
+        compose_mock.assert_called_with(
+            {"my_api": 0},
+            start=True,
+            timeout=None,
+            images=ServiceImages.build(),
+            parallel=None,
+            replicas=1,
+            balance="round-robin",
+        )
         calls = [
-            call("Building API"),
+            call("Building my_api"),
             call("Starting services"),
-            call("API listen on 8000"),
+            call("`my_api` ready in 0.50s"),
+            call("`my_api` listen on 8000"),
         ]
         typer_mock.assert_has_calls(calls, any_order=False)
-        client_mock.ping.assert_called_with()
-        client_mock.create_models.assert_called_with(self.data)
+        client_mock.build_host.assert_called_with("8000")
+        client_mock.ping.assert_called_with(deadline=None, host="http://localhost:8000")
+        assert sent == [call(self.data, host="http://localhost:8000")]
+        # Models state is checked again for the composed containers.
+        assert state_mock.get.call_args_list == [
+            call("my_api", []),
+            call("my_api", ["C1", "C2"]),
+        ]
+        state_mock.set.assert_called_once_with(
+            "my_api", ["C1", "C2"], {"/users": fingerprint(self.data[0])}
+        )
+
+    @patch("apiruns.services.ModelsState")
+    @patch("apiruns.services.APIClient")
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.DockerClient.compose_services")
+    @patch("apiruns.services.FileSerializer.load")
+    def test_up_reused_containers_keep_models(
+        self, load_mock, compose_mock, typer_mock, client_mock, state_mock
+    ):
+        load_mock.return_value = {"my_api": self.data}
+        compose_mock.return_value = {"my_api": ["C2", "C1"]}
+        registered = {"/users": fingerprint(self.data[0])}
+        state_mock.get.side_effect = [None, registered]
+        client_mock.ping.return_value = 0.5
+        sent = reading(client_mock.create_models)
+        Apiruns.up("mifile.yml")
+
+        # asserts
+        state_mock.get.assert_called_with("my_api", ["C1", "C2"])
+        assert sent == [call([], host=client_mock.build_host())]
+
+    @patch("apiruns.services.ModelsState")
+    @patch("apiruns.services.APIClient")
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.DockerClient.compose_services")
+    @patch("apiruns.services.FileSerializer.load")
+    def test_up_many_services(
+        self, load_mock, compose_mock, typer_mock, client_mock, state_mock
+    ):
+        load_mock.return_value = {"users": self.data, "books": self.books}
+        compose_mock.return_value = {"users": ["C1", "C2"], "books": ["C3", "C4"]}
+        state_mock.get.return_value = None
+        client_mock.ping.return_value = 0.5
+        client_mock.build_host.side_effect = lambda port: f"http://localhost:{port}"
+        sent = reading(client_mock.create_models)
+        Apiruns.up("mifile.yml", parallel=2)
+
+        # asserts
+        compose_mock.assert_called_once_with(
+            {"users": 0, "books": 1},
+            start=True,
+            timeout=None,
+            images=ServiceImages.build(),
+            parallel=2,
+            replicas=1,
+            balance="round-robin",
+        )
+        assert len(sent) == 2
+        assert call(self.data, host="http://localhost:8000") in sent
+        assert call(self.books, host="http://localhost:8001") in sent
+        typer_mock.assert_any_call("`books` listen on 8001")
+
+    @patch("apiruns.services.APIClient")
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.DockerClient.compose_services")
+    @patch("apiruns.services.FileSerializer.load")
+    def test_up_stream(
+        self, load_mock, compose_mock, typer_mock, client_mock, tmp_path, cache
+    ):
+        path = tmp_path / "api.yml"
+        path.write_text(
+            "users:\n  - path: /users\n    schema:\n      name:\n        type: string\n"
+            "  - path: /bad\n"
+            "books:\n  - path: /books\n    schema:\n      title:\n        type: string\n"
+        )
+        compose_mock.return_value = {"users": ["C1"], "books": ["C2"]}
+        client_mock.ping.return_value = 0.5
+        client_mock.build_host.return_value = "http://localhost:8000"
+        sent = reading(client_mock.create_models)
+        with pytest.raises(ErrorValidatingSchema) as e:
+            Apiruns.up(str(path), stream=True)
+
+        # asserts
+        load_mock.assert_not_called()
+        assert compose_mock.call_args[0][0] == {"users": 0, "books": 1}
+        assert call(self.data, host="http://localhost:8000") in sent
+        assert call(self.books, host="http://localhost:8000") in sent
+        assert list(e.value.errors) == ["users"]
+        assert list(e.value.errors["users"]) == [1]
+        assert ModelsState.get("users", ["C1"]) == {"/users": fingerprint(self.data[0])}
+
+    @patch("apiruns.services.DockerClient.compose_services")
+    def test_up_stream_paths_in_conflict(self, compose_mock, tmp_path):
+        path = tmp_path / "api.yml"
+        path.write_text("users:\n  - path: /users\n  - path: /users/\n")
+        with pytest.raises(ErrorValidatingSchema) as e:
+            Apiruns.up(str(path), stream=True)
+
+        # asserts
+        errors = e.value.errors["users"][1]["errors"]
+        assert errors == {"path": ["duplicates `/users` at 0"]}
+        compose_mock.assert_not_called()
+
+    @patch("apiruns.services.ModelsState")
+    @patch("apiruns.services.APIClient")
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.DockerClient.compose_services")
+    @patch("apiruns.services.FileSerializer.load")
+    def test_up_collects_errors_by_service(
+        self, load_mock, compose_mock, typer_mock, client_mock, state_mock
+    ):
+        load_mock.return_value = {"users": self.data, "books": self.books}
+        compose_mock.return_value = {"users": ["C1", "C2"], "books": ["C3", "C4"]}
+        state_mock.get.return_value = None
+        client_mock.ping.return_value = 0.5
+
+        def create_models(models, host):
+            if list(models) == self.books:
+                raise ErrorCreatingModels(errors={"/books": "500"})
+
+        client_mock.create_models.side_effect = create_models
+        with pytest.raises(ErrorCreatingModels) as e:
+            Apiruns.up("mifile.yml")
+
+        # asserts
+        assert e.value.errors == {"books": {"/books": "500"}}
+        typer_mock.assert_any_call("`users` listen on 8000")
+
+    @patch("apiruns.services.APIClient")
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.DockerClient")
+    @patch("apiruns.services.FileSerializer.load")
+    def test_up_reconcile(self, load_mock, docker_mock, typer_mock, client_mock, cache):
+        load_mock.return_value = {"my_api": self.data + self.books}
+        docker_mock.running_services.return_value = {"my_api": ["C1", "C2"]}
+        docker_mock.api_port.return_value = "8000"
+        client_mock.ping.return_value = 0.5
+        ModelsState.set("my_api", ["C1", "C2"], {"/users": fingerprint(self.data[0])})
+        sent = reading(client_mock.create_models)
+        Apiruns.up("mifile.yml", reconcile=True)
+
+        # asserts
+        docker_mock.running_services.assert_called_once_with(["my_api"])
+        docker_mock.compose_services.assert_not_called()
+        assert sent == [call(self.books, host=client_mock.build_host.return_value)]
+        typer_mock.assert_any_call("Services already running: my_api")
+        state = ModelsState.get("my_api", ["C1", "C2"])
+        assert state == {
+            "/users": fingerprint(self.data[0]),
+            "/books": fingerprint(self.books[0]),
+        }
+
+    @patch("apiruns.services.APIClient")
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.DockerClient")
+    @patch("apiruns.services.FileSerializer.load")
+    def test_up_reconcile_with_new_containers(
+        self, load_mock, docker_mock, typer_mock, client_mock, cache
+    ):
+        load_mock.return_value = {"my_api": self.data, "books": self.books}
+        docker_mock.running_services.return_value = {
+            "my_api": ["C1", "C2"],
+            "books": [],
+        }
+        docker_mock.compose_services.return_value = {"books": ["C3", "C4"]}
+        docker_mock.api_port.return_value = "8000"
+        client_mock.ping.return_value = 0.5
+        client_mock.build_host.return_value = "http://localhost:8000"
+        ModelsState.set("my_api", ["C1", "C2"], {"/users": fingerprint(self.data[0])})
+        sent = reading(client_mock.create_models)
+        Apiruns.up("mifile.yml", reconcile=True)
+
+        # asserts
+        docker_mock.compose_services.assert_called_once()
+        assert docker_mock.compose_services.call_args[0][0] == {"books": 1}
+        assert len(sent) == 2
+        assert call([], host="http://localhost:8000") in sent
+        assert call(self.books, host="http://localhost:8000") in sent
+        assert ModelsState.get("books", ["C3", "C4"]) == {
+            "/books": fingerprint(self.books[0])
+        }
+
+    @patch("apiruns.services.FileWatcher.create")
+    @patch("apiruns.services.Apiruns.up")
+    def test_dev_without_watch(self, up_mock, watcher_mock):
+        Apiruns.dev("mifile.yml", timeout=5)
+
+        # asserts
+        up_mock.assert_called_once_with(
+            "mifile.yml",
+            version=None,
+            timeout=5,
+            api_image=None,
+            db_image=None,
+            reconcile=True,
+        )
+        watcher_mock.assert_not_called()
+
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.Apiruns._watch")
+    @patch("apiruns.services.FileWatcher.create")
+    @patch("apiruns.services.Apiruns.up")
+    def test_dev_watch(self, up_mock, watcher_mock, watch_mock, echo_mock):
+        watcher = watcher_mock.return_value.__enter__.return_value
+        watcher.KIND = "inotify"
+        watch_mock.side_effect = KeyboardInterrupt
+        Apiruns.dev("mifile.yml", watch=True)
+
+        # asserts
+        watcher_mock.assert_called_once_with("mifile.yml", polling=False)
+        watch_mock.assert_called_once_with("mifile.yml", watcher)
+        echo_mock.assert_has_calls(
+            [
+                call("Watching mifile.yml with inotify, Ctrl+C to stop."),
+                call("Stopped watching."),
+            ]
+        )
+
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.Apiruns._reload")
+    @patch("apiruns.services.DockerClient.running_services")
+    @patch("apiruns.services.read_bytes")
+    def test_watch_reloads_changes(
+        self, read_mock, running_mock, reload_mock, echo_mock
+    ):
+        first = b"my_api:\n  - path: /users\n"
+        second = b"my_api:\n  - path: /books\n"
+        # Start, unchanged save, removed while saving, change, bad change.
+        read_mock.side_effect = [first, first, OSError, second, b"my_api: ["]
+        running_mock.return_value = {"my_api": ["C1"]}
+        reload_mock.side_effect = [None, ErrorReadingFile(errors="bad yaml")]
+        watcher = MagicMock()
+        watcher.wait.side_effect = [True] * 4 + [KeyboardInterrupt]
+        with pytest.raises(KeyboardInterrupt):
+            Apiruns._watch("mifile.yml", watcher)
+
+        # asserts
+        running_mock.assert_called_once_with(["my_api"])
+        reload_mock.assert_has_calls(
+            [
+                call(second, {"my_api": 0}, {"my_api": ["C1"]}),
+                call(b"my_api: [", {"my_api": 0}, {"my_api": ["C1"]}),
+            ]
+        )
+        echo_mock.assert_called_once_with("Error reading configuration file. bad yaml")
+
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.APIClient.create_models")
+    @patch("apiruns.services.DockerClient.running_services")
+    @patch("apiruns.services.read_bytes")
+    def test_watch_survives_a_service_without_list(
+        self, read_mock, running_mock, create_mock, echo_mock
+    ):
+        read_mock.side_effect = [b"myapi:\n  - path: /users\n", b"myapi:\n"]
+        running_mock.return_value = {"myapi": ["C1"]}
+        watcher = MagicMock()
+        watcher.wait.side_effect = [True, KeyboardInterrupt]
+        with pytest.raises(KeyboardInterrupt):
+            Apiruns._watch("mifile.yml", watcher)
+
+        # asserts
+        assert watcher.wait.call_count == 2
+        create_mock.assert_not_called()
+        echo_mock.assert_called_once_with(
+            "Error validating schema. {'myapi': ['must be of list type']}"
+        )
+
+    def manifest(self, services: dict) -> bytes:
+        return json.dumps(services).encode()
 
-    @patch("apiruns.services.DockerClient.service_down")
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.DockerClient.api_port", return_value="8000")
+    @patch("apiruns.services.APIClient.create_models")
+    def test_reload_only_changed_models(self, create_mock, port_mock, echo_mock, cache):
+        users = dict(self.data[0], name="people")
+        ModelsState.set("my_api", ["C1"], {"/users": fingerprint(self.data[0])})
+        content = self.manifest({"my_api": [users] + self.books, "new": self.data})
+        sent = reading(create_mock)
+        Apiruns._reload(content, {"my_api": 0}, {"my_api": ["C1"]})
+
+        # asserts
+        assert sent == [call([users] + self.books, host="http://localhost:8000")]
+        assert ModelsState.get("my_api", ["C1"]) == {
+            "/users": fingerprint(users),
+            "/books": fingerprint(self.books[0]),
+        }
+        echo_mock.assert_any_call("New services need `apiruns up`: new")
+
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.APIClient.create_models")
+    def test_reload_without_changes(self, create_mock, echo_mock, cache):
+        ModelsState.set("my_api", ["C1"], {"/users": fingerprint(self.data[0])})
+        Apiruns._reload(
+            self.manifest({"my_api": self.data}), {"my_api": 0}, {"my_api": ["C1"]}
+        )
+
+        # asserts
+        create_mock.assert_not_called()
+        assert echo_mock.call_args[0][0].startswith("Reloaded no models changed in")
+
+    @patch("apiruns.services.FileSerializer.validate_endpoints")
+    @patch("apiruns.services.APIClient.create_models")
+    def test_reload_invalid_changes(self, create_mock, validate_mock, cache):
+        validate_mock.side_effect = ErrorValidatingSchema(errors={1: "bad"})
+        ModelsState.set("my_api", ["C1"], {"/users": fingerprint(self.data[0])})
+        content = self.manifest({"my_api": self.data + self.books})
+        with pytest.raises(ErrorValidatingSchema) as e:
+            Apiruns._reload(content, {"my_api": 0}, {"my_api": ["C1"]})
+
+        # asserts
+        assert e.value.errors == {"my_api": {1: "bad"}}
+        validate_mock.assert_called_once_with({1: self.books[0]})
+        create_mock.assert_not_called()
+
+    @patch("apiruns.services.APIClient.create_models")
+    def test_reload_errors_by_manifest_position(self, create_mock, cache):
+        ModelsState.set("my_api", ["C1"], {"/users": fingerprint(self.data[0])})
+        content = self.manifest({"my_api": self.data + self.books + [{"path": "/a"}]})
+        with pytest.raises(ErrorValidatingSchema) as e:
+            Apiruns._reload(content, {"my_api": 0}, {"my_api": ["C1"]})
+
+        # asserts
+        assert list(e.value.errors["my_api"]) == [2]
+        create_mock.assert_not_called()
+
+    @patch("apiruns.services.APIClient.create_models")
+    def test_reload_paths_in_conflict(self, create_mock, cache):
+        ModelsState.set("my_api", ["C1"], {"/users": fingerprint(self.data[0])})
+        users = dict(self.data[0], path="/users/")
+        content = self.manifest({"my_api": self.data + [users]})
+        with pytest.raises(ErrorValidatingSchema) as e:
+            Apiruns._reload(content, {"my_api": 0}, {"my_api": ["C1"]})
+
+        # asserts
+        errors = e.value.errors["my_api"][1]["errors"]
+        assert errors == {"path": ["duplicates `/users` at 0"]}
+        create_mock.assert_not_called()
+
+    @patch("apiruns.services.APIClient.create_models")
+    def test_create_models_with_errors(self, create_mock, cache):
+        books = self.books[0]
+
+        def create_models(models, host):
+            list(models)
+            raise ErrorCreatingModels(errors={"/books": "500"})
+
+        create_mock.side_effect = create_models
+        registered = {"/books": "old"}
+        with pytest.raises(ErrorCreatingModels):
+            Apiruns._create_models("my_api", ["C1"], self.data + [books], registered)
+
+        # asserts
+        state = ModelsState.get("my_api", ["C1"])
+        assert state == {"/users": fingerprint(self.data[0]), "/books": "old"}
+
+    @patch("apiruns.services.os.cpu_count")
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.DockerClient.compose_services")
+    @patch("apiruns.services.FileSerializer.load")
+    def test_build_with_replicas_by_cpu(
+        self, load_mock, compose_mock, typer_mock, cpu_mock
+    ):
+        load_mock.return_value = {"my_api": self.data}
+        cpu_mock.return_value = 4
+        Apiruns.build("mifile.yml", replicas=0, balance="least-conn")
+
+        # asserts
+        assert compose_mock.call_args.kwargs["replicas"] == 4
+        assert compose_mock.call_args.kwargs["balance"] == "least-conn"
+
+    @patch("apiruns.services.LoadGenerator")
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.FileSerializer.load")
+    def test_bench(self, load_mock, typer_mock, generator_mock, tmp_path):
+        load_mock.return_value = {"my_api": self.data, "books": self.books}
+        report = {"POST /books": EndpointStats([0.001]).to_json(1.0)}
+
+        async def run():
+            return report
+
+        generator_mock.return_value.run.side_effect = run
+        output = tmp_path / "bench.json"
+        resp = Apiruns.bench("mifile.yml", service="books", output=str(output))
+
+        # asserts
+        generator_mock.assert_called_once_with(
+            "http://localhost:8001", self.books, 16, 0.0, 10.0, None
+        )
+        assert resp == {"books": report}
+        assert json.loads(output.read_text()) == {"books": report}
+        typer_mock.assert_any_call("Loading `books` on http://localhost:8001 for 10.0s")
+
+    @patch("apiruns.services.LoadGenerator")
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.FileSerializer.load")
+    def test_bench_skips_services_without_endpoints(
+        self, load_mock, typer_mock, generator_mock
+    ):
+        load_mock.return_value = {"my_api": []}
+        resp = Apiruns.bench("mifile.yml")
+
+        # asserts
+        assert resp == {}
+        generator_mock.assert_not_called()
+        typer_mock.assert_called_once_with("Skipping `my_api`, it has no endpoints.")
+
+    @patch("apiruns.services.LoadGenerator")
+    @patch("apiruns.services.FileSerializer.load")
+    def test_bench_unknown_service(self, load_mock, generator_mock):
+        load_mock.return_value = {"my_api": self.data, "books": self.books}
+        with pytest.raises(ErrorServiceNotFound) as e:
+            Apiruns.bench("mifile.yml", service="authors")
+
+        # asserts
+        assert e.value.errors == "`authors`, services: my_api, books"
+        generator_mock.assert_not_called()
+
+    @patch("apiruns.services.Seeder.insert")
+    @patch("apiruns.services.Seeder.connect")
+    @patch("apiruns.services.FileSerializer.load")
+    def test_seed(self, load_mock, connect_mock, insert_mock):
+        load_mock.return_value = {"my_api": self.data, "books": self.books}
+        insert_mock.return_value = 10
+        resp = Apiruns.seed("mifile.yml", 10, service="books", batch_size=5)
+
+        # asserts
+        connect_mock.assert_called_once_with("27018")
+        db = connect_mock.return_value
+        db.__getitem__.assert_called_once_with("books")
+        collection, documents, progress, batch_size = insert_mock.call_args[0]
+        assert collection is db.__getitem__.return_value
+        assert len(list(documents)) == 10
+        assert progress.collection == "books.books"
+        assert batch_size == 5
+        assert resp == {"books": {"books": 10}}
+
+    @patch("apiruns.services.Seeder.connect")
+    @patch("apiruns.services.FileSerializer.load")
+    def test_seed_unknown_service(self, load_mock, connect_mock):
+        load_mock.return_value = {"my_api": self.data}
+        with pytest.raises(ErrorServiceNotFound):
+            Apiruns.seed("mifile.yml", 10, service="books")
+
+        # asserts
+        connect_mock.assert_not_called()
+
+    @patch("apiruns.services.DockerClient.services_down")
     @patch("apiruns.services.FileSerializer.read_file")
-    def test_down_success(self, read_file_mock, compose_mock):
-        read_file_mock.return_value = "my_api", self.data
+    def test_down_success(self, read_file_mock, down_mock):
+        read_file_mock.return_value = {"my_api": self.data, "books": self.books}
         Apiruns.down("mifile.yml")
 
         # asserts
         read_file_mock.assert_called_with("mifile.yml")
-        compose_mock.assert_called_with("my_api")
+        down_mock.assert_called_with(["my_api", "books"], prune=False)
+
+    @patch("apiruns.services.DockerClient.services_down")
+    @patch("apiruns.services.FileSerializer.read_file")
+    def test_down_a_service(self, read_file_mock, down_mock):
+        read_file_mock.return_value = {"my_api": self.data, "books": self.books}
+        Apiruns.down("mifile.yml", service="books")
+
+        # asserts
+        down_mock.assert_called_with(["books"], prune=False)
+
+    @patch("apiruns.services.DockerClient.services_down")
+    @patch("apiruns.services.FileSerializer.read_file")
+    def test_down_unknown_service(self, read_file_mock, down_mock):
+        read_file_mock.return_value = {"my_api": self.data}
+        with pytest.raises(ErrorServiceNotFound):
+            Apiruns.down("mifile.yml", service="books")
+
+        # asserts
+        down_mock.assert_not_called()
+
+    @patch("apiruns.services.DockerClient.services_down")
+    @patch("apiruns.services.FileSerializer.read_file")
+    def test_down_all_stacks_with_prune(self, read_file_mock, down_mock):
+        down_mock.return_value = ["books"]
+        Apiruns.down("missing.yml", prune=True, all_stacks=True)
+
+        # asserts
+        read_file_mock.assert_not_called()
+        down_mock.assert_called_with(None, prune=True)
+
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.DockerClient.services_down")
+    def test_down_all_stacks_empty(self, down_mock, echo_mock):
+        down_mock.return_value = []
+        Apiruns.down("missing.yml", all_stacks=True)
+
+        # asserts
+        echo_mock.assert_called_once_with("No apiruns services found.")
+
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.DockerClient.snapshot_services")
+    @patch("apiruns.services.FileSerializer.read_file")
+    def test_snapshot(self, read_file_mock, snapshot_mock, echo_mock, cache):
+        read_file_mock.return_value = {"my_api": self.data, "books": self.books}
+
+        def save(destinations, timeout):
+            for path in destinations.values():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(b"x")
+            return {n: 1024 * 1024 for n in destinations}
+
+        snapshot_mock.side_effect = save
+        resp = Apiruns.snapshot("baseline", "mifile.yml", timeout=5)
+
+        # asserts
+        assert resp == {"my_api": 1024 * 1024, "books": 1024 * 1024}
+        destinations, timeout = snapshot_mock.call_args[0]
+        assert destinations == {
+            "my_api": cache / "snapshots" / "baseline" / "my_api.tar.gz",
+            "books": cache / "snapshots" / "baseline" / "books.tar.gz",
+        }
+        assert timeout == 5
+        echo_mock.assert_any_call("`books`: 1.0 MB, 0.0 MB compressed")
+
+    @patch("apiruns.services.DockerClient.snapshot_services")
+    @patch("apiruns.services.FileSerializer.read_file")
+    def test_snapshot_unknown_service(self, read_file_mock, snapshot_mock, cache):
+        read_file_mock.return_value = {"my_api": self.data}
+        with pytest.raises(ErrorServiceNotFound):
+            Apiruns.snapshot("baseline", "mifile.yml", service="other")
+
+        # asserts
+        snapshot_mock.assert_not_called()
+
+    @patch("apiruns.services.typer.echo")
+    @patch("apiruns.services.DockerClient.restore_services")
+    @patch("apiruns.services.FileSerializer.read_file")
+    def test_restore(self, read_file_mock, restore_mock, echo_mock, cache):
+        read_file_mock.return_value = {"my_api": self.data, "books": self.books}
+        source = cache / "snapshots" / "baseline" / "books.tar.gz"
+        source.parent.mkdir(parents=True)
+        source.write_bytes(b"x")
+        Apiruns.restore("baseline", "mifile.yml", service="books", db_image="mongo:6")
+
+        # asserts
+        restore_mock.assert_called_once_with(
+            {"my_api": 0, "books": 1},
+            {"books": source},
+            images=ServiceImages.build(db="mongo:6"),
+            timeout=None,
+        )
+
+    @patch("apiruns.services.DockerClient.restore_services")
+    @patch("apiruns.services.FileSerializer.read_file")
+    def test_restore_missing_snapshot(self, read_file_mock, restore_mock, cache):
+        read_file_mock.return_value = {"my_api": self.data}
+        with pytest.raises(ErrorSnapshotNotFound) as error:
+            Apiruns.restore("baseline", "mifile.yml")
+
+        # asserts
+        assert error.value.errors == [
+            str(cache / "snapshots" / "baseline" / "my_api.tar.gz")
+        ]
+        restore_mock.assert_not_called()
+
+    @patch("apiruns.services.DockerClient.restore_services")
+    @patch("apiruns.services.FileSerializer.read_file")
+    def test_restore_unknown_service(self, read_file_mock, restore_mock, cache):
+        read_file_mock.return_value = {"my_api": self.data}
+        source = cache / "snapshots" / "baseline" / "other.tar.gz"
+        source.parent.mkdir(parents=True)
+        source.write_bytes(b"x")
+        with pytest.raises(ErrorServiceNotFound) as error:
+            Apiruns.restore("baseline", "mifile.yml", service="other")
+
+        # asserts
+        assert error.value.errors == "`other`, services: my_api"
+        restore_mock.assert_not_called()
@@ -0,0 +1,105 @@
+import pytest
+from apiruns.stats import Histogram
+from apiruns.stats import RequestStats
+from apiruns.stats import recording
+
+
+@pytest.fixture(autouse=True)
+def stats():
+    RequestStats.enable()
+    yield RequestStats
+    RequestStats.disable()
+
+
+@pytest.mark.parametrize(
+    "path,template",
+    [
+        ("/_ping", "/_ping"),
+        ("/v1.43/_ping", "/_ping"),
+        ("/containers/create", "/containers/create"),
+        ("/containers/json", "/containers/json"),
+        ("/containers/4cb8b69e/json", "/containers/{id}/json"),
+        ("/containers/4cb8b69e", "/containers/{id}"),
+        ("/images/create", "/images/create"),
+        ("/images/josesalasdev/apiruns:latest/json", "/images/{name}/json"),
+        ("/networks/create", "/networks/create"),
+        ("/networks/apiruns", "/networks/{name}"),
+        ("/networks/prune", "/networks/prune"),
+        ("/volumes/create", "/volumes/create"),
+        ("/volumes/prune", "/volumes/prune"),
+        ("/volumes/apiruns-myapi-data", "/volumes/{name}"),
+        ("/admin/models", "/admin/models"),
+    ],
+)
+def test_template(path, template):
+    assert RequestStats.template(path) == template
+
+
+def test_histogram():
+    histogram = Histogram((0.01, 0.1))
+    for value in (0.005, 0.01, 0.05, 1.0):
+        histogram.observe(value)
+    # Asserts
+    assert histogram.cumulative() == [("0.01", 2), ("0.1", 3), ("+Inf", 4)]
+    assert histogram.count == 4
+    assert histogram.max == 1.0
+
+
+def test_record_by_series():
+    RequestStats.record("docker", "GET", "/networks/apiruns", "200", 0.002)
+    RequestStats.record("docker", "GET", "/networks/apiruns", "200", 0.004)
+    RequestStats.record("docker", "POST", "/networks/create", "201", 0.003)
+    # Asserts
+    series = RequestStats.series[("docker", "GET", "/networks/{name}", "200")]
+    assert series.count == 2
+    assert series.sum == pytest.approx(0.006)
+
+
+def test_render_most_called_first():
+    RequestStats.record("api", "POST", "/admin/models", "201", 0.01)
+    RequestStats.record("docker", "GET", "/_ping", "200", 0.001)
+    RequestStats.record("docker", "GET", "/_ping", "200", 0.003)
+    lines = RequestStats.render().splitlines()
+    # Asserts
+    assert "GET /_ping" in lines[1]
+    assert "POST /admin/models" in lines[2]
+    assert lines[-1] == "3 requests"
+
+
+def test_render_empty():
+    assert RequestStats.render() == "No requests recorded."
+
+
+def test_to_prometheus():
+    RequestStats.record("docker", "GET", "/_ping", "200", 0.002)
+    text = RequestStats.to_prometheus("up")
+    labels = 'command="up",client="docker",method="GET",path="/_ping",status="200"'
+    # Asserts
+    assert "# TYPE apiruns_http_request_duration_seconds histogram" in text
+    assert (
+        f'apiruns_http_request_duration_seconds_bucket{{{labels},le="0.001"}} 0' in text
+    )
+    assert (
+        f'apiruns_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1' in text
+    )
+    assert f"apiruns_http_request_duration_seconds_count{{{labels}}} 1" in text
+    assert text.endswith("\n")
+
+
+def test_recording(tmp_path, capsys):
+    RequestStats.disable()
+    path = tmp_path / "apiruns.prom"
+    with recording(stats=True, stats_file=str(path), command="down"):
+        assert RequestStats.enabled
+        RequestStats.record("docker", "DELETE", "/containers/1", "204", 0.002)
+    # Asserts
+    assert not RequestStats.enabled
+    assert "DELETE /containers/{id}" in capsys.readouterr().out
+    assert 'command="down"' in path.read_text()
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_recording_disabled():
+    RequestStats.disable()
+    with recording():
+        assert not RequestStats.enabled
@@ -0,0 +1,101 @@
+import json
+import asyncio
+import pytest
+from apiruns.timings import span
+from apiruns.timings import timed
+from apiruns.timings import tracing
+from apiruns.timings import Tracer
+
+
+@pytest.fixture(autouse=True)
+def tracer():
+    Tracer.enable()
+    yield Tracer
+    Tracer.disable()
+
+
+def test_span_disabled():
+    Tracer.disable()
+    Tracer.events = []
+    with span("a"):
+        pass
+    assert Tracer.events == []
+
+
+def test_span_nested_depth():
+    with span("parent", service="api"):
+        with span("child"):
+            pass
+    child, parent = Tracer.events
+    assert (child["name"], child["depth"]) == ("child", 1)
+    assert (parent["name"], parent["depth"]) == ("parent", 0)
+    assert parent["args"] == {"service": "api"}
+    assert parent["duration"] >= child["duration"]
+
+
+def test_timed_function_with_arg():
+    @timed("test.pull", arg="image")
+    def pull(image, tag="latest"):
+        return f"{image}:{tag}"
+
+    assert pull("mongo") == "mongo:latest"
+    assert pull(image="nginx", tag="alpine") == "nginx:alpine"
+    assert [e["args"] for e in Tracer.events] == [
+        {"image": "mongo"},
+        {"image": "nginx"},
+    ]
+
+
+def test_timed_coroutine_lanes():
+    @timed("test.sleep")
+    async def sleep():
+        await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(sleep(), sleep())
+
+    asyncio.run(main())
+    assert [e["name"] for e in Tracer.events] == ["test.sleep", "test.sleep"]
+    assert len({e["lane"] for e in Tracer.events}) == 2
+
+
+def test_to_chrome():
+    with span("docker.ping"):
+        pass
+    event = Tracer.to_chrome()["traceEvents"][0]
+    assert event["name"] == "docker.ping"
+    assert event["cat"] == "docker"
+    assert event["ph"] == "X"
+    assert event["dur"] >= 0
+
+
+def test_waterfall():
+    with span("apiruns.up"):
+        with span("docker.ping"):
+            pass
+    lines = Tracer.waterfall(width=10).splitlines()
+    assert len(lines) == 3
+    assert lines[1].endswith("| apiruns.up")
+    assert lines[2].endswith("|   docker.ping")
+
+
+def test_waterfall_empty():
+    Tracer.events = []
+    assert Tracer.waterfall() == "No timings recorded."
+
+
+def test_tracing_writes_trace(tmp_path, capsys):
+    Tracer.disable()
+    path = tmp_path / "trace.json"
+    with tracing(timings=True, trace=str(path)):
+        with span("apiruns.down"):
+            pass
+    assert not Tracer.enabled
+    assert "apiruns.down" in capsys.readouterr().out
+    assert json.loads(path.read_text())["traceEvents"][0]["name"] == "apiruns.down"
+
+
+def test_tracing_disabled():
+    Tracer.disable()
+    with tracing():
+        assert not Tracer.enabled
@@ -0,0 +1,116 @@
+import httpx
+import pytest
+from asyncio import run
+from unittest.mock import patch
+from apiruns.exceptions import ErrorMissingDependency
+from apiruns.stats import RequestStats
+from apiruns.transport import TransportSettings
+from apiruns.transport import InstrumentedTransport
+from apiruns.transport import InstrumentedSyncTransport
+from apiruns.transport import async_client
+from apiruns.transport import sync_client
+
+
+@pytest.fixture
+def stats():
+    RequestStats.enable()
+    yield
+    RequestStats.disable()
+
+
+class TestTransportSettings:
+    def test_limits_and_timeout(self):
+        settings = TransportSettings(
+            max_connections=4, max_keepalive=2, connect_timeout=1.0, read_timeout=9.0
+        )
+        # Asserts
+        assert settings.limits() == httpx.Limits(
+            max_connections=4, max_keepalive_connections=2, keepalive_expiry=30.0
+        )
+        assert settings.timeout() == httpx.Timeout(9.0, connect=1.0, pool=30.0)
+
+    def test_from_env(self, monkeypatch):
+        monkeypatch.setenv("APIRUNS_API_MAX_CONNECTIONS", "32")
+        monkeypatch.setenv("APIRUNS_API_POOL_TIMEOUT", "2.5")
+        monkeypatch.setenv("APIRUNS_API_HTTP2", "true")
+        monkeypatch.setenv("APIRUNS_DOCKER_MAX_CONNECTIONS", "64")
+        settings = TransportSettings(max_keepalive=8).from_env("api")
+        # Asserts
+        assert settings == TransportSettings(
+            max_connections=32, max_keepalive=8, pool_timeout=2.5, http2=True
+        )
+
+    def test_from_env_without_overrides(self):
+        settings = TransportSettings(max_connections=4)
+        assert settings.from_env("api") == settings
+
+
+class TestInstrumentedTransport:
+    def send(self, handler, url: str):
+        transport = InstrumentedTransport(httpx.MockTransport(handler), "docker")
+
+        async def main():
+            async with httpx.AsyncClient(transport=transport) as client:
+                return await client.get(url)
+
+        return run(main())
+
+    def test_records_template_and_status(self, stats):
+        response = self.send(
+            lambda request: httpx.Response(404), "http://localhost/containers/4cb8/json"
+        )
+        # Asserts
+        assert response.status_code == 404
+        assert list(RequestStats.series) == [
+            ("docker", "GET", "/containers/{id}/json", "404")
+        ]
+
+    def test_records_errors(self, stats):
+        def handler(request):
+            raise httpx.ConnectError("refused")
+
+        with pytest.raises(httpx.ConnectError):
+            self.send(handler, "http://localhost/_ping")
+        # Asserts
+        assert list(RequestStats.series) == [("docker", "GET", "/_ping", "error")]
+
+    def test_disabled(self, stats):
+        RequestStats.disable()
+        self.send(lambda request: httpx.Response(200), "http://localhost/_ping")
+        # Asserts
+        assert RequestStats.series == {}
+
+
+class TestInstrumentedSyncTransport:
+    def test_records_request(self, stats):
+        transport = InstrumentedSyncTransport(
+            httpx.MockTransport(lambda request: httpx.Response(201)), "api"
+        )
+        with httpx.Client(transport=transport) as client:
+            client.post("http://localhost:8000/admin/models", json={})
+        # Asserts
+        assert list(RequestStats.series) == [("api", "POST", "/admin/models", "201")]
+
+
+def test_async_client():
+    client = async_client(
+        TransportSettings(read_timeout=3.0), "docker", uds="/var/run/docker.sock"
+    )
+    # Asserts
+    assert isinstance(client._transport, InstrumentedTransport)
+    assert client._transport.client == "docker"
+    assert client.timeout.read == 3.0
+    assert client.trust_env is False
+    run(client.aclose())
+
+
+def test_sync_client_with_http2_missing_dependency():
+    with patch.dict("sys.modules", {"h2": None}):
+        with pytest.raises(ErrorMissingDependency):
+            sync_client(TransportSettings(http2=True), "api")
+
+
+def test_sync_client():
+    with sync_client(TransportSettings(), "api") as client:
+        assert isinstance(client._transport, InstrumentedSyncTransport)
+        assert client.timeout == TransportSettings().timeout()
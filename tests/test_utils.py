@@ -1,7 +1,15 @@
 import pytest
 import yaml
 from apiruns.utils import load_yaml
+from apiruns.utils import parse_yaml
+from apiruns.utils import read_bytes
 from apiruns.utils import encode_obj_to_url
+from apiruns.utils import fingerprint
+from apiruns.utils import iter_yaml_keys
+from apiruns.utils import iter_yaml_list
+from apiruns.utils import iter_yaml_list_field
+from apiruns.utils import split_image_reference
+from apiruns.utils import normalize_image_reference
 from unittest.mock import patch, mock_open
 
 
@@ -11,12 +19,115 @@ def test_file_not_found_load_yaml():
 
 
 def test_success_load_yaml():
-    with patch("builtins.open", mock_open(read_data="data")) as mock_file:
-        mock_file.return_value = """service_name: myproject"""
+    read_data = "service_name: myproject"
+    with patch("builtins.open", mock_open(read_data=read_data)) as mock_file:
         resp = load_yaml("mifile.yml")
         assert resp == {"service_name": "myproject"}
+        mock_file.return_value.__exit__.assert_called_once()
+
+
+def test_load_yaml_is_safe(tmp_path):
+    path = tmp_path / "api.yml"
+    path.write_text("service: !!python/object/apply:os.getcwd []")
+    with pytest.raises(yaml.YAMLError):
+        load_yaml(str(path))
+
+
+def test_parse_yaml_and_read_bytes(tmp_path):
+    path = tmp_path / "api.yml"
+    path.write_text("myapi:\n  - path: /users\n")
+    content = read_bytes(str(path))
+    assert parse_yaml(content) == {"myapi": [{"path": "/users"}]}
 
 
 def test_encode_obj_to_url():
     resp = encode_obj_to_url({"status": ["paused"]})
     assert resp == "%7B%22status%22%3A%20%5B%22paused%22%5D%7D"
+
+
+@pytest.mark.parametrize(
+    "reference,expected",
+    [
+        ("mongo", ("mongo", "latest")),
+        ("mongo:6.0", ("mongo", "6.0")),
+        ("mongo@sha256:9d0f", ("mongo", "sha256:9d0f")),
+        ("localhost:5000/api", ("localhost:5000/api", "latest")),
+        ("localhost:5000/api:1.0", ("localhost:5000/api", "1.0")),
+    ],
+)
+def test_split_image_reference(reference, expected):
+    assert split_image_reference(reference) == expected
+
+
+def test_normalize_image_reference():
+    assert normalize_image_reference("mongo") == "mongo:latest"
+    assert normalize_image_reference("mongo:6.0") == "mongo:6.0"
+    assert normalize_image_reference("mongo@sha256:9d0f") == "mongo@sha256:9d0f"
+
+
+def test_fingerprint():
+    a = fingerprint({"path": "/users", "schema": {"a": 1, "b": 2}})
+    b = fingerprint({"schema": {"b": 2, "a": 1}, "path": "/users"})
+    assert a == b
+    assert a != fingerprint({"path": "/users", "schema": {"a": 2, "b": 2}})
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    path = tmp_path / "api.yml"
+    path.write_text(
+        "users:\n"
+        "  - &users {path: /users, schema: {name: {type: string}}}\n"
+        "version: 2\n"
+        "books:\n"
+        "  - path: /books\n"
+        "  - *users\n"
+    )
+    return path
+
+
+def test_iter_yaml_keys(manifest):
+    assert list(iter_yaml_keys(str(manifest))) == ["users", "version", "books"]
+
+
+def test_iter_yaml_list_resolves_aliases(manifest):
+    items = list(iter_yaml_list(str(manifest), "books"))
+    assert items == [
+        {"path": "/books"},
+        {"path": "/users", "schema": {"name": {"type": "string"}}},
+    ]
+
+
+def test_iter_yaml_list_is_lazy(manifest):
+    items = iter_yaml_list(str(manifest), "users")
+    assert next(items) == {"path": "/users", "schema": {"name": {"type": "string"}}}
+    assert list(items) == []
+    assert list(iter_yaml_list(str(manifest), "missing")) == []
+
+
+def test_iter_yaml_list_field(manifest):
+    manifest.write_text(
+        manifest.read_text() + "  - <<: *users\n    name: people\n  - 3\n"
+    )
+    paths = iter_yaml_list_field(str(manifest), "books", "path")
+    assert list(paths) == ["/books", "/users", "/users", None]
+    assert list(iter_yaml_list_field(str(manifest), "missing", "path")) == []
+
+
+def test_iter_yaml_list_not_a_list(manifest):
+    with pytest.raises(ValueError):
+        list(iter_yaml_list(str(manifest), "version"))
+
+
+def test_iter_yaml_not_a_mapping(tmp_path):
+    path = tmp_path / "api.yml"
+    path.write_text("- users\n")
+    with pytest.raises(ValueError):
+        list(iter_yaml_keys(str(path)))
+
+
+def test_iter_yaml_is_safe(tmp_path):
+    path = tmp_path / "api.yml"
+    path.write_text("users:\n  - !!python/object/apply:os.getcwd []\n")
+    with pytest.raises(yaml.YAMLError):
+        list(iter_yaml_list(str(path), "users"))
@@ -0,0 +1,93 @@
+import os
+import sys
+import pytest
+from unittest.mock import patch
+from apiruns.watch import FileWatcher
+from apiruns.watch import InotifyWatcher
+from apiruns.watch import PollingWatcher
+
+linux_only = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="inotify is Linux only"
+)
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    path = tmp_path / "api.yml"
+    path.write_text("users: []\n")
+    return path
+
+
+def test_file_watcher_is_abstract(manifest):
+    with pytest.raises(TypeError):
+        FileWatcher(str(manifest))
+
+
+class TestPollingWatcher:
+    @pytest.fixture(autouse=True)
+    def interval(self):
+        with patch.object(PollingWatcher, "INTERVAL", 0.01):
+            yield
+
+    def test_wait_timeout(self, manifest):
+        with PollingWatcher(str(manifest)) as watcher:
+            assert watcher.wait(timeout=0.03) is False
+
+    def test_wait_change(self, manifest):
+        with PollingWatcher(str(manifest)) as watcher:
+            manifest.write_text("users: []\nbooks: []\n")
+            assert watcher.wait(timeout=1) is True
+            assert watcher.wait(timeout=0.03) is False
+
+    def test_wait_removed(self, manifest):
+        with PollingWatcher(str(manifest)) as watcher:
+            manifest.unlink()
+            assert watcher.wait(timeout=1) is True
+
+
+@linux_only
+class TestInotifyWatcher:
+    def test_wait_write(self, manifest):
+        with InotifyWatcher(str(manifest)) as watcher:
+            manifest.write_text("books: []\n")
+            assert watcher.wait(timeout=1) is True
+            assert watcher.wait(timeout=0.03) is False
+
+    def test_wait_rename(self, manifest):
+        with InotifyWatcher(str(manifest)) as watcher:
+            tmp = manifest.with_name(".api.yml.swp")
+            tmp.write_text("books: []\n")
+            os.replace(tmp, manifest)
+            assert watcher.wait(timeout=1) is True
+
+    def test_ignores_other_files(self, manifest):
+        with InotifyWatcher(str(manifest)) as watcher:
+            manifest.with_name("other.yml").write_text("books: []\n")
+            assert watcher.wait(timeout=0.05) is False
+
+    def test_close(self, manifest):
+        watcher = InotifyWatcher(str(manifest))
+        watcher.close()
+        watcher.close()
+        assert watcher.fd == -1
+
+    def test_missing_directory(self, tmp_path):
+        with pytest.raises(OSError):
+            InotifyWatcher(str(tmp_path / "missing" / "api.yml"))
+
+
+def test_create_inotify(manifest):
+    with FileWatcher.create(str(manifest)) as watcher:
+        expected = "inotify" if sys.platform.startswith("linux") else "polling"
+        assert watcher.KIND == expected
+
+
+def test_create_polling(manifest):
+    with FileWatcher.create(str(manifest), polling=True) as watcher:
+        assert isinstance(watcher, PollingWatcher)
+
+
+@patch("apiruns.watch.InotifyWatcher.__init__", side_effect=OSError)
+def test_create_without_inotify(mock_init, manifest):
+    with FileWatcher.create(str(manifest)) as watcher:
+        assert isinstance(watcher, PollingWatcher)